@@ -5,9 +5,13 @@ Fetches actual market data for the specified symbol and date range.
 """
 
 import os
+import queue
 import sys
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 import psycopg2
+from psycopg2.extras import execute_values
 from datetime import datetime, timezone, timedelta
 
 def get_db_conn():
@@ -17,24 +21,34 @@ def get_db_conn():
         user=os.getenv("POSTGRES_USER", "postgres"),
         password=os.getenv("POSTGRES_PASSWORD", "postgres"),
         dbname=os.getenv("POSTGRES_DB", "trading"),
+        # Backfills are idempotent (ON CONFLICT DO NOTHING), so a crash just
+        # means re-running; skip the WAL flush wait on every commit
+        options="-c synchronous_commit=off",
     )
 
-def fetch_alpaca_bars(symbol, start_date, end_date, api_key, secret_key):
+def make_session(api_key, secret_key):
+    """HTTP session that keeps the Alpaca connection alive across pages."""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    session.headers.update({
+        "APCA-API-KEY-ID": api_key,
+        "APCA-API-SECRET-KEY": secret_key
+    })
+    return session
+
+def fetch_alpaca_bar_pages(session, symbol, start_date, end_date):
     """
-    Fetch historical bars from Alpaca API.
-    Uses the v2 bars endpoint with 1-minute timeframe.
+    Fetch historical bars from Alpaca API, one page at a time.
+    Uses the v2 bars endpoint with 1-minute timeframe and follows
+    next_page_token so ranges over 10,000 bars are not truncated.
+    Raises RuntimeError on a failed page rather than ending early.
     """
     url = f"https://data.alpaca.markets/v2/stocks/{symbol}/bars"
     
-    headers = {
-        "APCA-API-KEY-ID": api_key,
-        "APCA-API-SECRET-KEY": secret_key
-    }
-    
     params = {
         "timeframe": "1Min",
-        "start": start_date.isoformat() + "Z",
-        "end": end_date.isoformat() + "Z",
+        "start": start_date.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "end": end_date.strftime("%Y-%m-%dT%H:%M:%SZ"),
         "limit": 10000,
         "adjustment": "raw",
         "feed": "iex"  # Free tier
@@ -45,66 +59,116 @@ def fetch_alpaca_bars(symbol, start_date, end_date, api_key, secret_key):
     print(f"  Start: {start_date}")
     print(f"  End: {end_date}")
     
-    response = requests.get(url, headers=headers, params=params)
-    
-    if response.status_code != 200:
-        print(f"❌ Error: {response.status_code}")
-        print(response.text)
-        return []
+    page = 1
+    while True:
+        response = session.get(url, params=params, timeout=30)
+        
+        if response.status_code != 200:
+            # Stopping quietly would look like the end of the range
+            raise RuntimeError(
+                f"Alpaca API error {response.status_code} on page {page}: {response.text}"
+            )
+        
+        data = response.json()
+        bars = data.get("bars") or []
+        if bars:
+            print(f"  Page {page}: {len(bars)} bars")
+            yield bars
+        
+        page_token = data.get("next_page_token")
+        if not page_token:
+            return
+        params["page_token"] = page_token
+        page += 1
+
+def prefetch(pages, depth=2):
+    """
+    Run a page generator in a background thread.
     
-    data = response.json()
-    bars = data.get("bars", [])
+    The next HTTP request is in flight while the caller is writing the
+    current page to the database, so network and DB time overlap.
+    """
+    q = queue.Queue(maxsize=depth)
+    done = object()
     
-    print(f"✅ Fetched {len(bars)} bars from Alpaca")
+    def producer():
+        try:
+            for page in pages:
+                q.put(page)
+        except Exception as e:
+            q.put(e)
+        finally:
+            q.put(done)
+    
+    threading.Thread(target=producer, daemon=True).start()
+    
+    while True:
+        item = q.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+def parse_alpaca_time(t):
+    """
+    Parse an Alpaca bar timestamp.
     
-    return bars
+    Bars come back as fixed-width 'YYYY-MM-DDTHH:MM:SSZ', so slice the
+    fields directly; anything else (e.g. fractional seconds) falls back
+    to fromisoformat.
+    """
+    if len(t) == 20 and t[19] == 'Z':
+        return datetime(
+            int(t[0:4]), int(t[5:7]), int(t[8:10]),
+            int(t[11:13]), int(t[14:16]), int(t[17:19]),
+            tzinfo=timezone.utc
+        )
+    return datetime.fromisoformat(t.replace('Z', '+00:00'))
 
-def insert_bars(conn, symbol, bars):
-    """Insert bars into database."""
+def get_or_create_symbol(conn, symbol):
+    """Get symbol ID, creating the symbol if needed."""
     cur = conn.cursor()
     
-    # Get or create symbol
     cur.execute("SELECT id FROM symbols WHERE symbol = %s", (symbol,))
     row = cur.fetchone()
     
     if row:
-        symbol_id = row[0]
-    else:
-        cur.execute("INSERT INTO symbols (symbol) VALUES (%s) RETURNING id", (symbol,))
-        symbol_id = cur.fetchone()[0]
-        conn.commit()
+        return row[0]
     
-    # Insert bars
-    inserted = 0
-    skipped = 0
+    # Committed together with the first page of bars
+    cur.execute("INSERT INTO symbols (symbol) VALUES (%s) RETURNING id", (symbol,))
+    return cur.fetchone()[0]
+
+def insert_bars(conn, symbol_id, bars):
+    """Insert bars into database."""
+    cur = conn.cursor()
     
-    for bar in bars:
-        try:
-            # Parse timestamp (Alpaca returns ISO8601 in UTC)
-            timestamp = datetime.fromisoformat(bar['t'].replace('Z', '+00:00'))
-            
-            cur.execute("""
-                INSERT INTO candles (time, symbol_id, open, high, low, close, volume)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (time, symbol_id) DO NOTHING
-            """, (
-                timestamp,
-                symbol_id,
-                float(bar['o']),
-                float(bar['h']),
-                float(bar['l']),
-                float(bar['c']),
-                int(bar['v'])
-            ))
-            
-            if cur.rowcount > 0:
-                inserted += 1
-            else:
-                skipped += 1
-                
-        except Exception as e:
-            print(f"Error inserting bar: {e}")
-            continue
+    # Insert bars in a single multi-row statement (one round-trip per page)
+    rows = [
+        (
+            parse_alpaca_time(bar['t']),
+            symbol_id,
+            float(bar['o']),
+            float(bar['h']),
+            float(bar['l']),
+            float(bar['c']),
+            int(bar['v'])
+        )
+        for bar in bars
+    ]
+    
+    # RETURNING + fetch=True collects results from every page, so the
+    # inserted count is exact even when rows span several pages
+    inserted_rows = execute_values(cur, """
+        INSERT INTO candles (time, symbol_id, open, high, low, close, volume)
+        VALUES %s
+        ON CONFLICT (time, symbol_id) DO NOTHING
+        RETURNING 1
+    """, rows, template="(%s, %s, %s, %s, %s, %s, %s)", page_size=1000, fetch=True)
+    
+    inserted = len(inserted_rows)
+    skipped = len(rows) - inserted
     
     conn.commit()
     return inserted, skipped
@@ -130,29 +194,51 @@ def main():
     end_date = datetime.now(timezone.utc)
     start_date = end_date - timedelta(days=days_back)
     
-    # Fetch bars from Alpaca
-    bars = fetch_alpaca_bars(symbol, start_date, end_date, api_key, secret_key)
-    
-    if not bars:
-        print("❌ No data received from Alpaca")
-        sys.exit(1)
+    session = make_session(api_key, secret_key)
     
     # Connect to database
     conn = get_db_conn()
+    symbol_id = get_or_create_symbol(conn, symbol)
     
-    # Insert bars
-    inserted, skipped = insert_bars(conn, symbol, bars)
+    # Insert each page as it arrives while the next one downloads
+    inserted = 0
+    skipped = 0
+    total = 0
+    first_time = last_time = None
+    min_price = float("inf")
+    max_price = float("-inf")
+    
+    pages = fetch_alpaca_bar_pages(session, symbol, start_date, end_date)
+    try:
+        for bars in prefetch(pages):
+            page_inserted, page_skipped = insert_bars(conn, symbol_id, bars)
+            inserted += page_inserted
+            skipped += page_skipped
+            total += len(bars)
+            
+            closes = [float(b['c']) for b in bars]
+            min_price = min(min_price, min(closes))
+            max_price = max(max_price, max(closes))
+            first_time = first_time or bars[0]['t']
+            last_time = bars[-1]['t']
+    except RuntimeError as e:
+        print(f"❌ Error: {e}")
+        print(f"   Backfill incomplete: {inserted} candles inserted up to {last_time}")
+        print("   Re-run to fill the rest (existing candles are skipped)")
+        sys.exit(1)
     
+    if not total:
+        print("❌ No data received from Alpaca")
+        sys.exit(1)
+    
+    print(f"✅ Fetched {total} bars from Alpaca")
     print("")
     print(f"✅ Backfill complete!")
     print(f"   Inserted: {inserted} candles")
     print(f"   Skipped: {skipped} (already existed)")
     print(f"   Symbol: {symbol}")
-    
-    if bars:
-        prices = [float(b['c']) for b in bars]
-        print(f"   Price range: ${min(prices):.2f} - ${max(prices):.2f}")
-        print(f"   Time range: {bars[0]['t']} to {bars[-1]['t']}")
+    print(f"   Price range: ${min_price:.2f} - ${max_price:.2f}")
+    print(f"   Time range: {first_time} to {last_time}")
     
     print("")
     print("Next steps:")
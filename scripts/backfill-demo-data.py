@@ -2,13 +2,23 @@
 """
 Backfill demo data for a full trading day (6.5 hours = 390 minutes)
 Generates realistic 1-minute candles from 09:30 to 16:00 ET (market hours)
+
+Requirements:
+    pip install numpy psycopg2-binary
+
+Usage:
+    python scripts/backfill-demo-data.py [SYMBOL] [BASE_PRICE] [SEED]
+    python scripts/backfill-demo-data.py AAPL 150.0 42
 """
 
+import csv
+import io
 import os
 import sys
+import numpy as np
 import psycopg2
 from datetime import datetime, timezone, timedelta
-import random
+from typing import Optional
 
 # Database connection
 def get_db_conn():
@@ -18,12 +28,19 @@ def get_db_conn():
         user=os.getenv("POSTGRES_USER", "postgres"),
         password=os.getenv("POSTGRES_PASSWORD", "postgres"),
         dbname=os.getenv("POSTGRES_DB", "trading"),
+        # Backfills are idempotent (ON CONFLICT DO NOTHING), so a crash just
+        # means re-running; skip the WAL flush wait on every commit
+        options="-c synchronous_commit=off",
     )
 
-def generate_trading_day_candles(symbol: str = "AAPL", base_price: float = 150.0):
+def generate_trading_day_candles(symbol: str = "AAPL", base_price: float = 150.0,
+                                 rng: Optional[np.random.Generator] = None):
     """
     Generate realistic candles for a full trading day.
     Market hours: 09:30 - 16:00 ET = 390 minutes
+    
+    All random draws come from the single generator passed in (or a fresh
+    one), so seeding it makes the generated day reproducible.
     """
     candles = []
     
@@ -34,41 +51,47 @@ def generate_trading_day_candles(symbol: str = "AAPL", base_price: float = 150.0
     # Adjust for ET timezone (approximate - 4 or 5 hours from UTC)
     market_open_utc = market_open_et + timedelta(hours=4)  # EDT offset
     
-    current_price = base_price
+    n = 390  # 6.5 hours of 1-minute candles
     volatility = 0.002  # 0.2% per minute
+    rng = rng or np.random.default_rng()
+    
+    # Random walk: each close compounds a gaussian % change on the previous
+    changes = rng.normal(0, volatility, n)
+    closes = base_price * np.cumprod(1 + changes)
+    opens = np.concatenate(([base_price], closes[:-1]))
+    
+    # High/Low with some spread
+    spread = np.abs(closes - opens) * rng.uniform(1.2, 2.0, n)
+    highs = np.maximum(opens, closes) + spread * rng.random(n)
+    lows = np.minimum(opens, closes) - spread * rng.random(n)
     
-    # Generate 390 candles (6.5 hours)
-    for i in range(390):
-        candle_time = market_open_utc + timedelta(minutes=i)
-        
-        # Random price movement
-        change = random.gauss(0, volatility)
-        open_price = current_price
-        close_price = open_price * (1 + change)
-        
-        # High/Low with some spread
-        spread = abs(close_price - open_price) * random.uniform(1.2, 2.0)
-        high_price = max(open_price, close_price) + spread * random.random()
-        low_price = min(open_price, close_price) - spread * random.random()
-        
-        # Volume (higher at open/close, lower mid-day)
-        hour = (i // 60)
-        if hour == 0 or hour >= 5:  # First or last hour
-            base_volume = random.randint(50000, 150000)
-        else:
-            base_volume = random.randint(20000, 80000)
-        
+    # Volume (higher at open/close, lower mid-day)
+    hours = np.arange(n) // 60
+    busy = (hours == 0) | (hours >= 5)  # First or last hour
+    volumes = np.where(
+        busy,
+        rng.integers(50000, 150001, n),
+        rng.integers(20000, 80001, n)
+    )
+    
+    # Stored unrounded: the columns are double precision and the summary
+    # output formats prices to cents anyway
+    for i, (o, h, l, c, v) in enumerate(zip(
+        opens.tolist(),
+        highs.tolist(),
+        lows.tolist(),
+        closes.tolist(),
+        volumes.tolist()
+    )):
         candles.append({
-            'time': candle_time,
+            'time': market_open_utc + timedelta(minutes=i),
             'symbol': symbol,
-            'open': round(open_price, 2),
-            'high': round(high_price, 2),
-            'low': round(low_price, 2),
-            'close': round(close_price, 2),
-            'volume': base_volume
+            'open': o,
+            'high': h,
+            'low': l,
+            'close': c,
+            'volume': v
         })
-        
-        current_price = close_price
     
     return candles
 
@@ -84,30 +107,42 @@ def insert_candles(conn, candles):
     if row:
         symbol_id = row[0]
     else:
+        # Committed together with the candles below
         cur.execute("INSERT INTO symbols (symbol) VALUES (%s) RETURNING id", (symbol,))
         symbol_id = cur.fetchone()[0]
-        conn.commit()
     
-    # Insert candles
-    inserted = 0
+    # Stream all candles through COPY into a temp staging table, then merge
+    # into candles in one statement so duplicates are still skipped
+    buf = io.StringIO()
+    writer = csv.writer(buf)
     for candle in candles:
-        try:
-            cur.execute("""
-                INSERT INTO candles (time, symbol_id, open, high, low, close, volume)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (time, symbol_id) DO NOTHING
-            """, (
-                candle['time'],
-                symbol_id,
-                candle['open'],
-                candle['high'],
-                candle['low'],
-                candle['close'],
-                candle['volume']
-            ))
-            inserted += 1
-        except Exception as e:
-            print(f"Error inserting candle at {candle['time']}: {e}")
+        writer.writerow((
+            candle['time'].isoformat(),
+            symbol_id,
+            candle['open'],
+            candle['high'],
+            candle['low'],
+            candle['close'],
+            candle['volume']
+        ))
+    buf.seek(0)
+    
+    cur.execute("""
+        CREATE TEMP TABLE candles_stage
+        (LIKE candles INCLUDING DEFAULTS)
+        ON COMMIT DROP
+    """)
+    cur.copy_expert("""
+        COPY candles_stage (time, symbol_id, open, high, low, close, volume)
+        FROM STDIN WITH (FORMAT csv)
+    """, buf)
+    cur.execute("""
+        INSERT INTO candles (time, symbol_id, open, high, low, close, volume)
+        SELECT time, symbol_id, open, high, low, close, volume
+        FROM candles_stage
+        ON CONFLICT (time, symbol_id) DO NOTHING
+    """)
+    inserted = cur.rowcount
     
     conn.commit()
     return inserted
@@ -118,6 +153,7 @@ def main():
     
     symbol = sys.argv[1] if len(sys.argv) > 1 else "AAPL"
     base_price = float(sys.argv[2]) if len(sys.argv) > 2 else 150.0
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else None
     
     print(f"Symbol: {symbol}")
     print(f"Base Price: ${base_price}")
@@ -125,7 +161,7 @@ def main():
     print("")
     
     # Generate candles
-    candles = generate_trading_day_candles(symbol, base_price)
+    candles = generate_trading_day_candles(symbol, base_price, np.random.default_rng(seed))
     
     # Connect to database
     conn = get_db_conn()
@@ -6,9 +6,12 @@ LVNs are key entry points in the Auction Market playbook.
 """
 
 from __future__ import annotations
+import numpy as np
 import psycopg2
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
+from ..db import get_symbols
 
 
 class LVNAlertSystem:
@@ -22,6 +25,10 @@ class LVNAlertSystem:
     def __init__(self, db_conn):
         self.conn = db_conn
         self.alert_threshold_pct = 0.5  # Alert when within 0.5% of LVN
+        
+        # (symbol_id, limit) -> (latest bucket, LVN prices); reused until a
+        # newer profile bucket is written
+        self._lvn_cache: Dict[Tuple[int, int], Tuple[datetime, np.ndarray]] = {}
     
     def check_lvn_proximity(self, symbol_id: int) -> Optional[Dict]:
         """
@@ -38,48 +45,55 @@ class LVNAlertSystem:
             
             # Get recent LVNs
             lvns = self._get_recent_lvns(symbol_id)
-            if not lvns:
-                return None
             
-            # Check proximity to each LVN
-            closest_lvn = None
-            min_distance = float('inf')
-            
-            for lvn in lvns:
-                distance_pct = abs(current_price - lvn) / lvn * 100
-                
-                if distance_pct < min_distance:
-                    min_distance = distance_pct
-                    closest_lvn = lvn
+            return self.evaluate_proximity(current_price, lvns)
             
-            # Generate alert if within threshold
-            if min_distance <= self.alert_threshold_pct:
-                direction = 'UP' if current_price < closest_lvn else 'DOWN'
-                
-                return {
-                    'alert': True,
-                    'lvn_price': closest_lvn,
-                    'current_price': current_price,
-                    'distance_pct': round(min_distance, 2),
-                    'distance_dollars': round(abs(current_price - closest_lvn), 2),
-                    'direction': direction,
-                    'message': f"Price approaching LVN at ${closest_lvn:.2f} ({min_distance:.2f}% away)"
-                }
+        except Exception as e:
+            logger.error(f"Error checking LVN proximity: {e}")
+            return None
+    
+    def evaluate_proximity(self, current_price: float, lvns: np.ndarray) -> Optional[Dict]:
+        """
+        Build the proximity result for a known price and LVN array.
+        
+        Returns:
+            Alert dict (alert=True when within threshold), None if no LVNs
+        """
+        if lvns.size == 0:
+            return None
+        
+        # Distance to every LVN at once, then pick the closest
+        diff = np.abs(current_price - lvns)
+        distances = diff / lvns * 100
+        i = int(distances.argmin())
+        closest_lvn = float(lvns[i])
+        min_distance = float(distances[i])
+        distance_dollars = round(float(diff[i]), 2)
+        
+        # Generate alert if within threshold
+        if min_distance <= self.alert_threshold_pct:
+            direction = 'UP' if current_price < closest_lvn else 'DOWN'
             
-            # Return closest LVN info even if not alerting
             return {
-                'alert': False,
+                'alert': True,
                 'lvn_price': closest_lvn,
                 'current_price': current_price,
                 'distance_pct': round(min_distance, 2),
-                'distance_dollars': round(abs(current_price - closest_lvn), 2),
-                'direction': 'UP' if current_price < closest_lvn else 'DOWN',
-                'message': f"Nearest LVN at ${closest_lvn:.2f} ({min_distance:.2f}% away)"
+                'distance_dollars': distance_dollars,
+                'direction': direction,
+                'message': f"Price approaching LVN at ${closest_lvn:.2f} ({min_distance:.2f}% away)"
             }
-            
-        except Exception as e:
-            logger.error(f"Error checking LVN proximity: {e}")
-            return None
+        
+        # Return closest LVN info even if not alerting
+        return {
+            'alert': False,
+            'lvn_price': closest_lvn,
+            'current_price': current_price,
+            'distance_pct': round(min_distance, 2),
+            'distance_dollars': distance_dollars,
+            'direction': 'UP' if current_price < closest_lvn else 'DOWN',
+            'message': f"Nearest LVN at ${closest_lvn:.2f} ({min_distance:.2f}% away)"
+        }
     
     def _get_latest_price(self, symbol_id: int) -> Optional[float]:
         """Get the most recent close price."""
@@ -93,9 +107,9 @@ class LVNAlertSystem:
         """, (symbol_id,))
         
         row = cur.fetchone()
-        return float(row[0]) if row else None
+        return row[0] if row else None
     
-    def _get_recent_lvns(self, symbol_id: int, limit: int = 10) -> List[float]:
+    def _get_recent_lvns(self, symbol_id: int, limit: int = 10) -> np.ndarray:
         """
         Get recent LVNs from profile metrics.
         
@@ -104,37 +118,120 @@ class LVNAlertSystem:
             limit: Number of recent buckets to check
             
         Returns:
-            List of LVN prices
+            Sorted array of unique LVN prices
         """
         cur = self.conn.cursor()
         
-        # Get recent profile metrics with LVNs
+        # Cheap freshness check: LVNs only change when a new bucket lands
         cur.execute("""
-            SELECT lvns
-            FROM profile_metrics 
-            WHERE symbol_id = %s 
-                AND lvns IS NOT NULL
-                AND lvns::text != '[]'
-            ORDER BY bucket DESC 
-            LIMIT %s
-        """, (symbol_id, limit))
+            SELECT MAX(bucket)
+            FROM profile_metrics
+            WHERE symbol_id = %s
+        """, (symbol_id,))
         
-        rows = cur.fetchall()
+        row = cur.fetchone()
+        latest_bucket = row[0] if row else None
+        if latest_bucket is None:
+            return np.empty(0)
         
-        # Collect all LVNs from recent buckets
-        all_lvns = []
-        for row in rows:
-            if row[0]:
-                import json
-                lvns = json.loads(row[0]) if isinstance(row[0], str) else row[0]
-                if isinstance(lvns, list):
-                    all_lvns.extend([float(lvn) for lvn in lvns if lvn])
+        cache_key = (symbol_id, limit)
+        cached = self._lvn_cache.get(cache_key)
+        if cached and cached[0] == latest_bucket:
+            return cached[1]
         
-        # Remove duplicates and sort
-        unique_lvns = sorted(list(set(all_lvns)))
+        # Union, de-duplicate and sort the recent LVN arrays server-side
+        cur.execute("""
+            SELECT DISTINCT e.value::float8 AS lvn
+            FROM (
+                SELECT lvns
+                FROM profile_metrics 
+                WHERE symbol_id = %s 
+                    AND lvns IS NOT NULL
+                    AND lvns::text != '[]'
+                ORDER BY bucket DESC 
+                LIMIT %s
+            ) recent
+            CROSS JOIN LATERAL jsonb_array_elements_text(recent.lvns::jsonb) AS e(value)
+            WHERE e.value::float8 <> 0
+            ORDER BY lvn
+        """, (symbol_id, limit))
         
+        unique_lvns = np.array([row[0] for row in cur.fetchall()], dtype=np.float64)
+        
+        self._lvn_cache[cache_key] = (latest_bucket, unique_lvns)
         return unique_lvns
     
+    def get_latest_prices(self) -> Dict[int, float]:
+        """Get the most recent close price for every symbol in one query."""
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT s.id, c.close
+            FROM symbols s
+            CROSS JOIN LATERAL (
+                SELECT close
+                FROM candles
+                WHERE symbol_id = s.id
+                ORDER BY time DESC
+                LIMIT 1
+            ) c
+        """)
+        
+        return {symbol_id: close for symbol_id, close in cur.fetchall() if close}
+    
+    def get_recent_lvns_by_symbol(self, limit: int = 10) -> Dict[int, np.ndarray]:
+        """
+        Get recent LVNs for every symbol with profile metrics.
+        
+        Only symbols whose latest bucket changed since the last call are
+        re-fetched, and those are loaded together in a single query.
+        
+        Returns:
+            symbol_id -> sorted array of unique LVN prices
+        """
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT s.id, pm.bucket
+            FROM symbols s
+            CROSS JOIN LATERAL (
+                SELECT bucket
+                FROM profile_metrics
+                WHERE symbol_id = s.id
+                ORDER BY bucket DESC
+                LIMIT 1
+            ) pm
+        """)
+        latest_buckets = dict(cur.fetchall())
+        
+        stale = [
+            symbol_id for symbol_id, bucket in latest_buckets.items()
+            if (cached := self._lvn_cache.get((symbol_id, limit))) is None or cached[0] != bucket
+        ]
+        
+        if stale:
+            cur.execute("""
+                SELECT s.id, array_agg(DISTINCT e.value::float8 ORDER BY e.value::float8)
+                FROM unnest(%s::int[]) AS s(id)
+                CROSS JOIN LATERAL (
+                    SELECT lvns
+                    FROM profile_metrics
+                    WHERE symbol_id = s.id
+                        AND lvns IS NOT NULL
+                        AND lvns::text != '[]'
+                    ORDER BY bucket DESC
+                    LIMIT %s
+                ) pm
+                CROSS JOIN LATERAL jsonb_array_elements_text(pm.lvns::jsonb) AS e(value)
+                WHERE e.value::float8 <> 0
+                GROUP BY s.id
+            """, (stale, limit))
+            lvns_by_symbol = dict(cur.fetchall())
+            
+            for symbol_id in stale:
+                lvns = np.array(lvns_by_symbol.get(symbol_id, []), dtype=np.float64)
+                self._lvn_cache[(symbol_id, limit)] = (latest_buckets[symbol_id], lvns)
+        
+        return {symbol_id: self._lvn_cache[(symbol_id, limit)][1] for symbol_id in latest_buckets}
+    
     def get_all_lvns_with_distances(self, symbol_id: int) -> List[Dict]:
         """
         Get all LVNs with their distances from current price.
@@ -149,48 +246,72 @@ class LVNAlertSystem:
                 return []
             
             lvns = self._get_recent_lvns(symbol_id)
-            if not lvns:
+            if lvns.size == 0:
                 return []
             
-            result = []
-            for lvn in lvns:
-                distance_pct = abs(current_price - lvn) / lvn * 100
-                direction = 'ABOVE' if current_price > lvn else 'BELOW'
-                
-                result.append({
-                    'lvn_price': round(lvn, 2),
-                    'distance_pct': round(distance_pct, 2),
-                    'distance_dollars': round(abs(current_price - lvn), 2),
-                    'direction': direction,
-                    'is_near': distance_pct <= self.alert_threshold_pct
-                })
+            diff = np.abs(current_price - lvns)
+            distance_pct = diff / lvns * 100
+            rounded_pct = np.round(distance_pct, 2)
             
             # Sort by distance (closest first)
-            result.sort(key=lambda x: x['distance_pct'])
+            order = np.argsort(rounded_pct, kind='stable')
             
-            return result
+            return [
+                {
+                    'lvn_price': round(lvn, 2),
+                    'distance_pct': pct,
+                    'distance_dollars': round(dollars, 2),
+                    'direction': 'ABOVE' if current_price > lvn else 'BELOW',
+                    'is_near': near
+                }
+                for lvn, pct, dollars, near in zip(
+                    lvns[order].tolist(),
+                    rounded_pct[order].tolist(),
+                    diff[order].tolist(),
+                    (distance_pct[order] <= self.alert_threshold_pct).tolist()
+                )
+            ]
             
         except Exception as e:
             logger.error(f"Error getting LVNs with distances: {e}")
             return []
 
 
-def run_lvn_alerts(db_conn):
+# Reused across engine loops so the LVN cache survives between runs
+_alert_system: Optional[LVNAlertSystem] = None
+
+
+def run_lvn_alerts(db_conn, symbols=None, latest_prices: Optional[Dict[int, float]] = None):
     """
     Main function to run LVN alert checks for all symbols.
     Called periodically by the engine service.
+    
+    symbols and latest_prices may be passed in when the caller has already
+    fetched them for another detector on the same tick.
     """
-    alert_system = LVNAlertSystem(db_conn)
+    global _alert_system
+    if _alert_system is None or _alert_system.conn is not db_conn:
+        _alert_system = LVNAlertSystem(db_conn)
+    alert_system = _alert_system
     
     # Get all active symbols
-    cur = db_conn.cursor()
-    cur.execute("SELECT id, symbol FROM symbols")
-    symbols = cur.fetchall()
+    if symbols is None:
+        symbols = get_symbols(db_conn.cursor())
+    
+    # Two set-based queries instead of two per symbol
+    if latest_prices is None:
+        latest_prices = alert_system.get_latest_prices()
+    recent_lvns = alert_system.get_recent_lvns_by_symbol()
     
     for symbol_id, symbol_name in symbols:
         try:
+            current_price = latest_prices.get(symbol_id)
+            lvns = recent_lvns.get(symbol_id)
+            if not current_price or lvns is None:
+                continue
+            
             # Check for LVN proximity
-            alert = alert_system.check_lvn_proximity(symbol_id)
+            alert = alert_system.evaluate_proximity(current_price, lvns)
             
             if alert and alert['alert']:
                 logger.info(
@@ -5,11 +5,23 @@ Handles results analysis, reporting, and constraint analysis.
 Provides insights into strategy performance and recommendations.
 """
 
+import orjson
 from typing import Dict, List
-from datetime import datetime
+from datetime import datetime, timezone
 from loguru import logger
+from psycopg2.extras import execute_values
+from .db import copy_rows
 from .versions import get_version_info
 
+# backtest_trades columns written by save_results, in row order
+TRADE_COLUMNS = (
+    'backtest_run_id', 'symbol_id', 'entry_time', 'entry_price', 'entry_reason',
+    'exit_time', 'exit_price', 'exit_reason', 'direction', 'quantity',
+    'pnl', 'pnl_pct', 'stop_loss', 'take_profit', 'atr_at_entry',
+    'market_state', 'aggressive_flow_score', 'volume_ratio', 'cvd_momentum',
+    'bars_in_trade', 'duration_minutes', 'mae', 'mfe'
+)
+
 
 class BacktestAnalyzer:
     """Analyzes backtest results and provides insights."""
@@ -20,6 +32,22 @@ class BacktestAnalyzer:
         self.portfolio = portfolio
         self.parameters = parameters
         self.version = get_version_info()
+        self._summary_stats = None
+        self._summary_stats_trades = -1
+
+    @property
+    def stats(self) -> Dict:
+        """
+        Portfolio summary stats, computed once per set of trades.
+
+        Trades are append-only, so the cached result stays valid until the
+        trade count changes.
+        """
+        trade_count = len(self.portfolio.trades)
+        if self._summary_stats is None or self._summary_stats_trades != trade_count:
+            self._summary_stats = self.portfolio.get_summary_stats()
+            self._summary_stats_trades = trade_count
+        return self._summary_stats
 
     def save_results(self, run_id: int):
         """Save backtest results to database."""
@@ -27,7 +55,7 @@ class BacktestAnalyzer:
 
         try:
             # Update run with summary stats
-            stats = self.portfolio.get_summary_stats()
+            stats = self.stats
             
             with self.conn.cursor() as cur:
                 cur.execute("""
@@ -66,10 +94,9 @@ class BacktestAnalyzer:
             # Save trades
             if self.portfolio.trades:
                 with self.conn.cursor() as cur:
-                    # Prepare trade data for batch insert
-                    trade_data = []
-                    for trade in self.portfolio.trades:
-                        trade_data.append((
+                    # All trades go to the server in one COPY stream
+                    trade_rows = (
+                        (
                             run_id,
                             trade['symbol_id'],
                             trade['entry_time'],
@@ -93,46 +120,41 @@ class BacktestAnalyzer:
                             trade['duration_minutes'],
                             trade['mae'],
                             trade['mfe']
-                        ))
-
-                    # Batch insert trades
-                    cur.executemany("""
-                        INSERT INTO backtest_trades (
-                            backtest_run_id, symbol_id, entry_time, entry_price, entry_reason,
-                            exit_time, exit_price, exit_reason, direction, quantity,
-                            pnl, pnl_pct, stop_loss, take_profit, atr_at_entry,
-                            market_state, aggressive_flow_score, volume_ratio, cvd_momentum,
-                            bars_in_trade, duration_minutes, mae, mfe
-                        ) VALUES (
-                            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                            %s, %s, %s
                         )
-                    """, trade_data)
+                        for trade in self.portfolio.trades
+                    )
+
+                    copy_rows(cur, 'backtest_trades', TRADE_COLUMNS, trade_rows)
 
-                    logger.info(f"Saved {len(trade_data)} trades")
+                    logger.info(f"Saved {len(self.portfolio.trades)} trades")
 
             # Save equity curve
-            if self.portfolio.equity_curve:
+            points = self.portfolio.equity_array
+            if len(points):
                 with self.conn.cursor() as cur:
-                    equity_data = []
-                    for point in self.portfolio.equity_curve:
-                        equity_data.append((
+                    equity_rows = (
+                        (
                             run_id,
-                            point['time'],
-                            point['equity'],
-                            point['cash'],
-                            point['positions_value'],
-                            point['open_positions']
-                        ))
-
-                    cur.executemany("""
+                            time.replace(tzinfo=timezone.utc),
+                            equity,
+                            cash,
+                            positions_value,
+                            open_positions
+                        )
+                        for time, equity, cash, positions_value, open_positions in zip(
+                            points['time'].tolist(), points['equity'].tolist(),
+                            points['cash'].tolist(), points['positions_value'].tolist(),
+                            points['open_positions'].tolist()
+                        )
+                    )
+
+                    execute_values(cur, """
                         INSERT INTO backtest_equity_curve (
                             backtest_run_id, time, equity, cash, positions_value, open_positions
-                        ) VALUES (%s, %s, %s, %s, %s, %s)
-                    """, equity_data)
+                        ) VALUES %s
+                    """, equity_rows, page_size=500)
 
-                    logger.info(f"Saved {len(equity_data)} equity points")
+                    logger.info(f"Saved {len(points)} equity points")
 
             # Commit transaction
             self.conn.commit()
@@ -174,9 +196,14 @@ class BacktestAnalyzer:
 
     def generate_report(self) -> Dict:
         """Generate comprehensive backtest report."""
-        stats = self.portfolio.get_summary_stats()
+        stats = self.stats
         version = self.version
 
+        total_signals = sum(self.portfolio.signals_generated.values())
+        total_blocked = sum(self.portfolio.signals_blocked.values())
+        total_attempts = total_signals + total_blocked
+        blocked_percentage = (total_blocked / total_attempts) * 100 if total_attempts > 0 else 0
+
         report = {
             'version_info': {
                 'engine_version': version.engine_version,
@@ -192,11 +219,7 @@ class BacktestAnalyzer:
             'constraint_analysis': {
                 'signals_generated': self.portfolio.signals_generated,
                 'signals_blocked': self.portfolio.signals_blocked,
-                'blocked_percentage': (sum(self.portfolio.signals_blocked.values()) /
-                                     (sum(self.portfolio.signals_generated.values()) +
-                                      sum(self.portfolio.signals_blocked.values()))) * 100
-                if (sum(self.portfolio.signals_generated.values()) +
-                    sum(self.portfolio.signals_blocked.values())) > 0 else 0
+                'blocked_percentage': blocked_percentage
             }
         }
 
@@ -204,7 +227,7 @@ class BacktestAnalyzer:
 
     def print_summary(self):
         """Print summary of backtest results."""
-        stats = self.portfolio.get_summary_stats()
+        stats = self.stats
 
         logger.info("")
         logger.info("📊 Backtest Summary:")
@@ -226,15 +249,20 @@ class BacktestAnalyzer:
         """Export detailed results to file."""
         report = self.generate_report()
 
-        import json
-        with open(filename, 'w') as f:
-            json.dump(report, f, indent=2, default=str)
+        # orjson serializes datetimes and numpy values natively, so only
+        # unusual types (e.g. Decimal) fall back to str()
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(
+                report,
+                default=str,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            ))
 
         logger.info(f"Results exported to {filename}")
 
     def compare_with_baseline(self, baseline_stats: Dict) -> Dict:
         """Compare results with baseline performance."""
-        current_stats = self.portfolio.get_summary_stats()
+        current_stats = self.stats
 
         comparison = {
             'win_rate_change': current_stats['win_rate'] - baseline_stats.get('win_rate', 0),
@@ -6,20 +6,48 @@ Separated from main engine for better organization.
 """
 
 import os
+import threading
 import psycopg2
+import psycopg2.pool
 from typing import Dict, Optional
 from loguru import logger
 
 # Import versioning
 from .versions import get_version_info
 
+# Shared across BacktestConfig instances so repeated backtests (sweeps,
+# parameter grids, worker threads) reuse connections instead of paying
+# the connect/auth handshake each time
+_POOL: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+_POOL_LOCK = threading.Lock()
+POOL_MAX_CONNECTIONS = 16
+
+
+def _get_pool(db_config: Dict) -> psycopg2.pool.ThreadedConnectionPool:
+    """Create the shared connection pool on first use."""
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = psycopg2.pool.ThreadedConnectionPool(1, POOL_MAX_CONNECTIONS, **db_config)
+    return _POOL
+
 
 class BacktestConfig:
     """Configuration and database management for backtest engine."""
 
-    def __init__(self, parameters: Optional[Dict] = None):
-        """Initialize configuration."""
+    def __init__(self, parameters: Optional[Dict] = None, bulk_mode: bool = False):
+        """
+        Initialize configuration.
+
+        Args:
+            parameters: Backtest parameters
+            bulk_mode: Turn off synchronous_commit for this session. Backtest
+                results can always be regenerated, so losing the last few
+                commits on a crash is acceptable in exchange for faster writes.
+        """
         self.params = parameters or {}
+        self.bulk_mode = bulk_mode
         self.db_config = self._get_db_config()
         self.conn = None
 
@@ -38,20 +66,31 @@ class BacktestConfig:
         }
 
     def connect_db(self):
-        """Establish database connection."""
+        """Check out a database connection from the shared pool."""
         try:
-            self.conn = psycopg2.connect(**self.db_config)
+            self.conn = _get_pool(self.db_config).getconn()
             self.conn.autocommit = False
+            if self.bulk_mode:
+                with self.conn.cursor() as cur:
+                    cur.execute("SET synchronous_commit = off")
+                self.conn.commit()
             logger.debug("Database connection established")
         except Exception as e:
             logger.error(f"Failed to connect to database: {e}")
             raise
 
     def disconnect_db(self):
-        """Close database connection."""
+        """Return the database connection to the shared pool."""
         if self.conn:
-            self.conn.close()
-            logger.debug("Database connection closed")
+            if self.bulk_mode and not self.conn.closed:
+                # Don't leak the session setting to the next borrower
+                self.conn.rollback()
+                with self.conn.cursor() as cur:
+                    cur.execute("RESET synchronous_commit")
+                self.conn.commit()
+            _get_pool(self.db_config).putconn(self.conn)
+            self.conn = None
+            logger.debug("Database connection returned to pool")
 
     def get_connection(self):
         """Get database connection."""
@@ -59,6 +98,10 @@ class BacktestConfig:
             self.connect_db()
         return self.conn
 
+    def get_connection_pool(self) -> psycopg2.pool.ThreadedConnectionPool:
+        """Get the shared pool, for callers that query from several threads."""
+        return _get_pool(self.db_config)
+
     def test_connection(self) -> bool:
         """Test database connection."""
         try:
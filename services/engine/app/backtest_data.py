@@ -5,21 +5,269 @@ Handles loading and merging of historical market data for backtesting.
 Optimized for performance and proper multi-stock handling.
 """
 
+import io
 import psycopg2
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 from loguru import logger
 
+# Storage dtypes for candle columns. Prices stay float64: the volume
+# profile buckets them by tick, and float32 rounding moves on-tick prices
+# (150.37 becomes 150.36999...) into the neighbouring bucket, besides
+# putting float32 error into saved fill prices. Volumes are exact in int32
+# and take half the space.
+PRICE_DTYPE = np.float64
+VOLUME_DTYPE = np.int32
+
+# Bounds for the loaded-candles cache (least recently used entries go first)
+CANDLE_CACHE_MAX_ENTRIES = 256
+CANDLE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Concurrent candle queries per batch load (each holds a pooled connection)
+MAX_LOAD_WORKERS = 8
+
+
+# Column types of the candle COPY query: epoch time, OHLC, volume, symbol_id
+CANDLE_COPY_FIELDS = ('>i8', '>f8', '>f8', '>f8', '>f8', '>i8', '>i8')
+
+# PostgreSQL binary COPY framing
+_COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+_COPY_HEADER_SIZE = len(_COPY_SIGNATURE) + 8  # + flags and extension length
+
+
+def decode_copy_binary(data: bytes, fields: Sequence[str]) -> np.ndarray:
+    """
+    Decode `COPY ... TO STDOUT WITH (FORMAT binary)` output into a record array.
+
+    Only handles non-NULL 8-byte columns, which makes every row the same
+    size so the whole body maps onto one structured dtype. Fields come
+    back as f0, f1, ... in native byte order.
+    """
+    if not data:
+        return np.zeros(0, dtype=[(f'f{i}', np.dtype(f).newbyteorder('=')) for i, f in enumerate(fields)])
+    if not data.startswith(_COPY_SIGNATURE):
+        raise ValueError("Not a binary COPY stream")
+
+    extension = int.from_bytes(data[_COPY_HEADER_SIZE - 4:_COPY_HEADER_SIZE], 'big')
+    body = data[_COPY_HEADER_SIZE + extension:-2]  # trailer is a -1 field count
+
+    row_dtype = np.dtype([('count', '>i2')] + [
+        item for i, f in enumerate(fields) for item in ((f'len{i}', '>i4'), (f'f{i}', f))
+    ])
+    rows = np.frombuffer(body, dtype=row_dtype)
+
+    # NULLs (length -1) or wider values would have broken the fixed layout
+    if len(rows) and ((rows['count'] != len(fields)).any() or
+                      any((rows[f'len{i}'] != 8).any() for i in range(len(fields)))):
+        raise ValueError("Binary COPY row is not fixed-width (NULL value?)")
+
+    return np.rec.fromarrays(
+        [rows[f'f{i}'].astype(np.dtype(f).newbyteorder('=')) for i, f in enumerate(fields)],
+        names=[f'f{i}' for i in range(len(fields))]
+    )
+
+
+@dataclass
+class SymbolCandles:
+    """
+    Columnar candle data for one symbol.
+
+    Each field is a NumPy array (one column per field) instead of one dict
+    per bar. Times are epoch seconds, prices PRICE_DTYPE and volumes
+    VOLUME_DTYPE. Slicing returns views, so lookback windows cost no copies.
+    """
+    symbol: Optional[str]
+    symbol_id: Optional[int]
+    time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence], symbol: Optional[str] = None,
+                  symbol_id: Optional[int] = None) -> 'SymbolCandles':
+        """
+        Build from (time, open, high, low, close, volume) rows.
+
+        Times may be datetimes or epoch seconds.
+        """
+        n = len(rows)
+        time = np.empty(n, dtype=np.int64)
+        ohlc = np.empty((4, n), dtype=np.float64)
+        volume = np.empty(n, dtype=np.int64)
+
+        for i, row in enumerate(rows):
+            t = row[0]
+            time[i] = t.timestamp() if isinstance(t, datetime) else t
+            ohlc[0, i] = row[1]
+            ohlc[1, i] = row[2]
+            ohlc[2, i] = row[3]
+            ohlc[3, i] = row[4]
+            volume[i] = row[5]
+
+        return cls.from_columns(time, ohlc[0], ohlc[1], ohlc[2], ohlc[3], volume,
+                                symbol=symbol, symbol_id=symbol_id)
+
+    @classmethod
+    def from_columns(cls, time: np.ndarray, open_: np.ndarray, high: np.ndarray,
+                     low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                     symbol: Optional[str] = None, symbol_id: Optional[int] = None) -> 'SymbolCandles':
+        """Build from column arrays, converting them to the storage dtypes."""
+        volume = np.asarray(volume, dtype=np.int64)
+
+        # Keep 64-bit volumes only if some bar doesn't fit the compact type
+        if not len(volume) or volume.max() <= np.iinfo(VOLUME_DTYPE).max:
+            volume = volume.astype(VOLUME_DTYPE)
+
+        return cls(
+            symbol, symbol_id,
+            np.asarray(time, dtype=np.int64),
+            np.asarray(open_, dtype=PRICE_DTYPE),
+            np.asarray(high, dtype=PRICE_DTYPE),
+            np.asarray(low, dtype=PRICE_DTYPE),
+            np.asarray(close, dtype=PRICE_DTYPE),
+            volume
+        )
+
+    @classmethod
+    def from_dicts(cls, candles: Iterable[Dict], symbol: Optional[str] = None,
+                   symbol_id: Optional[int] = None) -> 'SymbolCandles':
+        """Build from candle dicts with time, open, high, low, close, volume keys."""
+        return cls.from_rows(
+            [(c['time'], c['open'], c['high'], c['low'], c['close'], c['volume']) for c in candles],
+            symbol=symbol,
+            symbol_id=symbol_id
+        )
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the column arrays."""
+        return (self.time.nbytes + self.open.nbytes + self.high.nbytes +
+                self.low.nbytes + self.close.nbytes + self.volume.nbytes)
+
+    def __getitem__(self, key: slice) -> 'SymbolCandles':
+        """Slice all columns together (views, not copies)."""
+        return SymbolCandles(
+            self.symbol, self.symbol_id,
+            self.time[key], self.open[key], self.high[key],
+            self.low[key], self.close[key], self.volume[key]
+        )
+
+    def datetime_at(self, i: int) -> datetime:
+        """Bar time at index i as a UTC datetime."""
+        return datetime.fromtimestamp(int(self.time[i]), tz=timezone.utc)
+
+    def bar(self, i: int) -> Dict:
+        """Single bar as a dict, for code that still works bar-by-bar."""
+        return {
+            'time': self.datetime_at(i),
+            'open': float(self.open[i]),
+            'high': float(self.high[i]),
+            'low': float(self.low[i]),
+            'close': float(self.close[i]),
+            'volume': int(self.volume[i]),
+            'symbol_id': self.symbol_id,
+            'symbol': self.symbol
+        }
+
+    def window_starts(self, lookback_minutes: int) -> np.ndarray:
+        """
+        Index of the first bar inside each bar's lookback window.
+
+        The window for bar i covers (time[i] - lookback, time[i]], so
+        candles[window_starts[i]:i + 1] is the lookback slice for bar i.
+        """
+        return np.searchsorted(self.time, self.time - lookback_minutes * 60, side='right')
+
+    def index_of(self, timestamp: datetime) -> int:
+        """Index of the bar at exactly `timestamp`, or -1 if there is none."""
+        ts = int(timestamp.timestamp())
+        idx = int(np.searchsorted(self.time, ts))
+        if idx < len(self.time) and self.time[idx] == ts:
+            return idx
+        return -1
+
+
+@dataclass
+class CandlePanel:
+    """
+    Candles for several symbols aligned on one shared, sorted time index.
+
+    Arrays are time-major so each timestamp's row is contiguous:
+    rows[i, k] is the index of symbol k's bar at time[i] in candles[k]
+    (-1 if that symbol has no bar then), and close[i, k] is its close
+    (NaN if missing).
+    """
+    symbols: List[str]
+    candles: List[SymbolCandles]
+    time: np.ndarray
+    rows: np.ndarray
+    close: np.ndarray
+
+    @classmethod
+    def from_candles(cls, candles_by_symbol: Dict[str, SymbolCandles], start_ts: int = 0) -> 'CandlePanel':
+        """Align candles on the union of their timestamps at or after start_ts."""
+        symbols = [s for s, c in candles_by_symbol.items() if len(c)]
+        candles = [candles_by_symbol[s] for s in symbols]
+        firsts = [int(np.searchsorted(c.time, start_ts)) for c in candles]
+
+        if candles:
+            time = np.unique(np.concatenate([c.time[first:] for c, first in zip(candles, firsts)]))
+        else:
+            time = np.empty(0, dtype=np.int64)
+
+        rows = np.full((len(time), len(symbols)), -1, dtype=np.int64)
+        close = np.full((len(time), len(symbols)), np.nan, dtype=np.float64)
+
+        for k, (c, first) in enumerate(zip(candles, firsts)):
+            positions = np.searchsorted(time, c.time[first:])
+            rows[positions, k] = np.arange(first, len(c))
+            close[positions, k] = c.close[first:]
+
+        return cls(symbols, candles, time, rows, close)
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def datetime_at(self, i: int) -> datetime:
+        """Time at master index i as a UTC datetime."""
+        return datetime.fromtimestamp(int(self.time[i]), tz=timezone.utc)
+
 
 class BacktestDataLoader:
     """Handles loading and merging of historical market data."""
 
-    def __init__(self, db_connection):
-        """Initialize data loader."""
+    def __init__(self, db_connection, connection_pool=None):
+        """
+        Initialize data loader.
+
+        Args:
+            db_connection: Connection used for all single queries
+            connection_pool: Optional pool that load_candles_batch borrows
+                worker connections from
+        """
         self.conn = db_connection
-        self._cache = {}  # Simple cache for loaded data
+        self.pool = connection_pool
+        self._cache: OrderedDict = OrderedDict()  # LRU cache for loaded candles
+        self._cache_bytes = 0
+
+        # symbol -> symbols.id, filled by preload_symbol_data and load_candles
+        self.symbol_ids: Dict[str, int] = {}
 
-    def load_candles(self, symbol: str, start_date: datetime, end_date: datetime) -> List[Dict]:
+        # Preloaded market_state / order_flow per symbol_id, sorted by time
+        self._market_state: Dict[int, Tuple[np.ndarray, List[str], np.ndarray]] = {}
+        self._order_flow: Dict[int, Tuple[np.ndarray, List[datetime], np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def load_candles(self, symbol: str, start_date: datetime, end_date: datetime) -> SymbolCandles:
         """
         Load candle data for a symbol.
 
@@ -29,48 +277,131 @@ class BacktestDataLoader:
             end_date: End date
 
         Returns:
-            List of candle dictionaries
+            SymbolCandles with one array per column (empty if no data)
         """
         cache_key = f"{symbol}_{start_date}_{end_date}"
 
         if cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
             return self._cache[cache_key]
 
         try:
-            with self.conn.cursor() as cur:
-                cur.execute("""
-                    SELECT time, open, high, low, close, volume, symbol_id
-                    FROM candles c
-                    JOIN symbols s ON c.symbol_id = s.id
-                    WHERE s.symbol = %s AND time >= %s AND time <= %s
-                    ORDER BY time
-                """, (symbol, start_date, end_date))
+            candles = self._fetch_candles(self.conn, symbol, start_date, end_date)
+        except Exception as e:
+            logger.error(f"Error loading candles for {symbol}: {e}")
+            return SymbolCandles.from_rows([], symbol=symbol)
 
-                rows = cur.fetchall()
-                candles = []
+        self._store_candles(cache_key, candles)
+        return candles
 
-                for row in rows:
-                    candles.append({
-                        'time': row[0],
-                        'open': float(row[1]),
-                        'high': float(row[2]),
-                        'low': float(row[3]),
-                        'close': float(row[4]),
-                        'volume': int(row[5]),
-                        'symbol_id': row[6],
-                        'symbol': symbol
-                    })
+    def load_candles_batch(self, symbols: List[str], start_date: datetime,
+                           end_date: datetime) -> Dict[str, SymbolCandles]:
+        """
+        Load candles for several symbols, fetching cache misses concurrently.
+
+        Each worker borrows its own connection from the pool, since a psycopg2
+        connection can only run one query at a time. Without a pool (or with
+        a single miss) this is the same as calling load_candles per symbol.
 
-                self._cache[cache_key] = candles
-                logger.debug(f"Loaded {len(candles):,} candles for {symbol}")
-                return candles
+        Returns:
+            {symbol: SymbolCandles} in the order of `symbols`
+        """
+        missing = [
+            symbol for symbol in symbols
+            if f"{symbol}_{start_date}_{end_date}" not in self._cache
+        ]
+
+        if self.pool is not None and len(missing) > 1:
+            with ThreadPoolExecutor(max_workers=min(MAX_LOAD_WORKERS, len(missing))) as executor:
+                fetched = list(executor.map(
+                    lambda symbol: self._fetch_candles_pooled(symbol, start_date, end_date),
+                    missing
+                ))
+
+            # The cache and symbol_ids are only touched from this thread
+            for symbol, candles in zip(missing, fetched):
+                if candles is not None:
+                    self._store_candles(f"{symbol}_{start_date}_{end_date}", candles)
+
+        return {
+            symbol: self.load_candles(symbol, start_date, end_date)
+            for symbol in symbols
+        }
+
+    def _fetch_candles_pooled(self, symbol: str, start_date: datetime,
+                              end_date: datetime) -> Optional[SymbolCandles]:
+        """Fetch candles on a connection borrowed from the pool (None on error)."""
+        try:
+            conn = self.pool.getconn()
+        except Exception as e:
+            logger.error(f"Error getting pooled connection for {symbol}: {e}")
+            return None
 
+        try:
+            return self._fetch_candles(conn, symbol, start_date, end_date)
         except Exception as e:
             logger.error(f"Error loading candles for {symbol}: {e}")
-            return []
+            return None
+        finally:
+            conn.rollback()
+            self.pool.putconn(conn)
+
+    def _fetch_candles(self, conn, symbol: str, start_date: datetime, end_date: datetime) -> SymbolCandles:
+        """Query candles for a symbol on the given connection."""
+        with conn.cursor() as cur:
+            # Binary COPY of fixed-width columns decodes straight into NumPy,
+            # with no text parsing or per-row Python objects
+            query = cur.mogrify("""
+                SELECT EXTRACT(EPOCH FROM time)::bigint, open::float8, high::float8,
+                       low::float8, close::float8, volume::bigint, symbol_id::bigint
+                FROM candles c
+                JOIN symbols s ON c.symbol_id = s.id
+                WHERE s.symbol = %s AND time >= %s AND time <= %s
+                ORDER BY time
+            """, (symbol, start_date, end_date)).decode()
+
+            buf = io.BytesIO()
+            cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT binary)", buf)
+
+        rows = decode_copy_binary(buf.getvalue(), CANDLE_COPY_FIELDS)
+        if not len(rows):
+            return SymbolCandles.from_rows([], symbol=symbol)
+
+        return SymbolCandles.from_columns(
+            rows['f0'], rows['f1'], rows['f2'], rows['f3'], rows['f4'], rows['f5'],
+            symbol=symbol,
+            symbol_id=int(rows['f6'][0])
+        )
+
+    def _store_candles(self, cache_key: str, candles: SymbolCandles):
+        """Record a freshly loaded symbol in the cache and symbol_ids."""
+        if candles.symbol_id is not None:
+            self.symbol_ids[candles.symbol] = candles.symbol_id
+        self._cache_put(cache_key, candles)
+        logger.debug(f"Loaded {len(candles):,} candles for {candles.symbol}")
+
+    def _cache_put(self, key: str, candles: SymbolCandles):
+        """Add candles to the cache, evicting least recently used entries."""
+        self._cache[key] = candles
+        self._cache_bytes += candles.nbytes
+
+        while len(self._cache) > 1 and (len(self._cache) > CANDLE_CACHE_MAX_ENTRIES or
+                                        self._cache_bytes > CANDLE_CACHE_MAX_BYTES):
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted.nbytes
 
     def load_market_state(self, symbol_id: int, timestamp: datetime) -> Optional[Dict]:
         """Load market state data for a specific timestamp."""
+        preloaded = self._market_state.get(symbol_id)
+        if preloaded is not None:
+            times, states, confidences = preloaded
+            idx = int(np.searchsorted(times, timestamp.timestamp(), side='right')) - 1
+            if idx >= 0:
+                return {
+                    'state': states[idx],
+                    'confidence': int(confidences[idx])
+                }
+
         try:
             with self.conn.cursor() as cur:
                 cur.execute("""
@@ -94,6 +425,22 @@ class BacktestDataLoader:
 
     def load_order_flow(self, symbol_id: int, timestamp: datetime, lookback: int = 5) -> List[Dict]:
         """Load order flow data for a specific timestamp."""
+        preloaded = self._order_flow.get(symbol_id)
+        if preloaded is not None:
+            times, buckets, cumulative_delta, buy_pressure, sell_pressure = preloaded
+            end = int(np.searchsorted(times, timestamp.timestamp(), side='right'))
+            # Only answer from memory when the preloaded range covers the lookback
+            if end >= lookback:
+                return [
+                    {
+                        'bucket': buckets[i],
+                        'cumulative_delta': int(cumulative_delta[i]),
+                        'buy_pressure': float(buy_pressure[i]),
+                        'sell_pressure': float(sell_pressure[i])
+                    }
+                    for i in range(end - 1, end - lookback - 1, -1)
+                ]
+
         try:
             with self.conn.cursor() as cur:
                 cur.execute("""
@@ -121,38 +468,56 @@ class BacktestDataLoader:
             logger.error(f"Error loading order flow: {e}")
             return []
 
-    def load_and_merge_candles(self, symbols: List[str], start_date: datetime, end_date: datetime) -> Dict[datetime, Dict[str, Dict]]:
+    def load_and_merge_candles(self, symbols: List[str], start_date: datetime, end_date: datetime,
+                               warmup_minutes: int = 0) -> CandlePanel:
         """
-        Load candles for all symbols and merge by timestamp for simultaneous processing.
+        Load candles for all symbols and align them on a shared time index
+        for simultaneous processing.
+
+        Candles are loaded from `warmup_minutes` before start_date (so callers
+        can slice lookback windows out of them), but the panel's time index
+        only covers start_date onwards.
 
         Returns:
-            Dict[datetime, Dict[str, Dict]] - timestamp -> {symbol -> bar_data}
+            CandlePanel with one row per timestamp and one column per symbol
         """
-        all_bars_by_time = {}
+        load_start = start_date - timedelta(minutes=warmup_minutes)
+        candles_by_symbol = self.load_candles_batch(symbols, load_start, end_date)
 
-        for symbol in symbols:
-            candles = self.load_candles(symbol, start_date, end_date)
+        panel = CandlePanel.from_candles(candles_by_symbol, int(start_date.timestamp()))
 
-            for bar in candles:
-                timestamp = bar['time']
-                if timestamp not in all_bars_by_time:
-                    all_bars_by_time[timestamp] = {}
-                all_bars_by_time[timestamp][symbol] = bar
-
-        logger.info(f"Merged {len(all_bars_by_time):,} timestamps across {len(symbols)} symbols")
-        return all_bars_by_time
+        logger.info(f"Merged {len(panel):,} timestamps across {len(symbols)} symbols")
+        return panel
 
     def get_symbol_id(self, symbol: str) -> Optional[int]:
-        """Get symbol ID from database."""
+        """Get symbol ID, querying the database only for unknown symbols."""
+        if symbol in self.symbol_ids:
+            return self.symbol_ids[symbol]
+
         try:
             with self.conn.cursor() as cur:
                 cur.execute("SELECT id FROM symbols WHERE symbol = %s", (symbol,))
                 row = cur.fetchone()
+                if row:
+                    self.symbol_ids[symbol] = row[0]
                 return row[0] if row else None
         except Exception as e:
             logger.error(f"Error getting symbol ID for {symbol}: {e}")
             return None
 
+    def load_symbol_ids(self, symbols: List[str]) -> Dict[str, int]:
+        """Resolve symbol IDs for all symbols in one query."""
+        missing = [symbol for symbol in symbols if symbol not in self.symbol_ids]
+        if missing:
+            try:
+                with self.conn.cursor() as cur:
+                    cur.execute("SELECT symbol, id FROM symbols WHERE symbol = ANY(%s)", (missing,))
+                    self.symbol_ids.update(cur.fetchall())
+            except Exception as e:
+                logger.error(f"Error getting symbol IDs: {e}")
+
+        return {symbol: self.symbol_ids[symbol] for symbol in symbols if symbol in self.symbol_ids}
+
     def preload_symbol_data(self, symbols: List[str], start_date: datetime, end_date: datetime):
         """
         Preload all required data for better performance.
@@ -161,16 +526,90 @@ class BacktestDataLoader:
         logger.info("Preloading symbol data for performance...")
 
         # Preload all symbol IDs
-        self.symbol_ids = {}
-        for symbol in symbols:
-            symbol_id = self.get_symbol_id(symbol)
-            if symbol_id:
-                self.symbol_ids[symbol] = symbol_id
+        symbol_ids = list(self.load_symbol_ids(symbols).values())
+        self.preload_market_state(symbol_ids, start_date, end_date)
+        self.preload_order_flow(symbol_ids, start_date, end_date)
+
+        logger.info(f"Preloaded data for {len(symbol_ids)} symbols")
+
+    def preload_market_state(self, symbol_ids: List[int], start_date: datetime, end_date: datetime):
+        """
+        Load market_state rows for all symbols in one query.
+
+        load_market_state then answers "latest state at or before ts" with a
+        binary search instead of a query per call.
+        """
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute("""
+                    SELECT symbol_id, EXTRACT(EPOCH FROM time)::float8, state, confidence
+                    FROM market_state
+                    WHERE symbol_id = ANY(%s) AND time BETWEEN %s AND %s
+                    ORDER BY symbol_id, time
+                """, (symbol_ids, start_date, end_date))
 
-        # Could preload market state and order flow data here for even better performance
-        logger.info(f"Preloaded data for {len(self.symbol_ids)} symbols")
+                rows = cur.fetchall()
+        except Exception as e:
+            logger.error(f"Error preloading market state: {e}")
+            return
+
+        self._market_state = {}
+        for symbol_id, group in self._group_by_symbol(rows):
+            self._market_state[symbol_id] = (
+                np.array([r[1] for r in group], dtype=np.float64),
+                [r[2] for r in group],
+                np.array([r[3] for r in group], dtype=np.int64)
+            )
+
+        logger.debug(f"Preloaded {len(rows):,} market state rows")
+
+    def preload_order_flow(self, symbol_ids: List[int], start_date: datetime, end_date: datetime):
+        """
+        Load order_flow buckets for all symbols in one query.
+
+        load_order_flow then slices the last N buckets at or before ts from
+        memory instead of querying per call.
+        """
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute("""
+                    SELECT symbol_id, EXTRACT(EPOCH FROM bucket)::float8, bucket,
+                           cumulative_delta, buy_pressure, sell_pressure
+                    FROM order_flow
+                    WHERE symbol_id = ANY(%s) AND bucket BETWEEN %s AND %s
+                    ORDER BY symbol_id, bucket
+                """, (symbol_ids, start_date, end_date))
+
+                rows = cur.fetchall()
+        except Exception as e:
+            logger.error(f"Error preloading order flow: {e}")
+            return
+
+        self._order_flow = {}
+        for symbol_id, group in self._group_by_symbol(rows):
+            self._order_flow[symbol_id] = (
+                np.array([r[1] for r in group], dtype=np.float64),
+                [r[2] for r in group],
+                np.array([r[3] for r in group], dtype=np.int64),
+                np.array([r[4] for r in group], dtype=np.float64),
+                np.array([r[5] for r in group], dtype=np.float64)
+            )
+
+        logger.debug(f"Preloaded {len(rows):,} order flow rows")
+
+    @staticmethod
+    def _group_by_symbol(rows: List[tuple]):
+        """Yield (symbol_id, rows) runs from rows ordered by symbol_id."""
+        start = 0
+        for i in range(1, len(rows) + 1):
+            if i == len(rows) or rows[i][0] != rows[start][0]:
+                yield rows[start][0], rows[start:i]
+                start = i
 
     def clear_cache(self):
         """Clear internal cache."""
         self._cache.clear()
+        self._cache_bytes = 0
+        self._market_state.clear()
+        self._order_flow.clear()
         logger.debug("Cache cleared")
@@ -6,20 +6,82 @@ REFACTORED: Now calculates market state, volume profile, and order flow on-the-f
 instead of reading from database. This allows backtesting any historical period.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-import json
+import numpy as np
+import orjson
 from loguru import logger
 from .backtest_config import BacktestConfig
-from .backtest_data import BacktestDataLoader
+from .backtest_data import BacktestDataLoader, CandlePanel, SymbolCandles
 from .backtest_position import BacktestPortfolio, Position
 from .backtest_analysis import BacktestAnalyzer
-from .backtest_volume_profile import BacktestVolumeProfileCalculator
+from .backtest_volume_profile import BacktestVolumeProfileCalculator, CandleLevels
 from .backtest_market_state import BacktestMarketStateCalculator
 from .backtest_order_flow import BacktestOrderFlowCalculator
 from app.strategies.auction_market_strategy import AuctionMarketStrategy
 
 
+def compute_atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Rolling ATR for every bar in one vectorized pass.
+
+    Matches the per-bar calculation the engine used to do: a window of
+    `period` candles yields `period - 1` true ranges, which are averaged.
+    Bars without a full window fall back to their own high - low range.
+    """
+    hl = high - low
+    atr = hl.copy()
+    if len(close) < period:
+        return atr
+
+    # True range, fused in place into one buffer (no stacked 3 x N temporary)
+    prev_close = close[:-1]
+    tr = np.subtract(high[1:], prev_close)
+    np.abs(tr, out=tr)
+    low_gap = np.subtract(low[1:], prev_close)
+    np.abs(low_gap, out=low_gap)
+    np.maximum(tr, low_gap, out=tr)
+    np.maximum(tr, hl[1:], out=tr)
+
+    # Rolling mean of the last (period - 1) true ranges. A strided window sum
+    # keeps each bar's result independent of series length (no cumsum drift).
+    windows = np.lib.stride_tricks.sliding_window_view(tr, period - 1)
+    atr[period - 1:] = windows.sum(axis=1) / (period - 1)
+    return atr
+
+
+def find_exit_bar(closes: np.ndarray, direction: str, stop_loss: float, take_profit: float,
+                  start: int = 0, chunk: int = 64) -> Tuple[int, str]:
+    """
+    Find the first bar at or after `start` whose close hits the stop or target.
+
+    Same rules as Position.should_exit (the stop wins if both hit on one bar).
+    Scans in doubling chunks so short trades only touch a few bars.
+
+    Returns:
+        (index, reason), or (-1, '') if the position never exits
+    """
+    n = len(closes)
+    while start < n:
+        window = closes[start:start + chunk]
+        if direction == 'buy':
+            stop_hit = window <= stop_loss
+            target_hit = window >= take_profit
+        else:
+            stop_hit = window >= stop_loss
+            target_hit = window <= take_profit
+
+        hit = stop_hit | target_hit
+        if hit.any():
+            j = int(np.argmax(hit))
+            return start + j, 'Stop Loss' if stop_hit[j] else 'Take Profit'
+
+        start += chunk
+        chunk *= 2
+
+    return -1, ''
+
+
 class BacktestEngine:
     """
     Main backtest engine that coordinates all components.
@@ -35,14 +97,21 @@ class BacktestEngine:
 
     def __init__(self, parameters: Optional[Dict] = None):
         """Initialize backtest engine."""
-        self.config = BacktestConfig(parameters)
-        self.data_loader = BacktestDataLoader(self.config.get_connection())
+        # Run records, trades and equity points are all regenerable, so the
+        # session skips waiting on WAL flushes for its commits
+        self.config = BacktestConfig(parameters, bulk_mode=True)
+
+        # One connection and cursor for the engine's own statements
+        self._conn = self.config.get_connection()
+        self._cursor = self._conn.cursor()
+
+        self.data_loader = BacktestDataLoader(self._conn, self.config.get_connection_pool())
         self.portfolio = BacktestPortfolio(
             initial_capital=self.config.get_parameter('initial_capital', 100000),
             max_positions=self.config.get_parameter('max_positions', 3)
         )
         self.analyzer = BacktestAnalyzer(
-            self.config.get_connection(),
+            self._conn,
             self.portfolio,
             self.config.params
         )
@@ -55,8 +124,15 @@ class BacktestEngine:
         self.market_state_calc = BacktestMarketStateCalculator(parameters)
         self.order_flow_calc = BacktestOrderFlowCalculator()
         
-        # Cache for candle lookback (performance optimization)
-        self.candle_cache = {}
+        # Columnar candles per symbol_id (including one lookback period of
+        # warmup), plus each bar's lookback window start, ATR, momentum,
+        # estimated (buy, sell) volume and each candle's volume profile levels
+        self._candles: Dict[int, SymbolCandles] = {}
+        self._window_start: Dict[int, np.ndarray] = {}
+        self._atr: Dict[int, np.ndarray] = {}
+        self._momentum: Dict[int, np.ndarray] = {}
+        self._flow: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._levels: Dict[int, CandleLevels] = {}
 
         logger.info("Backtest engine initialized with on-the-fly calculators")
 
@@ -65,39 +141,57 @@ class BacktestEngine:
         params = symbol_parameters or self.config.get_strategy_parameters()
         self.strategy = AuctionMarketStrategy(params)
 
-    def check_entry_signal(self, symbol: str, symbol_id: int, current_time: datetime) -> Optional[Dict]:
+    def check_entry_signal(self, symbol: str, symbol_id: int, current_time: datetime,
+                           bar_index: Optional[int] = None,
+                           profile: Optional[Dict] = None) -> Optional[Dict]:
         """
         Check for entry signal using strategy logic.
         
         REFACTORED: Now calculates market state, volume profile, and order flow
         on-the-fly instead of reading from database.
+
+        bar_index is the bar's row in the preloaded candles when the caller
+        already knows it (the main loop does); otherwise it is looked up
+        from current_time. profile is the bar's volume profile when the
+        caller has already computed it (see calculate_profile_batch).
         """
         if not self.strategy:
             self.initialize_strategy()
 
         try:
-            # Get recent candles for calculations
+            # Slice the lookback window out of the preloaded candles
             lookback_minutes = self.config.get_parameter('lookback_period', 60)
-            recent_candles = self._get_recent_candles(symbol_id, current_time, lookback_minutes)
-            
-            if not recent_candles or len(recent_candles) < 10:
+            candles = self._candles.get(symbol_id)
+            if candles is None:
                 return None
-            
-            current_price = recent_candles[-1]['close']
-            
+
+            idx = bar_index if bar_index is not None else candles.index_of(current_time)
+            if idx < 0:
+                return None
+
+            recent_candles = candles[self._window_start[symbol_id][idx]:idx + 1]
+
+            if len(recent_candles) < 10:
+                return None
+
+            current_price = float(recent_candles.close[-1])
+
             # STEP 1: Calculate Volume Profile (POC, VAH, VAL)
-            profile = self.volume_profile_calc.calculate_profile(
-                recent_candles, 
-                lookback_minutes=lookback_minutes
-            )
+            if profile is None:
+                profile = self.volume_profile_calc.calculate_profile(
+                    recent_candles, 
+                    lookback_minutes=lookback_minutes
+                )
             
             if not profile:
                 return None
             
-            # STEP 2: Calculate Order Flow (buy/sell pressure, CVD)
-            flow_data = self.order_flow_calc.calculate_flow(
-                recent_candles,
-                lookback_buckets=5
+            # STEP 2: Summarize precomputed order flow over the last 5 candles
+            flow_start = max(idx - 4, int(self._window_start[symbol_id][idx]))
+            buy_volume, sell_volume = self._flow[symbol_id]
+            flow_data = self.order_flow_calc.calculate_flow_from_volumes(
+                buy_volume[flow_start:idx + 1],
+                sell_volume[flow_start:idx + 1]
             )
             
             # STEP 3: Calculate Market State (BALANCE/IMBALANCE)
@@ -105,14 +199,15 @@ class BacktestEngine:
                 current_price=current_price,
                 candles=recent_candles,
                 profile=profile,
-                flow_data=flow_data
+                flow_data=flow_data,
+                momentum=float(self._momentum[symbol_id][idx])
             )
             
             if state_data['state'] == 'UNKNOWN':
                 return None
             
-            # STEP 4: Calculate ATR
-            atr = self._calculate_atr_from_candles(recent_candles)
+            # STEP 4: Look up precomputed ATR
+            atr = float(self._atr[symbol_id][idx])
             if atr <= 0:
                 return None
             
@@ -134,85 +229,44 @@ class BacktestEngine:
             logger.error(f"Error checking entry signal for {symbol}: {e}")
             return None
     
-    def _get_recent_candles(self, symbol_id: int, current_time: datetime, lookback_minutes: int) -> List[Dict]:
-        """
-        Get recent candles for calculations.
-        
-        Uses caching to avoid repeated database queries for the same time period.
-        """
-        cache_key = f"{symbol_id}_{current_time.isoformat()}"
-        
-        if cache_key in self.candle_cache:
-            return self.candle_cache[cache_key]
-        
-        try:
-            with self.config.get_connection().cursor() as cur:
-                # Get candles from (current_time - lookback) to current_time
-                start_time = current_time - timedelta(minutes=lookback_minutes)
-                
-                cur.execute("""
-                    SELECT time, open, high, low, close, volume
-                    FROM candles
-                    WHERE symbol_id = %s 
-                      AND time > %s 
-                      AND time <= %s
-                    ORDER BY time ASC
-                """, (symbol_id, start_time, current_time))
-                
-                rows = cur.fetchall()
-                
-                candles = []
-                for row in rows:
-                    candles.append({
-                        'time': row[0],
-                        'open': float(row[1]),
-                        'high': float(row[2]),
-                        'low': float(row[3]),
-                        'close': float(row[4]),
-                        'volume': int(row[5])
-                    })
-                
-                # Cache the result
-                self.candle_cache[cache_key] = candles
-                
-                return candles
-                
-        except Exception as e:
-            logger.error(f"Error getting recent candles: {e}")
-            return []
-    
-    def _calculate_atr_from_candles(self, candles: List[Dict]) -> float:
+    def prepare_symbol_data(self, symbols: List[str], start_date: datetime, end_date: datetime):
         """
-        Calculate ATR from candle data.
-        
-        Uses last 14 candles for ATR calculation.
+        Load columnar candles for each symbol and precompute per-bar values.
+
+        Candles are loaded from one lookback period before the start date so
+        the first bars see a full window. Lookback window starts, ATR,
+        momentum, per-candle order flow and per-candle profile levels are
+        computed once per symbol here, so the main loop never queries the DB.
         """
-        if len(candles) < 14:
-            # Not enough data, use simple range
-            if candles:
-                last_candle = candles[-1]
-                return (last_candle['high'] - last_candle['low'])
-            return 0.0
-        
-        # Use last 14 candles
-        atr_candles = candles[-14:]
-        
-        tr_values = []
-        for i in range(1, len(atr_candles)):
-            high = atr_candles[i]['high']
-            low = atr_candles[i]['low']
-            prev_close = atr_candles[i-1]['close']
-            
-            # True Range = max of:
-            # 1. High - Low
-            # 2. |High - Previous Close|
-            # 3. |Low - Previous Close|
-            hl = high - low
-            hc = abs(high - prev_close)
-            lc = abs(low - prev_close)
-            tr_values.append(max(hl, hc, lc))
-        
-        return sum(tr_values) / len(tr_values) if tr_values else 0.0
+        lookback_minutes = self.config.get_parameter('lookback_period', 60)
+        warmup_start = start_date - timedelta(minutes=lookback_minutes)
+
+        candles_by_symbol = self.data_loader.load_candles_batch(symbols, warmup_start, end_date)
+
+        for symbol, candles in candles_by_symbol.items():
+            if not candles:
+                continue
+
+            symbol_id = candles.symbol_id
+            window_start = candles.window_starts(lookback_minutes)
+
+            high = candles.high
+            low = candles.low
+            close = candles.close
+
+            atr = compute_atr(high, low, close, period=14)
+
+            # Only bars with 14 candles inside their own lookback window get the
+            # rolling value; the rest use the bar's range
+            window_count = np.arange(len(candles)) - window_start + 1
+            atr = np.where(window_count >= 14, atr, high - low)
+
+            self._candles[symbol_id] = candles
+            self._window_start[symbol_id] = window_start
+            self._atr[symbol_id] = atr
+            self._momentum[symbol_id] = self.market_state_calc.rolling_momentum(close, window_start)
+            self._flow[symbol_id] = self.order_flow_calc.estimate_volumes(candles)
+            self._levels[symbol_id] = self.volume_profile_calc.candle_levels(candles)
 
     def run_backtest(self, symbols: List[str], start_date: datetime, end_date: datetime, run_id: Optional[int] = None):
         """Run backtest with proper multi-stock simulation."""
@@ -222,79 +276,128 @@ class BacktestEngine:
         if run_id:
             logger.info(f"Using existing run ID: {run_id}")
             # Update the dates in the existing run to match actual backtest dates
-            with self.config.get_connection().cursor() as cur:
-                cur.execute("""
-                    UPDATE backtest_runs 
-                    SET start_date = %s, end_date = %s, name = %s
-                    WHERE id = %s
-                """, (
-                    start_date,
-                    end_date,
-                    f"Backtest {start_date.date()} to {end_date.date()}",
-                    run_id
-                ))
-                self.config.get_connection().commit()
+            cur = self._cursor
+            cur.execute("""
+                UPDATE backtest_runs 
+                SET start_date = %s, end_date = %s, name = %s
+                WHERE id = %s
+            """, (
+                start_date,
+                end_date,
+                f"Backtest {start_date.date()} to {end_date.date()}",
+                run_id
+            ))
+            self._conn.commit()
         else:
             run_id = self._create_run(symbols, start_date, end_date)
 
-        # Load and merge candles
-        all_bars_by_time = self.data_loader.load_and_merge_candles(symbols, start_date, end_date)
+        # Preload columnar candles and per-bar ATR for the signal checks
+        self.prepare_symbol_data(symbols, start_date, end_date)
 
-        logger.info(f"📈 Processing {len(all_bars_by_time):,} timestamps...")
+        # Align all symbols on one shared time index
+        lookback_minutes = self.config.get_parameter('lookback_period', 60)
+        panel = self.data_loader.load_and_merge_candles(
+            symbols, start_date, end_date,
+            warmup_minutes=lookback_minutes
+        )
+        symbol_ids = [self.data_loader.symbol_ids.get(symbol) for symbol in panel.symbols]
+
+        logger.info(f"📈 Processing {len(panel):,} timestamps...")
+
+        # Exits are resolved with a vectorized scan when a position is opened,
+        # so the loop only visits bars to look for entries and record equity.
+        # pending_exits: master index -> [(symbol index, exit row, reason)]
+        pending_exits: Dict[int, List[Tuple[int, int, str]]] = {}
+        entry_rows: Dict[str, int] = {}
 
         # Process all symbols simultaneously
-        for timestamp, bars_at_time in all_bars_by_time.items():
-            # Update existing positions
-            self.portfolio.update_positions(bars_at_time)
+        for i in range(len(panel)):
+            # Only materialize the bar time when something happens on this bar
+            timestamp = None
 
-            # Check stops and targets
-            self.portfolio.check_stops_and_targets(bars_at_time)
+            # Exit positions whose stop or target is hit on this bar
+            exits = pending_exits.pop(i, None)
+            if exits:
+                timestamp = panel.datetime_at(i)
+                for k, exit_row, reason in sorted(exits):
+                    self._close_position(panel, k, entry_rows, exit_row, timestamp, reason)
 
             # Check for new entry signals
             available_slots = self.portfolio.get_available_position_slots()
             available_cash = self.portfolio.get_available_cash()
 
             if available_slots > 0 and available_cash > 0:
-                for symbol in list(bars_at_time.keys()):
-                    if symbol not in self.portfolio.positions:
-                        signal = self.check_entry_signal(symbol, bars_at_time[symbol]['symbol_id'], timestamp)
-                        if signal:
-                            # Calculate position cost
-                            position_cost = self._calculate_position_cost(signal, available_cash)
-                            if position_cost > 0:
-                                # Create position object
-                                position = Position(
-                                    symbol=symbol,
-                                    symbol_id=bars_at_time[symbol]['symbol_id'],
-                                    entry_time=timestamp,
-                                    entry_price=signal['entry_price'],
-                                    quantity=int(position_cost / signal['entry_price']),
-                                    stop_loss=signal['stop_loss'],
-                                    take_profit=signal['take_profit'],
-                                    direction=signal['side'],
-                                    entry_reason=signal['reason'],
-                                    market_state=signal.get('market_state', 'UNKNOWN'),
-                                    aggression_score=signal.get('aggression_score', 0)
-                                )
-
-                                # Enter position
-                                if self.portfolio.enter_position(position, position_cost):
-                                    available_slots -= 1
-                                    available_cash -= position_cost
-                                    if available_slots <= 0 or available_cash <= 0:
-                                        break
-
-            # Record equity periodically
-            if len(all_bars_by_time) > 100 and hash(str(timestamp)) % 100 == 0:
-                current_prices = {symbol: bar['close'] for symbol, bar in bars_at_time.items()}
+                if timestamp is None:
+                    timestamp = panel.datetime_at(i)
+                # Profile every symbol that could enter on this bar in one batch
+                candidates = [
+                    k for k in np.flatnonzero(panel.rows[i] >= 0).tolist()
+                    if panel.symbols[k] not in self.portfolio.positions
+                ]
+                windows = []
+                for k in candidates:
+                    symbol_id, row = symbol_ids[k], int(panel.rows[i, k])
+                    windows.append((self._levels[symbol_id], int(self._window_start[symbol_id][row]), row + 1))
+                profiles = self.volume_profile_calc.calculate_profile_batch(
+                    windows, lookback_minutes=lookback_minutes
+                )
+                for k, profile in zip(candidates, profiles):
+                    if profile is None:
+                        continue
+                    symbol = panel.symbols[k]
+                    signal = self.check_entry_signal(symbol, symbol_ids[k], timestamp,
+                                                     bar_index=int(panel.rows[i, k]),
+                                                     profile=profile)
+                    if signal:
+                        # Calculate position cost
+                        position_cost = self._calculate_position_cost(signal, available_cash)
+                        if position_cost > 0:
+                            # Create position object
+                            position = Position(
+                                symbol=symbol,
+                                symbol_id=symbol_ids[k],
+                                entry_time=timestamp,
+                                entry_price=signal['entry_price'],
+                                quantity=int(position_cost / signal['entry_price']),
+                                stop_loss=signal['stop_loss'],
+                                take_profit=signal['take_profit'],
+                                direction=signal['side'],
+                                entry_reason=signal['reason'],
+                                market_state=signal.get('market_state', 'UNKNOWN'),
+                                aggression_score=signal.get('aggression_score', 0)
+                            )
+
+                            # Enter position
+                            if self.portfolio.enter_position(position, position_cost):
+                                entry_row = int(panel.rows[i, k])
+                                entry_rows[symbol] = entry_row
+                                self._schedule_exit(panel, k, position, entry_row, pending_exits)
+
+                                available_slots -= 1
+                                available_cash -= position_cost
+                                if available_slots <= 0 or available_cash <= 0:
+                                    break
+
+            # Record equity every 100th bar
+            if len(panel) > 100 and i % 100 == 0:
+                if timestamp is None:
+                    timestamp = panel.datetime_at(i)
+                closes = panel.close[i]
+                current_prices = {
+                    panel.symbols[k]: float(closes[k])
+                    for k in np.flatnonzero(panel.rows[i] >= 0).tolist()
+                }
                 self.portfolio.record_equity_point(timestamp, current_prices)
 
-        # Close remaining positions
+        # Close remaining positions at each symbol's last bar, which is simply
+        # the last loaded candle (the panel covers every candle from start_date)
+        symbol_index = {symbol: k for k, symbol in enumerate(panel.symbols)}
         for symbol in list(self.portfolio.positions.keys()):
-            symbol_bars = [bars for bars in all_bars_by_time.values() if symbol in bars]
-            if symbol_bars:
-                last_bar = symbol_bars[-1][symbol]
-                self.portfolio.exit_position(symbol, last_bar['close'], last_bar['time'], 'End of Backtest')
+            k = symbol_index[symbol]
+            candles = panel.candles[k]
+            last_row = len(candles) - 1
+            self._close_position(panel, k, entry_rows, last_row,
+                                 candles.datetime_at(last_row), 'End of Backtest')
 
         # Save and analyze results
         self.analyzer.save_results(run_id)
@@ -305,29 +408,55 @@ class BacktestEngine:
 
         logger.success("✅ Backtest complete!")
 
+    def _schedule_exit(self, panel: CandlePanel, k: int, position: Position, entry_row: int,
+                       pending_exits: Dict[int, List[Tuple[int, int, str]]]):
+        """Find the bar where a new position exits and queue it on the master index."""
+        candles = panel.candles[k]
+        offset, reason = find_exit_bar(
+            candles.close[entry_row + 1:],
+            position.direction,
+            position.stop_loss,
+            position.take_profit
+        )
+        if offset < 0:
+            return
+
+        exit_row = entry_row + 1 + offset
+        exit_idx = int(np.searchsorted(panel.time, candles.time[exit_row]))
+        pending_exits.setdefault(exit_idx, []).append((k, exit_row, reason))
+
+    def _close_position(self, panel: CandlePanel, k: int, entry_rows: Dict[str, int],
+                        exit_row: int, exit_time: datetime, reason: str):
+        """Apply the bars held since entry to the position's metrics and exit it."""
+        symbol = panel.symbols[k]
+        closes = panel.candles[k].close
+
+        self.portfolio.positions[symbol].update_metrics_path(closes[entry_rows.pop(symbol) + 1:exit_row + 1])
+        self.portfolio.exit_position(symbol, float(closes[exit_row]), exit_time, reason)
+
     def _create_run(self, symbols: List[str], start_date: datetime, end_date: datetime) -> int:
         """Create backtest run record."""
-        with self.config.get_connection().cursor() as cur:
-            cur.execute("""
-                INSERT INTO backtest_runs (
-                    name, strategy_name, start_date, end_date, symbols, parameters, status, started_at
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """, (
-                f"Backtest {start_date.date()} to {end_date.date()}",
-                'auction_market',
-                start_date,
-                end_date,
-                symbols,
-                json.dumps(self.config.params),
-                'completed',
-                datetime.now()
-            ))
-
-            run_id = cur.fetchone()[0]
-            self.config.get_connection().commit()
-            return run_id
+        cur = self._cursor
+        cur.execute("""
+            INSERT INTO backtest_runs (
+                name, strategy_name, start_date, end_date, symbols, parameters, status, started_at
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
+        """, (
+            f"Backtest {start_date.date()} to {end_date.date()}",
+            'auction_market',
+            start_date,
+            end_date,
+            symbols,
+            orjson.dumps(self.config.params, option=orjson.OPT_SERIALIZE_NUMPY).decode(),
+            'completed',
+            datetime.now()
+        ))
+
+        run_id = cur.fetchone()[0]
+        self._conn.commit()
+        return run_id
 
     def _save_constraint_analysis(self, run_id: int):
         """Save constraint analysis data to database."""
@@ -364,25 +493,25 @@ class BacktestEngine:
             }
         }
 
-        with self.config.get_connection().cursor() as cur:
-            cur.execute("""
-                UPDATE backtest_runs SET
-                    signals_generated = %s,
-                    signals_blocked = %s,
-                    blocked_percentage = %s,
-                    constraint_analysis = %s,
-                    completed_at = %s
-                WHERE id = %s
-            """, (
-                total_signals,
-                total_blocked,
-                blocked_percentage,
-                json.dumps(constraint_data),
-                datetime.now(),
-                run_id
-            ))
-
-            self.config.get_connection().commit()
+        cur = self._cursor
+        cur.execute("""
+            UPDATE backtest_runs SET
+                signals_generated = %s,
+                signals_blocked = %s,
+                blocked_percentage = %s,
+                constraint_analysis = %s,
+                completed_at = %s
+            WHERE id = %s
+        """, (
+            total_signals,
+            total_blocked,
+            blocked_percentage,
+            orjson.dumps(constraint_data, option=orjson.OPT_SERIALIZE_NUMPY).decode(),
+            datetime.now(),
+            run_id
+        ))
+
+        self._conn.commit()
 
     def _calculate_position_cost(self, signal: Dict, available_cash: float) -> float:
         """
@@ -394,11 +523,8 @@ class BacktestEngine:
         entry_price = signal['entry_price']
         stop_loss = signal['stop_loss']
         
-        # Calculate current account value (cash + positions value)
-        # For simplicity, use cash as proxy since positions are marked-to-market
-        current_equity = self.portfolio.cash + sum(
-            pos.quantity * pos.entry_price for pos in self.portfolio.positions.values()
-        )
+        # Calculate current account value (cash + positions at cost)
+        current_equity = self.portfolio.cash + self.portfolio.positions_cost
         
         # Risk based on CURRENT equity (not initial capital)
         risk_amount = current_equity * (self.config.get_parameter('risk_per_trade_pct', 1.0) / 100)
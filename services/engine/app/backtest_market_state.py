@@ -8,9 +8,10 @@ This replicates the logic from detectors/market_state.py but works on-the-fly
 from candle data instead of requiring pre-calculated database records.
 """
 
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import Dict, Optional
+import numpy as np
 from loguru import logger
+from .backtest_data import SymbolCandles
 
 
 class BacktestMarketStateCalculator:
@@ -47,17 +48,20 @@ class BacktestMarketStateCalculator:
     
     def calculate_state(self,
                        current_price: float,
-                       candles: List[Dict],
+                       candles: SymbolCandles,
                        profile: Dict,
-                       flow_data: Dict) -> Dict:
+                       flow_data: Dict,
+                       momentum: Optional[float] = None) -> Dict:
         """
         Calculate market state from current data.
         
         Args:
             current_price: Current price
-            candles: Recent candles for momentum calculation
+            candles: Recent columnar candles for momentum calculation
             profile: Volume profile dict with poc, vah, val
             flow_data: Order flow dict with buy_pressure, sell_pressure, cvd_momentum
+            momentum: Precomputed momentum (see rolling_momentum); calculated
+                from candles when not given
             
         Returns:
             {
@@ -82,7 +86,8 @@ class BacktestMarketStateCalculator:
             in_value_area = val <= current_price <= vah
             
             # Calculate momentum
-            momentum = self._calculate_momentum(candles)
+            if momentum is None:
+                momentum = self._calculate_momentum(candles.close)
             
             # Get CVD pressure
             cvd_pressure = flow_data.get('buy_pressure', 50) - flow_data.get('sell_pressure', 50)
@@ -114,50 +119,78 @@ class BacktestMarketStateCalculator:
             logger.error(f"Error calculating market state: {e}")
             return self._default_state()
     
-    def _calculate_momentum(self, candles: List[Dict]) -> float:
+    def rolling_momentum(self, closes: np.ndarray, window_starts: np.ndarray) -> np.ndarray:
         """
-        Calculate directional momentum from candles.
+        Momentum for every bar at once.
+        
+        Bar i's momentum is what _calculate_momentum returns for
+        closes[window_starts[i]:i + 1]. Runs of 3 consecutive up/down moves
+        are counted with prefix sums, so each window is O(1).
+        """
+        n = len(closes)
+        idx = np.arange(n)
+        first = closes[window_starts]
+        
+        momentum = (closes - first) / first * 100 * 10
+        
+        if n >= 2:
+            diff = np.diff(closes)
+            up = diff > 0
+            down = diff < 0
+            
+            # runs[j] is set when moves j, j+1, j+2 all go the same way
+            up_runs = np.zeros(n, dtype=np.int64)
+            down_runs = np.zeros(n, dtype=np.int64)
+            if n > 3:
+                up_runs[:n - 3] = up[:-2] & up[1:-1] & up[2:]
+                down_runs[:n - 3] = down[:-2] & down[1:-1] & down[2:]
+            up_count = np.concatenate(([0], np.cumsum(up_runs)))
+            down_count = np.concatenate(([0], np.cumsum(down_runs)))
+            
+            # A run starting at move j fits in window [s, i] when s <= j <= i - 3
+            hi = np.maximum(idx - 2, window_starts)
+            momentum += 20 * (up_count[hi] > up_count[window_starts])
+            momentum -= 20 * (down_count[hi] > down_count[window_starts])
+        
+        momentum = np.clip(momentum, -100, 100)
+        
+        # Windows with a single candle have no momentum
+        momentum[idx - window_starts < 1] = 0.0
+        return momentum
+    
+    def _calculate_momentum(self, closes: np.ndarray) -> float:
+        """
+        Calculate directional momentum from close prices.
         
         Returns:
             Momentum score (positive = up, negative = down)
             Range: -100 to +100
         """
-        if len(candles) < 2:
+        if len(closes) < 2:
             return 0.0
         
         # Get price change over lookback period
-        first_price = candles[0]['close']
-        last_price = candles[-1]['close']
+        first_price = float(closes[0])
+        last_price = float(closes[-1])
         
         # Calculate percentage change
         price_change_pct = (last_price - first_price) / first_price * 100
         
-        # Count consecutive candles in same direction
-        consecutive_up = 0
-        consecutive_down = 0
-        max_consecutive_up = 0
-        max_consecutive_down = 0
-        
-        for i in range(1, len(candles)):
-            if candles[i]['close'] > candles[i-1]['close']:
-                consecutive_up += 1
-                consecutive_down = 0
-                max_consecutive_up = max(max_consecutive_up, consecutive_up)
-            elif candles[i]['close'] < candles[i-1]['close']:
-                consecutive_down += 1
-                consecutive_up = 0
-                max_consecutive_down = max(max_consecutive_down, consecutive_down)
-            else:
-                consecutive_up = 0
-                consecutive_down = 0
+        # Direction of each candle-to-candle move. Only runs of 3+ consecutive
+        # moves matter, so check every 3-long window of moves at once.
+        diff = np.diff(closes)
+        up = diff > 0
+        down = diff < 0
+        has_up_run = bool(np.any(up[:-2] & up[1:-1] & up[2:]))
+        has_down_run = bool(np.any(down[:-2] & down[1:-1] & down[2:]))
         
         # Calculate momentum score
         # Factors: price change %, consecutive candles
         momentum = price_change_pct * 10  # Scale price change
         
-        if max_consecutive_up >= 3:
+        if has_up_run:
             momentum += 20
-        if max_consecutive_down >= 3:
+        if has_down_run:
             momentum -= 20
         
         # Clamp to -100 to +100
@@ -180,60 +213,46 @@ class BacktestMarketStateCalculator:
         Returns:
             (state, confidence) tuple
         """
-        confidence = 0
-        state = 'BALANCE'  # Default
+        poc_threshold = self.poc_distance_threshold
+        abs_momentum = abs(momentum)
         
         # Rule 1: Distance from POC (adjusted for realistic price movement)
-        if distance_from_poc < self.poc_distance_threshold:
-            # Close to POC = likely balance
-            state = 'BALANCE'
-            confidence += 40
-        elif distance_from_poc < self.poc_distance_threshold * 1.67:  # 2.5% if threshold is 1.5%
-            # Moderate distance = transitioning
-            confidence += 20
-        else:
-            # Far from POC = likely imbalance
-            confidence += 30
-        
-        # Rule 2: Value Area position
-        if in_value_area:
-            # Inside value area = balance
-            if distance_from_poc < self.poc_distance_threshold * 1.33:  # 2.0% if threshold is 1.5%
-                state = 'BALANCE'
-                confidence += 30
-        else:
-            # Outside value area = imbalance
-            if current_price > vah:
-                state = 'IMBALANCE_UP'
-                confidence += 30
-            elif current_price < val:
-                state = 'IMBALANCE_DOWN'
-                confidence += 30
+        near_poc = distance_from_poc < poc_threshold
+        mid_poc = not near_poc and distance_from_poc < poc_threshold * 1.67  # 2.5% if threshold is 1.5%
+        far_poc = not near_poc and not mid_poc
+        
+        # Rule 2: Value Area position (inside and close to POC = balance)
+        inside_value = in_value_area and distance_from_poc < poc_threshold * 1.33  # 2.0% if threshold is 1.5%
+        above_vah = not in_value_area and current_price > vah
+        below_val = not in_value_area and not above_vah and current_price < val
         
         # Rule 3: Momentum (realistic thresholds for 60-min moves)
-        if abs(momentum) > self.momentum_threshold:
-            # Strong momentum (>1.5% move in 60 min) = imbalance
-            if momentum > 0:
-                state = 'IMBALANCE_UP'
-            else:
-                state = 'IMBALANCE_DOWN'
-            confidence += 20
-        elif abs(momentum) < self.momentum_threshold * 0.33:  # 0.5% if threshold is 1.5%
-            # Weak momentum (<0.5% move) = balance
-            state = 'BALANCE'
-            confidence += 10
+        strong_momentum = abs_momentum > self.momentum_threshold
+        weak_momentum = not strong_momentum and abs_momentum < self.momentum_threshold * 0.33  # 0.5% if threshold is 1.5%
         
         # Rule 4: CVD Pressure (adjusted for realistic order flow)
-        if abs(cvd_pressure) > self.cvd_pressure_threshold:
-            # Strong CVD (>15% imbalance) = directional bias
-            if cvd_pressure > 0:
-                state = 'IMBALANCE_UP'
-            else:
-                state = 'IMBALANCE_DOWN'
-            confidence += 10
-        
-        # Clamp confidence to 0-100
-        confidence = min(100, max(0, confidence))
+        strong_cvd = abs(cvd_pressure) > self.cvd_pressure_threshold
+        
+        # Each rule contributes a fixed weight; the maximum sum is exactly
+        # 100 and the minimum 0, so no clamping is needed
+        confidence = (40 * near_poc + 20 * mid_poc + 30 * far_poc
+                      + 30 * (inside_value or above_vah or below_val)
+                      + 20 * strong_momentum + 10 * weak_momentum
+                      + 10 * strong_cvd)
+        
+        # Later rules override earlier ones, so take the highest-priority match
+        if strong_cvd:
+            state = 'IMBALANCE_UP' if cvd_pressure > 0 else 'IMBALANCE_DOWN'
+        elif strong_momentum:
+            state = 'IMBALANCE_UP' if momentum > 0 else 'IMBALANCE_DOWN'
+        elif weak_momentum:
+            state = 'BALANCE'
+        elif above_vah:
+            state = 'IMBALANCE_UP'
+        elif below_val:
+            state = 'IMBALANCE_DOWN'
+        else:
+            state = 'BALANCE'
         
         return state, confidence
     
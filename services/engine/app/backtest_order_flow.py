@@ -8,8 +8,10 @@ This allows backtests to work on any historical period without requiring
 pre-calculated order_flow table data.
 """
 
-from typing import List, Dict
+from typing import Dict, Tuple
+import numpy as np
 from loguru import logger
+from .backtest_data import SymbolCandles
 
 
 class BacktestOrderFlowCalculator:
@@ -24,13 +26,13 @@ class BacktestOrderFlowCalculator:
     """
     
     def calculate_flow(self, 
-                      candles: List[Dict],
+                      candles: SymbolCandles,
                       lookback_buckets: int = 5) -> Dict:
         """
         Calculate order flow metrics from recent candles.
         
         Args:
-            candles: List of candle dicts with keys: open, high, low, close, volume
+            candles: Columnar candles (open, high, low, close, volume)
             lookback_buckets: Number of recent candles to analyze (default 5)
             
         Returns:
@@ -44,108 +46,128 @@ class BacktestOrderFlowCalculator:
         if not candles or len(candles) < 2:
             return self._default_flow()
         
+        # Use last N candles
+        recent_candles = candles[-lookback_buckets:] if len(candles) > lookback_buckets else candles
+        
+        return self.calculate_flow_arrays(
+            recent_candles.open, recent_candles.high, recent_candles.low,
+            recent_candles.close, recent_candles.volume
+        )
+    
+    def calculate_flow_arrays(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                              close: np.ndarray, volume: np.ndarray) -> Dict:
+        """
+        Calculate order flow metrics from parallel candle columns.
+        
+        Buy/sell volume is estimated per candle with a handful of array
+        operations. Callers pass the already-sliced lookback window.
+        
+        Returns:
+            Same dict as calculate_flow
+        """
         try:
-            # Use last N candles
-            recent_candles = candles[-lookback_buckets:] if len(candles) > lookback_buckets else candles
-            
-            # Calculate buy/sell volume for each candle
-            buy_volume = 0
-            sell_volume = 0
-            cvd_history = []
-            running_cvd = 0
-            
-            for candle in recent_candles:
-                candle_buy, candle_sell = self._estimate_candle_flow(candle)
-                buy_volume += candle_buy
-                sell_volume += candle_sell
-                
-                # Track CVD over time
-                running_cvd += (candle_buy - candle_sell)
-                cvd_history.append(running_cvd)
-            
-            # Calculate cumulative delta
-            cumulative_delta = buy_volume - sell_volume
-            
-            # Calculate buy/sell pressure percentages
-            total_volume = buy_volume + sell_volume
-            if total_volume > 0:
-                buy_pressure = (buy_volume / total_volume) * 100
-                sell_pressure = (sell_volume / total_volume) * 100
-            else:
-                buy_pressure = 50.0
-                sell_pressure = 50.0
-            
-            # Calculate CVD momentum (change from start to end)
-            cvd_momentum = 0
-            if len(cvd_history) >= 2:
-                cvd_momentum = cvd_history[-1] - cvd_history[0]
-            
-            return {
-                'cumulative_delta': int(cumulative_delta),
-                'buy_pressure': round(buy_pressure, 2),
-                'sell_pressure': round(sell_pressure, 2),
-                'cvd_momentum': int(cvd_momentum)
-            }
+            buy_volumes, sell_volumes = self._estimate_flow_arrays(open_, high, low, close, volume)
+            return self.calculate_flow_from_volumes(buy_volumes, sell_volumes)
             
         except Exception as e:
             logger.error(f"Error calculating order flow: {e}")
             return self._default_flow()
     
-    def _estimate_candle_flow(self, candle: Dict) -> tuple[int, int]:
+    def estimate_volumes(self, candles: SymbolCandles) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Estimate buy/sell volume for every candle of a series at once.
+        
+        Each candle's split only depends on that candle, so a backtest can
+        compute this once per symbol and summarize any window with
+        calculate_flow_from_volumes.
+        
+        Returns:
+            (buy_volume, sell_volume) int64 arrays aligned with candles
+        """
+        return self._estimate_flow_arrays(candles.open, candles.high, candles.low,
+                                          candles.close, candles.volume)
+    
+    def calculate_flow_from_volumes(self, buy_volumes: np.ndarray, sell_volumes: np.ndarray) -> Dict:
         """
-        Estimate buy and sell volume from a single candle.
+        Summarize per-candle buy/sell volumes of a lookback window.
+        
+        Returns:
+            Same dict as calculate_flow
+        """
+        buy_volume = int(buy_volumes.sum())
+        sell_volume = int(sell_volumes.sum())
+        
+        # Calculate cumulative delta
+        cumulative_delta = buy_volume - sell_volume
+        
+        # Calculate buy/sell pressure percentages
+        total_volume = buy_volume + sell_volume
+        if total_volume > 0:
+            buy_pressure = (buy_volume / total_volume) * 100
+            sell_pressure = (sell_volume / total_volume) * 100
+        else:
+            buy_pressure = 50.0
+            sell_pressure = 50.0
+        
+        # CVD momentum is the change in running CVD from the first candle
+        # to the last, i.e. the delta of every candle after the first
+        cvd_momentum = int(buy_volumes[1:].sum()) - int(sell_volumes[1:].sum())
+        
+        return {
+            'cumulative_delta': cumulative_delta,
+            'buy_pressure': round(buy_pressure, 2),
+            'sell_pressure': round(sell_pressure, 2),
+            'cvd_momentum': cvd_momentum
+        }
+    
+    def _estimate_flow_arrays(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                              close: np.ndarray, volume: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Estimate buy and sell volume for every candle in whole columns.
         
         Uses candle pattern analysis:
         - Close position in range indicates pressure
         - Green candles = more buying
         - Red candles = more selling
-        - Wick size indicates rejected prices
+        - Flat candles split volume 50/50
         
-        Args:
-            candle: Dict with open, high, low, close, volume
-            
         Returns:
-            (buy_volume, sell_volume) tuple
+            (buy_volume, sell_volume) int64 arrays, one entry per candle
         """
-        open_price = float(candle['open'])
-        high = float(candle['high'])
-        low = float(candle['low'])
-        close = float(candle['close'])
-        volume = int(candle['volume'])
-        
-        # Calculate candle metrics
-        body_size = abs(close - open_price)
-        total_range = high - low
+        open_ = np.asarray(open_, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        close = np.asarray(close, dtype=np.float64)
+        volume = np.asarray(volume, dtype=np.int64)
         
-        # Avoid division by zero
-        if total_range == 0:
-            # No range, split volume 50/50
-            return (volume // 2, volume // 2)
+        total_range = high - low
+        flat = total_range == 0
         
-        # Calculate where close is in the range (0 = low, 1 = high)
-        close_position = (close - low) / total_range
+        # Where close is in the range (0 = low, 1 = high); flat candles get
+        # a placeholder and are split 50/50 below
+        with np.errstate(divide='ignore', invalid='ignore'):
+            close_position = np.where(flat, 0.5, (close - low) / np.where(flat, 1.0, total_range))
         
-        # Calculate buy/sell ratio based on close position
-        # Close near high = more buying
-        # Close near low = more selling
         buy_ratio = close_position
         sell_ratio = 1.0 - close_position
         
-        # Adjust for candle color (green vs red)
-        if close > open_price:
-            # Green candle - increase buy ratio
-            buy_ratio = min(1.0, buy_ratio * 1.2)
-            sell_ratio = 1.0 - buy_ratio
-        elif close < open_price:
-            # Red candle - increase sell ratio
-            sell_ratio = min(1.0, sell_ratio * 1.2)
-            buy_ratio = 1.0 - sell_ratio
-        
-        # Distribute volume
-        buy_volume = int(volume * buy_ratio)
-        sell_volume = int(volume * sell_ratio)
-        
-        return (buy_volume, sell_volume)
+        # Green candles lean to buying, red candles to selling
+        green = close > open_
+        red = close < open_
+        green_buy = np.minimum(1.0, buy_ratio * 1.2)
+        red_sell = np.minimum(1.0, sell_ratio * 1.2)
+        buy_ratio = np.select([green, red], [green_buy, 1.0 - red_sell], buy_ratio)
+        sell_ratio = np.select([green, red], [1.0 - green_buy, red_sell], sell_ratio)
+        
+        # Distribute volume (truncating like int())
+        buy_volume = (volume * buy_ratio).astype(np.int64)
+        sell_volume = (volume * sell_ratio).astype(np.int64)
+        
+        half = volume // 2
+        buy_volume = np.where(flat, half, buy_volume)
+        sell_volume = np.where(flat, half, sell_volume)
+        
+        return buy_volume, sell_volume
     
     def _default_flow(self) -> Dict:
         """Return default flow when calculation fails."""
@@ -5,14 +5,39 @@ Handles position tracking, portfolio constraints, and risk management.
 Separated for better organization and reusability.
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, List, Optional
+import numpy as np
 from loguru import logger
 
+# Initial capacity of the per-trade P&L arrays (doubled as needed)
+TRADE_BUFFER_SIZE = 1024
+
+# One row per equity curve point; times are stored as naive UTC
+EQUITY_DTYPE = np.dtype([
+    ('time', 'datetime64[us]'),
+    ('equity', 'f8'),
+    ('cash', 'f8'),
+    ('positions_value', 'f8'),
+    ('open_positions', 'i4'),
+])
+EQUITY_BUFFER_SIZE = 1024
+
+# Per-trade Sharpe is annualized over 252 trading days
+SHARPE_ANNUALIZATION = 252 ** 0.5
+
 
 class Position:
     """Represents a single trading position."""
 
+    __slots__ = (
+        'symbol', 'symbol_id', 'entry_time', 'entry_price', 'quantity',
+        'stop_loss', 'take_profit', 'direction', 'entry_reason',
+        'market_state', 'aggression_score',
+        'dir_sign', '_sl_cmp', '_tp_cmp',
+        'bars_in_trade', 'mae', 'mfe'
+    )
+
     def __init__(self, symbol: str, symbol_id: int, entry_time: datetime,
                  entry_price: float, quantity: int, stop_loss: float,
                  take_profit: float, direction: str, entry_reason: str,
@@ -30,6 +55,12 @@ class Position:
         self.market_state = market_state
         self.aggression_score = aggression_score
 
+        # Signed copies of the levels so should_exit needs no direction branch:
+        # for shorts, negating prices flips the comparisons
+        self.dir_sign = 1 if direction == 'buy' else -1
+        self._sl_cmp = self.dir_sign * stop_loss
+        self._tp_cmp = self.dir_sign * take_profit
+
         # Tracking
         self.bars_in_trade = 0
         self.mae = 0  # Maximum Adverse Excursion
@@ -46,18 +77,29 @@ class Position:
         if unrealized_pnl > self.mfe:
             self.mfe = unrealized_pnl
 
+    def update_metrics_path(self, prices: np.ndarray):
+        """Update position metrics for a run of bars at once."""
+        if not len(prices):
+            return
+
+        self.bars_in_trade += len(prices)
+
+        unrealized_pnl = (prices - self.entry_price) * self.quantity
+        worst = float(unrealized_pnl.min())
+        best = float(unrealized_pnl.max())
+
+        if worst < self.mae:
+            self.mae = worst
+        if best > self.mfe:
+            self.mfe = best
+
     def should_exit(self, current_price: float) -> tuple[bool, str]:
         """Check if position should be exited."""
-        if self.direction == 'buy':
-            if current_price <= self.stop_loss:
-                return True, 'Stop Loss'
-            if current_price >= self.take_profit:
-                return True, 'Take Profit'
-        else:  # sell
-            if current_price >= self.stop_loss:
-                return True, 'Stop Loss'
-            if current_price <= self.take_profit:
-                return True, 'Take Profit'
+        price = self.dir_sign * current_price
+        if price <= self._sl_cmp:
+            return True, 'Stop Loss'
+        if price >= self._tp_cmp:
+            return True, 'Take Profit'
 
         return False, ''
 
@@ -99,7 +141,20 @@ class BacktestPortfolio:
         self.max_positions = max_positions
         self.positions: Dict[str, Position] = {}
         self.trades: List[Dict] = []
-        self.equity_curve: List[Dict] = []
+
+        # Sum of quantity * entry_price over open positions, kept current on
+        # entry/exit so sizing doesn't re-sum the positions for every signal
+        self.positions_cost = 0
+
+        # Equity curve points (EQUITY_DTYPE), doubled as needed
+        self._equity = np.empty(EQUITY_BUFFER_SIZE, dtype=EQUITY_DTYPE)
+        self._n_equity = 0
+
+        # P&L of each closed trade, mirrored into growable arrays so summary
+        # stats are NumPy reductions instead of passes over the trade dicts
+        self._pnl = np.empty(TRADE_BUFFER_SIZE)
+        self._pnl_pct = np.empty(TRADE_BUFFER_SIZE)
+        self._n_trades = 0
 
         # Tracking
         self.signals_generated: Dict[str, int] = {}
@@ -128,6 +183,7 @@ class BacktestPortfolio:
             return False
 
         self.positions[position.symbol] = position
+        self.positions_cost += position.quantity * position.entry_price
         self.cash -= cost
 
         # Track signal
@@ -173,63 +229,130 @@ class BacktestPortfolio:
         # Update cash
         self.cash += (exit_price * position.quantity)
 
-        # Remove position
+        # Remove position (re-summing the few left keeps the total exact)
         del self.positions[symbol]
+        self.positions_cost = sum(pos.quantity * pos.entry_price for pos in self.positions.values())
         self.trades.append(trade)
+        self._record_pnl(pnl, pnl_pct)
 
         logger.debug(f"Exited {symbol}: P&L ${pnl:+.2f} ({pnl_pct:+.2f}%) - {reason}")
         return trade
 
-    def update_positions(self, bars_at_time: Dict[str, Dict]):
-        """Update all positions with current prices."""
-        for symbol, bar in bars_at_time.items():
-            if symbol in self.positions:
-                self.positions[symbol].update_metrics(bar['close'])
-
-    def check_stops_and_targets(self, bars_at_time: Dict[str, Dict]) -> List[Dict]:
-        """Check stops and targets for all positions."""
+    def _record_pnl(self, pnl: float, pnl_pct: float):
+        """Append a closed trade's P&L to the stats buffers, doubling when full."""
+        if self._n_trades == len(self._pnl):
+            self._pnl = np.concatenate([self._pnl, np.empty_like(self._pnl)])
+            self._pnl_pct = np.concatenate([self._pnl_pct, np.empty_like(self._pnl_pct)])
+
+        self._pnl[self._n_trades] = pnl
+        self._pnl_pct[self._n_trades] = pnl_pct
+        self._n_trades += 1
+
+    def on_bar(self, current_prices: Dict[str, float], timestamp: Optional[datetime] = None,
+               update_metrics: bool = True, check_exits: bool = True) -> List[Dict]:
+        """
+        Update metrics and check stops/targets for open positions in one pass.
+
+        Walks the (few) open positions rather than every priced symbol, so a
+        bar with no open positions costs nothing.
+
+        Args:
+            current_prices: Symbol -> price at this bar
+            timestamp: Bar time, used as the exit time (needed if check_exits)
+            update_metrics: Update each position's MAE/MFE
+            check_exits: Exit positions whose stop or target is hit
+
+        Returns:
+            Trades exited on this bar
+        """
         exited_trades = []
 
-        for symbol, bar in bars_at_time.items():
-            if symbol in self.positions:
-                position = self.positions[symbol]
-                should_exit, reason = position.should_exit(bar['close'])
+        for symbol, position in list(self.positions.items()):
+            price = current_prices.get(symbol)
+            if price is None:
+                continue
+
+            if update_metrics:
+                position.update_metrics(price)
+
+            if check_exits:
+                should_exit, reason = position.should_exit(price)
 
                 if should_exit:
-                    trade = self.exit_position(symbol, bar['close'], bar['time'], reason)
+                    trade = self.exit_position(symbol, price, timestamp, reason)
                     if trade:
                         exited_trades.append(trade)
 
         return exited_trades
 
-    def get_portfolio_value(self, current_prices: Dict[str, float]) -> float:
-        """Get total portfolio value."""
-        positions_value = sum(
+    def update_positions(self, current_prices: Dict[str, float]):
+        """Update all positions with current prices."""
+        self.on_bar(current_prices, check_exits=False)
+
+    def check_stops_and_targets(self, current_prices: Dict[str, float], timestamp: datetime) -> List[Dict]:
+        """Check stops and targets for all positions at the given bar time."""
+        return self.on_bar(current_prices, timestamp, update_metrics=False)
+
+    def get_positions_value(self, current_prices: Dict[str, float]) -> float:
+        """Mark open positions to market (entry price where no price is given)."""
+        if not self.positions:
+            return 0
+        return sum(
             pos.quantity * current_prices.get(pos.symbol, pos.entry_price)
             for pos in self.positions.values()
         )
-        return self.cash + positions_value
+
+    def get_portfolio_value(self, current_prices: Dict[str, float]) -> float:
+        """Get total portfolio value."""
+        return self.cash + self.get_positions_value(current_prices)
 
     def record_equity_point(self, timestamp: datetime, current_prices: Dict[str, float]):
         """Record equity curve point."""
-        positions_value = sum(
-            pos.quantity * current_prices.get(pos.symbol, pos.entry_price)
-            for pos in self.positions.values()
-        )
+        positions_value = self.get_positions_value(current_prices)
 
         equity = self.cash + positions_value
 
-        self.equity_curve.append({
-            'time': timestamp,
-            'equity': equity,
-            'cash': self.cash,
-            'positions_value': positions_value,
-            'open_positions': len(self.positions)
-        })
+        if self._n_equity == len(self._equity):
+            self._equity = np.concatenate([self._equity, np.empty_like(self._equity)])
+
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+        self._equity[self._n_equity] = (
+            np.datetime64(timestamp, 'us'),
+            equity,
+            self.cash,
+            positions_value,
+            len(self.positions)
+        )
+        self._n_equity += 1
+
+    @property
+    def equity_array(self) -> np.ndarray:
+        """Recorded equity points as a structured array (EQUITY_DTYPE)."""
+        return self._equity[:self._n_equity]
+
+    @property
+    def equity_curve(self) -> List[Dict]:
+        """Recorded equity points as dicts with UTC times, built on demand."""
+        points = self.equity_array
+        return [
+            {
+                'time': time.replace(tzinfo=timezone.utc),
+                'equity': equity,
+                'cash': cash,
+                'positions_value': positions_value,
+                'open_positions': open_positions
+            }
+            for time, equity, cash, positions_value, open_positions in zip(
+                points['time'].tolist(), points['equity'].tolist(), points['cash'].tolist(),
+                points['positions_value'].tolist(), points['open_positions'].tolist()
+            )
+        ]
 
     def get_summary_stats(self) -> Dict:
         """Get portfolio summary statistics."""
-        if not self.trades:
+        if not self._n_trades:
             return {
                 'total_trades': 0,
                 'winning_trades': 0,
@@ -243,36 +366,37 @@ class BacktestPortfolio:
                 'largest_loss': 0
             }
 
-        winning_trades = [t for t in self.trades if t['pnl'] > 0]
-        losing_trades = [t for t in self.trades if t['pnl'] <= 0]
+        pnl = self._pnl[:self._n_trades]
+        winning = pnl[pnl > 0]
+        losing = pnl[pnl <= 0]
 
-        total_pnl = sum(t['pnl'] for t in self.trades)
+        total_pnl = float(pnl.sum())
         total_pnl_pct = (total_pnl / self.initial_capital) * 100
         
         # Calculate Sharpe Ratio
         sharpe_ratio = 0
-        if len(self.trades) > 1:
-            returns = [t['pnl_pct'] for t in self.trades]
-            avg_return = sum(returns) / len(returns)
-            
-            # Calculate standard deviation
-            variance = sum((r - avg_return) ** 2 for r in returns) / len(returns)
-            std_dev = variance ** 0.5
+        if self._n_trades > 1:
+            returns = self._pnl_pct[:self._n_trades]
+            avg_return = float(returns.mean())
+
+            # Population std from the mean above, so the mean is computed once
+            deviations = returns - avg_return
+            std_dev = float(np.sqrt(np.dot(deviations, deviations) / self._n_trades))
             
             # Sharpe Ratio (assuming 0% risk-free rate, annualized)
             if std_dev > 0:
-                sharpe_ratio = (avg_return / std_dev) * (252 ** 0.5)  # Annualized (252 trading days)
+                sharpe_ratio = (avg_return / std_dev) * SHARPE_ANNUALIZATION
 
         return {
-            'total_trades': len(self.trades),
-            'winning_trades': len(winning_trades),
-            'losing_trades': len(losing_trades),
-            'win_rate': len(winning_trades) / len(self.trades) * 100 if self.trades else 0,
+            'total_trades': self._n_trades,
+            'winning_trades': len(winning),
+            'losing_trades': len(losing),
+            'win_rate': len(winning) / self._n_trades * 100,
             'total_pnl': total_pnl,
             'total_pnl_pct': total_pnl_pct,
-            'avg_win': sum(t['pnl'] for t in winning_trades) / len(winning_trades) if winning_trades else 0,
-            'avg_loss': sum(t['pnl'] for t in losing_trades) / len(losing_trades) if losing_trades else 0,
-            'largest_win': max((t['pnl'] for t in winning_trades), default=0),
-            'largest_loss': min((t['pnl'] for t in losing_trades), default=0),
+            'avg_win': float(winning.mean()) if len(winning) else 0,
+            'avg_loss': float(losing.mean()) if len(losing) else 0,
+            'largest_win': float(winning.max()) if len(winning) else 0,
+            'largest_loss': float(losing.min()) if len(losing) else 0,
             'sharpe_ratio': sharpe_ratio
         }
@@ -10,9 +10,27 @@ Based on Auction Market Theory:
 - VAL (Value Area Low): Bottom of 70% volume area
 """
 
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
 from loguru import logger
+from .backtest_data import SymbolCandles
+
+# Candles per (candles x levels) grid when bucketing a whole symbol
+LEVEL_GRID_CHUNK = 512
+
+
+@dataclass
+class CandleLevels:
+    """
+    Price level visits of a run of candles, in touch order.
+    
+    Candle i visits ticks[offsets[i]:offsets[i + 1]] (tick numbers, i.e.
+    price / tick_size) and adds volumes[offsets[i]:offsets[i + 1]] to them.
+    """
+    offsets: np.ndarray
+    ticks: np.ndarray
+    volumes: np.ndarray
 
 
 class BacktestVolumeProfileCalculator:
@@ -31,17 +49,22 @@ class BacktestVolumeProfileCalculator:
         Args:
             tick_size: Price increment for bucketing (default 0.01 = 1 cent)
         """
-        self.tick_size = tick_size
+        self.tick_size = float(tick_size)
+        self._inv_tick = 1.0 / self.tick_size
     
     def calculate_profile(self, 
-                         candles: List[Dict],
-                         lookback_minutes: int = 60) -> Optional[Dict]:
+                         candles: SymbolCandles,
+                         lookback_minutes: int = 60,
+                         fast: bool = False) -> Optional[Dict]:
         """
         Calculate volume profile from recent candles.
         
         Args:
-            candles: List of candle dicts with keys: time, open, high, low, close, volume
+            candles: Columnar candles (time, open, high, low, close, volume)
             lookback_minutes: How many minutes of data to use (default 60)
+            fast: Approximate the value area with a fixed cumulative-volume
+                window around POC instead of the greedy expansion. VAH/VAL
+                can land a few ticks away from the exact result.
             
         Returns:
             {
@@ -61,161 +84,329 @@ class BacktestVolumeProfileCalculator:
                 candles = candles[-lookback_minutes:]
             
             # Create price levels (buckets)
-            price_levels = self._create_price_levels(candles)
+            ticks, volumes, touched = self._create_price_levels(candles)
             
-            if not price_levels:
-                return None
+            return self._summarize_levels(ticks, volumes, touched, fast)
             
-            # Find POC (highest volume level)
-            poc_level = max(price_levels.items(), key=lambda x: x[1])
-            poc = poc_level[0]
+        except Exception as e:
+            logger.error(f"Error calculating volume profile: {e}")
+            return None
+    
+    def candle_levels(self, candles: SymbolCandles) -> CandleLevels:
+        """
+        Bucket every candle's volume into price levels once.
+        
+        A candle's contribution to a profile doesn't depend on the window it
+        is in, so a backtest can do this once per symbol and build each
+        bar's profile from a slice of the result.
+        
+        Args:
+            candles: Columnar candles
             
-            # Calculate total volume
-            total_volume = sum(price_levels.values())
+        Returns:
+            CandleLevels holding each candle's level visits in touch order
+        """
+        n = len(candles)
+        if not n:
+            empty = np.zeros(0, dtype=np.int64)
+            return CandleLevels(np.zeros(1, dtype=np.int64), empty, empty)
+        
+        # A grid is as wide as its widest candle, so build the grids over
+        # candles sorted by width to keep each one tight
+        price_range = candles.high - candles.low
+        order = np.argsort(price_range, kind='stable')
+        
+        ticks, volumes, counts = [], [], []
+        for start in range(0, n, LEVEL_GRID_CHUNK):
+            rows = order[start:start + LEVEL_GRID_CHUNK]
+            levels, in_range, level_volume = self._level_grid(
+                candles.high[rows], candles.low[rows], candles.close[rows], candles.volume[rows]
+            )
+            ticks.append(levels[in_range].astype(np.int64))
+            volumes.append(level_volume[in_range])
+            counts.append(in_range.sum(axis=1))
+        
+        # Put each candle's run of visits back in candle order
+        sorted_counts = np.concatenate(counts)
+        sorted_offsets = np.concatenate(([0], np.cumsum(sorted_counts)))
+        candle_counts = np.empty(n, dtype=np.int64)
+        candle_counts[order] = sorted_counts
+        candle_starts = np.empty(n, dtype=np.int64)
+        candle_starts[order] = sorted_offsets[:-1]
+        offsets = np.concatenate(([0], np.cumsum(candle_counts)))
+        gather = np.arange(offsets[-1]) + np.repeat(candle_starts - offsets[:-1], candle_counts)
+        
+        return CandleLevels(offsets, np.concatenate(ticks)[gather], np.concatenate(volumes)[gather])
+    
+    def calculate_profile_batch(self,
+                                windows: Sequence[Tuple[CandleLevels, int, int]],
+                                lookback_minutes: int = 60,
+                                fast: bool = False) -> List[Optional[Dict]]:
+        """
+        Calculate volume profiles for several candle windows at once.
+        
+        Windows are given as candle rows [start, stop) of precomputed
+        CandleLevels, typically one per symbol. Their level visits are
+        bucketed into a (windows x levels) matrix by a single bincount.
+        Each result is identical to calculate_profile on the same candles.
+        
+        Args:
+            windows: (levels, start, stop) per window
+            lookback_minutes: How many minutes of data to use (default 60)
+            fast: Approximate the value area (see calculate_profile)
             
-            if total_volume == 0:
-                return None
+        Returns:
+            One profile dict (or None) per window, in order
+        """
+        profiles: List[Optional[Dict]] = [None] * len(windows)
+        
+        try:
+            batch, ticks, volumes = [], [], []
+            for w, (levels, start, stop) in enumerate(windows):
+                if stop - start < 10:
+                    continue
+                start = max(start, stop - lookback_minutes)
+                first, last = levels.offsets[start], levels.offsets[stop]
+                batch.append(w)
+                ticks.append(levels.ticks[first:last])
+                volumes.append(levels.volumes[first:last])
             
-            # Calculate value area (70% of volume around POC)
-            vah, val = self._calculate_value_area(price_levels, poc, total_volume)
+            if not batch:
+                return profiles
             
-            return {
-                'poc': float(poc),
-                'vah': float(vah),
-                'val': float(val),
-                'total_volume': int(total_volume)
-            }
+            # Visits stay grouped by window in touch order, so each window
+            # owns a contiguous run of the concatenated arrays
+            counts = [len(t) for t in ticks]
+            bounds = np.concatenate(([0], np.cumsum(counts)))
+            owner = np.repeat(np.arange(len(batch)), counts)
+            touched = np.concatenate(ticks)
+            
+            # One dense histogram row per window, offset from its lowest tick
+            min_tick = np.minimum.reduceat(touched, bounds[:-1])
+            offsets = touched - min_tick[owner]
+            span = int(offsets.max()) + 1
+            cells = owner * span + offsets
+            size = len(batch) * span
+            volume_rows = np.bincount(cells, weights=np.concatenate(volumes), minlength=size)
+            volume_rows = volume_rows.astype(np.int64).reshape(len(batch), span)
+            present_rows = (np.bincount(cells, minlength=size) > 0).reshape(len(batch), span)
             
+            for b, w in enumerate(batch):
+                present = present_rows[b]
+                profiles[w] = self._summarize_levels(
+                    np.flatnonzero(present) + min_tick[b],
+                    volume_rows[b][present],
+                    touched[bounds[b]:bounds[b + 1]],
+                    fast
+                )
+        
         except Exception as e:
-            logger.error(f"Error calculating volume profile: {e}")
+            logger.error(f"Error calculating volume profiles: {e}")
+        
+        return profiles
+    
+    def _summarize_levels(self,
+                          ticks: np.ndarray,
+                          volumes: np.ndarray,
+                          touched: np.ndarray,
+                          fast: bool = False) -> Optional[Dict]:
+        """
+        Find POC, VAH and VAL from bucketed price levels.
+        
+        Args:
+            ticks, volumes, touched: Output of _create_price_levels
+            fast: Use the approximate value area
+            
+        Returns:
+            Profile dict as returned by calculate_profile, or None if the
+            levels hold no volume
+        """
+        if not len(ticks):
+            return None
+        
+        # Find POC (highest volume level)
+        poc_idx = int(volumes.argmax())
+        candidates = np.flatnonzero(volumes == volumes[poc_idx])
+        if len(candidates) > 1:
+            # Ties go to the level that received volume first. ticks is
+            # sorted, so the first tied visit's level is found by bisection.
+            first = int(np.argmax(np.isin(touched, ticks[candidates])))
+            poc_idx = int(np.searchsorted(ticks, touched[first]))
+        poc = ticks[poc_idx] * self.tick_size
+        
+        # Calculate total volume
+        total_volume = int(volumes.sum())
+        
+        if total_volume == 0:
             return None
+        
+        # Calculate value area (70% of volume around POC)
+        if fast:
+            upper_idx, lower_idx = self._approximate_value_area(volumes, poc_idx, total_volume)
+        else:
+            upper_idx, lower_idx = self._calculate_value_area(volumes, poc_idx, total_volume)
+        vah = ticks[upper_idx] * self.tick_size
+        val = ticks[lower_idx] * self.tick_size
+        
+        return {
+            'poc': float(poc),
+            'vah': float(vah),
+            'val': float(val),
+            'total_volume': total_volume
+        }
     
-    def _create_price_levels(self, candles: List[Dict]) -> Dict[float, int]:
+    def _create_price_levels(self, candles: SymbolCandles) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
         Create price level buckets with volume distribution.
         
         For each candle, distribute volume across the price range (high to low)
-        using the tick size to create buckets.
+        using the tick size to create buckets. candle_levels lays the candles
+        out as rows of a (candles x levels) grid, so the whole window is
+        bucketed with a few array operations.
         
         Args:
-            candles: List of candle dicts
+            candles: Columnar candles
             
         Returns:
-            Dict mapping price level to volume at that level
+            (ticks, volumes, touched): sorted tick numbers (price / tick_size)
+            of every level touched, the volume at each, and the tick of every
+            level visit in the order the levels were touched
         """
-        price_levels = {}
+        levels = self.candle_levels(candles)
+        touched = levels.ticks
         
-        for candle in candles:
-            high = float(candle['high'])
-            low = float(candle['low'])
-            volume = int(candle['volume'])
-            close = float(candle['close'])
-            open_price = float(candle['open'])
-            
-            # Calculate price range
-            price_range = high - low
-            
-            if price_range == 0:
-                # No range, put all volume at close price
-                price_level = self._round_to_tick(close)
-                price_levels[price_level] = price_levels.get(price_level, 0) + volume
-                continue
-            
-            # Distribute volume across price levels
-            # Weight towards close price (where most trading happened)
-            current_price = low
-            levels_in_range = []
-            
-            while current_price <= high:
-                price_level = self._round_to_tick(current_price)
-                levels_in_range.append(price_level)
-                current_price += self.tick_size
-            
-            if not levels_in_range:
-                continue
+        if not len(touched):
+            return touched, touched, touched
+        
+        # Offsets from the lowest tick index a dense histogram that is sorted
+        # by construction.
+        min_tick = int(touched.min())
+        offsets = touched - min_tick
+        volumes = np.bincount(offsets, weights=levels.volumes).astype(np.int64)
+        present = np.bincount(offsets) > 0
+        
+        return np.flatnonzero(present) + min_tick, volumes[present], touched
+    
+    def _level_grid(self,
+                    high: np.ndarray,
+                    low: np.ndarray,
+                    close: np.ndarray,
+                    volume: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Lay candles out as rows of a (candles x levels) grid.
+        
+        Each row walks its candle from low to high one tick at a time, and
+        rows don't depend on each other.
+        
+        Args:
+            high, low, close, volume: Candle columns (at least one candle)
             
-            # Simple distribution: more volume near close
-            # Calculate distance from close for each level
-            for price_level in levels_in_range:
-                # Weight by inverse distance from close
-                distance = abs(price_level - close)
-                weight = 1.0 / (1.0 + distance)
-                
-                # Distribute volume proportionally
-                level_volume = int(volume * weight / len(levels_in_range))
-                price_levels[price_level] = price_levels.get(price_level, 0) + level_volume
-        
-        return price_levels
+        Returns:
+            (levels, in_range, level_volume): tick number of every cell,
+            whether the cell is one of the candle's levels, and the volume
+            it receives
+        """
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        close = np.asarray(close, dtype=np.float64)
+        volume = volume.astype(np.int64)
+        
+        price_range = high - low
+        flat = price_range == 0
+        
+        # cumsum adds the ticks in the same order as stepping a price upwards,
+        # so the level count and rounding match stepping candle by candle.
+        n_cols = int(price_range.max() * self._inv_tick) + 2
+        steps = np.full((len(high), n_cols), self.tick_size)
+        steps[:, 0] = low
+        prices = np.cumsum(steps, axis=1)
+        in_range = prices <= high[:, None]
+        
+        levels = np.rint(prices * self._inv_tick)
+        levels_in_range = in_range.sum(axis=1)
+        
+        # Weight by inverse distance from close (more volume near close)
+        distance = np.abs(levels * self.tick_size - close[:, None])
+        weight = 1.0 / (1.0 + distance)
+        level_volume = (volume[:, None] * weight / np.maximum(levels_in_range, 1)[:, None]).astype(np.int64)
+        
+        # No range: all volume goes to the close price
+        if flat.any():
+            in_range[flat] = False
+            in_range[flat, 0] = True
+            levels[flat, 0] = np.rint(close[flat] * self._inv_tick)
+            level_volume[flat, 0] = volume[flat]
+        
+        return levels, in_range, level_volume
     
     def _calculate_value_area(self, 
-                              price_levels: Dict[float, int],
-                              poc: float,
-                              total_volume: int) -> tuple[float, float]:
+                              volumes: np.ndarray,
+                              poc_idx: int,
+                              total_volume: int) -> Tuple[int, int]:
         """
         Calculate Value Area High (VAH) and Value Area Low (VAL).
         
         Value area contains 70% of the total volume, centered around POC.
+        Expansion takes the larger neighbouring level each step (up on
+        ties). A level is only taken once nothing before it on its own side
+        is still waiting, so the expansion order is the descending merge of
+        each side's running minimum volume. A stable argsort gives that
+        order exactly, and a searchsorted on its cumulative volume finds
+        where 70% is reached.
         
         Args:
-            price_levels: Dict of price -> volume
-            poc: Point of Control price
+            volumes: Volume per level, sorted by price
+            poc_idx: Index of the POC level
             total_volume: Total volume across all levels
             
         Returns:
-            (vah, val) tuple
+            (upper_idx, lower_idx) indices of VAH and VAL in volumes
         """
         target_volume = total_volume * 0.70
+        accumulated_volume = int(volumes[poc_idx])
+        
+        if accumulated_volume >= target_volume:
+            return poc_idx, poc_idx
         
-        # Sort price levels
-        sorted_levels = sorted(price_levels.keys())
+        # Levels in expansion order on each side of the POC
+        above = volumes[poc_idx + 1:]
+        below = volumes[poc_idx - 1::-1] if poc_idx > 0 else volumes[:0]
         
-        # Find POC index
-        poc_idx = sorted_levels.index(poc) if poc in sorted_levels else len(sorted_levels) // 2
+        # Up side comes first so the stable sort hands it the ties
+        keys = np.concatenate((np.minimum.accumulate(above), np.minimum.accumulate(below)))
+        order = np.argsort(-keys, kind='stable')
+        reached = accumulated_volume + np.cumsum(np.concatenate((above, below))[order])
         
         # Expand from POC until we have 70% of volume
-        accumulated_volume = price_levels[poc]
-        lower_idx = poc_idx
-        upper_idx = poc_idx
-        
-        while accumulated_volume < target_volume:
-            # Check if we can expand
-            can_expand_up = upper_idx < len(sorted_levels) - 1
-            can_expand_down = lower_idx > 0
-            
-            if not can_expand_up and not can_expand_down:
-                break
-            
-            # Decide which direction to expand (choose side with more volume)
-            expand_up = False
-            
-            if can_expand_up and can_expand_down:
-                vol_above = price_levels.get(sorted_levels[upper_idx + 1], 0)
-                vol_below = price_levels.get(sorted_levels[lower_idx - 1], 0)
-                expand_up = vol_above >= vol_below
-            elif can_expand_up:
-                expand_up = True
-            
-            # Expand
-            if expand_up:
-                upper_idx += 1
-                accumulated_volume += price_levels.get(sorted_levels[upper_idx], 0)
-            else:
-                lower_idx -= 1
-                accumulated_volume += price_levels.get(sorted_levels[lower_idx], 0)
-        
-        vah = sorted_levels[upper_idx]
-        val = sorted_levels[lower_idx]
-        
-        return vah, val
+        n_taken = min(len(order), int(np.searchsorted(reached, target_volume)) + 1)
+        n_up = int(np.count_nonzero(order[:n_taken] < len(above)))
+        n_down = n_taken - n_up
+        
+        return poc_idx + n_up, poc_idx - n_down
     
-    def _round_to_tick(self, price: float) -> float:
+    def _approximate_value_area(self,
+                                volumes: np.ndarray,
+                                poc_idx: int,
+                                total_volume: int) -> Tuple[int, int]:
         """
-        Round price to nearest tick size.
+        Approximate the value area with two binary searches.
+        
+        Takes the levels whose cumulative volume lies within 35% of total
+        volume either side of the POC's cumulative volume, clamped so the
+        POC stays inside the area.
         
         Args:
-            price: Raw price
+            volumes: Volume per level, sorted by price
+            poc_idx: Index of the POC level
+            total_volume: Total volume across all levels
             
         Returns:
-            Price rounded to tick size
+            (upper_idx, lower_idx) indices of VAH and VAL in volumes
         """
-        return round(price / self.tick_size) * self.tick_size
+        cumulative = np.cumsum(volumes)
+        half_area = total_volume * 0.35
+        
+        lower_idx = int(np.searchsorted(cumulative, cumulative[poc_idx] - half_area))
+        upper_idx = int(np.searchsorted(cumulative, cumulative[poc_idx] + half_area))
+        
+        return min(max(upper_idx, poc_idx), len(volumes) - 1), min(lower_idx, poc_idx)
@@ -1,19 +1,35 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from psycopg2.extensions import make_dsn
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Settings:
     postgres_host: str = os.getenv("POSTGRES_HOST", "db")
     postgres_port: int = int(os.getenv("POSTGRES_PORT", "5432"))
     postgres_user: str = os.getenv("POSTGRES_USER", "postgres")
     postgres_password: str = os.getenv("POSTGRES_PASSWORD", "postgres")
     postgres_db: str = os.getenv("POSTGRES_DB", "trading")
+    postgres_pool_max: int = int(os.getenv("POSTGRES_POOL_MAX", "8"))
+    # Seconds the engine reuses the symbols list before re-reading it
+    symbols_cache_ttl: float = float(os.getenv("SYMBOLS_CACHE_TTL", "60"))
 
     redis_host: str = os.getenv("REDIS_HOST", "redis")
     redis_port: int = int(os.getenv("REDIS_PORT", "6379"))
 
     timezone: str = os.getenv("TIMEZONE", "UTC")
 
+    # libpq connection string, built once from the fields above
+    dsn: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "dsn", make_dsn(
+            host=self.postgres_host,
+            port=self.postgres_port,
+            user=self.postgres_user,
+            password=self.postgres_password,
+            dbname=self.postgres_db,
+        ))
+
 
 settings = Settings()
@@ -1,27 +1,165 @@
 from __future__ import annotations
+import atexit
+import io
+import select
+import threading
+import time
 import psycopg2
+import psycopg2.pool
 from contextlib import contextmanager
-from typing import Iterator
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from .config import settings
 
 
-def _get_pg_conn():
-    return psycopg2.connect(
-        host=settings.postgres_host,
-        port=settings.postgres_port,
-        user=settings.postgres_user,
-        password=settings.postgres_password,
-        dbname=settings.postgres_db,
-    )
+# Created on first use so importing this module never touches the network
+_pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> psycopg2.pool.ThreadedConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = psycopg2.pool.ThreadedConnectionPool(
+                    minconn=1,
+                    maxconn=settings.postgres_pool_max,
+                    dsn=settings.dsn,
+                )
+                atexit.register(_pool.closeall)
+    return _pool
 
 
 @contextmanager
-def get_cursor() -> Iterator[psycopg2.extensions.cursor]:
-    conn = _get_pg_conn()
-    conn.autocommit = True
-    cur = conn.cursor()
+def get_cursor(cursor_factory=None) -> Iterator[psycopg2.extensions.cursor]:
+    """Lease a pooled autocommit connection for the duration of the block."""
+    pool = _get_pool()
+    conn = pool.getconn()
     try:
-        yield cur
+        conn.autocommit = True
+        cur = conn.cursor(cursor_factory=cursor_factory)
+        try:
+            yield cur
+        finally:
+            cur.close()
     finally:
-        cur.close()
-        conn.close()
+        # Drop connections that died mid-use instead of handing them out again
+        pool.putconn(conn, close=bool(conn.closed))
+
+
+# numeric -> float, for connections whose readers want plain floats (the live
+# engine's detectors). Not registered globally: money code such as the
+# arbitrage strategy relies on exact Decimals.
+DECIMAL_AS_FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values,
+    "DECIMAL_AS_FLOAT",
+    lambda value, cur: float(value) if value is not None else None,
+)
+
+
+# (expires_at, rows) for get_symbols; symbols change far less often than the 1s engine loop
+_symbols_cache: Optional[Tuple[float, List[Tuple[int, str]]]] = None
+
+
+def get_symbols(cur) -> List[Tuple[int, str]]:
+    """
+    Return (id, symbol) for every row in symbols, re-read at most once per
+    settings.symbols_cache_ttl seconds. Call clear_symbols_cache() after
+    adding or removing symbols to pick them up immediately.
+    """
+    global _symbols_cache
+    now = time.monotonic()
+    if _symbols_cache is None or now >= _symbols_cache[0]:
+        cur.execute("SELECT id, symbol FROM symbols")
+        _symbols_cache = (now + settings.symbols_cache_ttl, cur.fetchall())
+    return _symbols_cache[1]
+
+
+def clear_symbols_cache() -> None:
+    global _symbols_cache
+    _symbols_cache = None
+
+
+def get_latest_closes(cur, symbol_ids: Sequence[int]) -> Dict[int, Optional[float]]:
+    """Most recent candle close for each symbol that has candles, in one query."""
+    cur.execute("""
+        SELECT s.id, c.close
+        FROM unnest(%s::int[]) AS s(id)
+        CROSS JOIN LATERAL (
+            SELECT close
+            FROM candles
+            WHERE symbol_id = s.id
+            ORDER BY time DESC
+            LIMIT 1
+        ) c
+    """, (list(symbol_ids),))
+    return dict(cur.fetchall())
+
+
+# Characters that must be backslash-escaped in COPY text format
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def copy_rows(cur, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """
+    Insert rows with a single COPY ... FROM STDIN on the cursor's connection.
+
+    Values are written in COPY text format (None becomes NULL), so the server
+    parses them exactly as it would the same values in an INSERT. Returns the
+    number of rows written.
+    """
+    buf = io.StringIO()
+    count = 0
+    for row in rows:
+        buf.write("\t".join(map(_copy_value, row)))
+        buf.write("\n")
+        count += 1
+    buf.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+    return count
+
+
+def prepare_statements(cur, statements: Dict[str, str]) -> None:
+    """
+    PREPARE each named statement on the cursor's session unless it exists.
+
+    Prepared statements last as long as the connection (rollbacks don't
+    drop them), so queries run every loop are parsed and planned once.
+    Run them with cur.execute("EXECUTE name(%s, ...)", params).
+    """
+    cur.execute("SELECT name FROM pg_prepared_statements")
+    existing = {name for (name,) in cur.fetchall()}
+    for name, sql in statements.items():
+        if name not in existing:
+            cur.execute(f"PREPARE {name} AS {sql}")
+
+
+def listen(channel: str):
+    """Open an autocommit connection LISTENing on channel, for wait_for_notifies."""
+    conn = psycopg2.connect(settings.dsn)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"LISTEN {channel}")
+    return conn
+
+
+def wait_for_notifies(conn, timeout: float) -> List[str]:
+    """
+    Wait up to timeout seconds for NOTIFYs on a listen() connection and
+    return the payloads of everything that has arrived (empty on timeout).
+    """
+    if not conn.notifies and select.select([conn], [], [], timeout) == ([], [], []):
+        return []
+    conn.poll()
+    payloads = [notify.payload for notify in conn.notifies]
+    conn.notifies.clear()
+    return payloads
@@ -10,8 +10,108 @@ Based on Auction Market Theory:
 from __future__ import annotations
 import psycopg2
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 from loguru import logger
+from psycopg2.extras import execute_values
+from ..db import get_symbols, prepare_statements
+
+# Set-based queries run on every detection pass, prepared once per connection
+PREPARED_STATEMENTS = {
+    'ms_latest_prices': """
+        SELECT s.id, c.close
+        FROM unnest($1::int[]) AS s(id)
+        CROSS JOIN LATERAL (
+            SELECT close
+            FROM candles
+            WHERE symbol_id = s.id
+            ORDER BY time DESC
+            LIMIT 1
+        ) c
+    """,
+    'ms_latest_profiles': """
+        SELECT s.id, pm.poc, pm.vah, pm.val, pm.total_volume
+        FROM unnest($1::int[]) AS s(id)
+        CROSS JOIN LATERAL (
+            SELECT poc, vah, val, total_volume
+            FROM profile_metrics
+            WHERE symbol_id = s.id
+            ORDER BY bucket DESC
+            LIMIT 1
+        ) pm
+    """,
+    'ms_momentum': """
+        WITH recent AS (
+            SELECT
+                symbol_id,
+                time,
+                close - LAG(close) OVER w AS change,
+                FIRST_VALUE(close) OVER w AS first_close,
+                LAST_VALUE(close) OVER (w ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) AS last_close
+            FROM candles
+            WHERE symbol_id = ANY($1::int[])
+                AND time > NOW() - make_interval(mins => $2::int)
+            WINDOW w AS (PARTITION BY symbol_id ORDER BY time)
+        ),
+        moves AS (
+            -- Unchanged candles don't break a streak, so leave them out
+            SELECT
+                symbol_id,
+                sign(change) AS move,
+                LAG(sign(change), 1) OVER m AS move_1,
+                LAG(sign(change), 2) OVER m AS move_2
+            FROM recent
+            WHERE change <> 0
+            WINDOW m AS (PARTITION BY symbol_id ORDER BY time)
+        ),
+        streaks AS (
+            SELECT
+                symbol_id,
+                bool_or(move > 0 AND move_1 > 0 AND move_2 > 0) AS up_streak,
+                bool_or(move < 0 AND move_1 < 0 AND move_2 < 0) AS down_streak
+            FROM moves
+            GROUP BY symbol_id
+        )
+        SELECT
+            p.symbol_id,
+            p.candles,
+            p.first_close,
+            p.last_close,
+            COALESCE(s.up_streak, FALSE),
+            COALESCE(s.down_streak, FALSE)
+        FROM (
+            SELECT symbol_id, COUNT(*) AS candles, MIN(first_close) AS first_close, MIN(last_close) AS last_close
+            FROM recent
+            GROUP BY symbol_id
+        ) p
+        LEFT JOIN streaks s USING (symbol_id)
+    """,
+    'ms_latest_flow': """
+        SELECT s.id, f.cumulative_delta, f.buy_pressure, f.sell_pressure
+        FROM unnest($1::int[]) AS s(id)
+        CROSS JOIN LATERAL (
+            SELECT cumulative_delta, buy_pressure, sell_pressure
+            FROM order_flow
+            WHERE symbol_id = s.id
+            ORDER BY bucket DESC
+            LIMIT 1
+        ) f
+    """,
+}
+
+
+# Returned (as a copy) whenever there is no data or detection fails
+_DEFAULT_STATE = {
+    'state': 'UNKNOWN',
+    'confidence': 0,
+    'poc': None,
+    'vah': None,
+    'val': None,
+    'current_price': None,
+    'distance_from_poc_pct': 0,
+    'momentum_score': 0,
+    'in_value_area': False,
+    'cvd_pressure': 0
+}
 
 
 class MarketStateDetector:
@@ -26,6 +126,10 @@ class MarketStateDetector:
     def __init__(self, db_conn):
         self.conn = db_conn
         
+        # One long-lived cursor for every query this detector runs
+        self._cur = db_conn.cursor()
+        prepare_statements(self._cur, PREPARED_STATEMENTS)
+        
     def detect_state(self, symbol_id: int, lookback_minutes: int = 60) -> Dict:
         """
         Detect current market state for a symbol.
@@ -46,15 +150,43 @@ class MarketStateDetector:
             }
         """
         try:
-            # Get current price
+            # Get current price and volume profile metrics (POC, VAH, VAL)
             current_price = self._get_latest_price(symbol_id)
             if not current_price:
-                return self._default_state()
+                return _DEFAULT_STATE.copy()
             
-            # Get volume profile metrics (POC, VAH, VAL)
             profile = self._get_latest_profile_metrics(symbol_id)
             if not profile:
-                return self._default_state()
+                return _DEFAULT_STATE.copy()
+            
+            return self.evaluate_state(
+                current_price=current_price,
+                profile=profile,
+                momentum=self._calculate_momentum(symbol_id, lookback_minutes),
+                cvd_pressure=self._get_cvd_pressure(symbol_id)
+            )
+            
+        except Exception as e:
+            logger.error(f"Error detecting market state: {e}")
+            return _DEFAULT_STATE.copy()
+    
+    def evaluate_state(
+        self,
+        current_price: Optional[float],
+        profile: Optional[Dict],
+        momentum: float,
+        cvd_pressure: float
+    ) -> Dict:
+        """
+        Build the market state from already-fetched inputs.
+        
+        Returns:
+            State dict as returned by detect_state (default state when the
+            price or profile is missing)
+        """
+        try:
+            if not current_price or not profile:
+                return _DEFAULT_STATE.copy()
             
             poc = profile['poc']
             vah = profile['vah']
@@ -66,12 +198,6 @@ class MarketStateDetector:
             # Check if in value area
             in_value_area = val <= current_price <= vah
             
-            # Calculate momentum (directional strength)
-            momentum = self._calculate_momentum(symbol_id, lookback_minutes)
-            
-            # Get CVD pressure
-            cvd_pressure = self._get_cvd_pressure(symbol_id)
-            
             # Determine state based on rules
             state, confidence = self._determine_state(
                 distance_from_poc=distance_from_poc,
@@ -98,11 +224,11 @@ class MarketStateDetector:
             
         except Exception as e:
             logger.error(f"Error detecting market state: {e}")
-            return self._default_state()
+            return _DEFAULT_STATE.copy()
     
     def _get_latest_price(self, symbol_id: int) -> Optional[float]:
         """Get the most recent close price."""
-        cur = self.conn.cursor()
+        cur = self._cur
         cur.execute("""
             SELECT close 
             FROM candles 
@@ -112,11 +238,11 @@ class MarketStateDetector:
         """, (symbol_id,))
         
         row = cur.fetchone()
-        return float(row[0]) if row else None
+        return row[0] if row else None
     
     def _get_latest_profile_metrics(self, symbol_id: int) -> Optional[Dict]:
         """Get the most recent volume profile metrics."""
-        cur = self.conn.cursor()
+        cur = self._cur
         cur.execute("""
             SELECT poc, vah, val, total_volume
             FROM profile_metrics 
@@ -126,14 +252,16 @@ class MarketStateDetector:
         """, (symbol_id,))
         
         row = cur.fetchone()
-        if not row:
-            return None
-            
+        return self._profile_from_row(row) if row else None
+    
+    @staticmethod
+    def _profile_from_row(row) -> Dict:
+        """Convert a (poc, vah, val, total_volume) row to a profile dict."""
         return {
-            'poc': float(row[0]) if row[0] else None,
-            'vah': float(row[1]) if row[1] else None,
-            'val': float(row[2]) if row[2] else None,
-            'total_volume': int(row[3]) if row[3] else 0
+            'poc': row[0],
+            'vah': row[1],
+            'val': row[2],
+            'total_volume': row[3] if row[3] is not None else 0
         }
     
     def _calculate_momentum(self, symbol_id: int, lookback_minutes: int) -> float:
@@ -145,51 +273,25 @@ class MarketStateDetector:
             Negative = downward momentum
             Range: -100 to +100
         """
-        cur = self.conn.cursor()
-        
-        # Get recent candles
-        cur.execute("""
-            SELECT close, time
-            FROM candles 
-            WHERE symbol_id = %s 
-                AND time > NOW() - INTERVAL '%s minutes'
-            ORDER BY time ASC
-        """, (symbol_id, lookback_minutes))
-        
-        rows = cur.fetchall()
-        if len(rows) < 2:
-            return 0.0
-        
-        prices = [float(row[0]) for row in rows]
+        return self.get_momentum([symbol_id], lookback_minutes)[symbol_id]
+    
+    @staticmethod
+    def _score_momentum(first_price: float, last_price: float, up_streak: bool, down_streak: bool) -> float:
+        """
+        Momentum score from a window's first/last close and its streaks.
         
-        # Calculate momentum metrics
-        first_price = prices[0]
-        last_price = prices[-1]
+        Returns:
+            Momentum score, -100 to +100
+        """
         price_change_pct = (last_price - first_price) / first_price * 100
         
-        # Count consecutive candles in same direction
-        consecutive_up = 0
-        consecutive_down = 0
-        max_consecutive_up = 0
-        max_consecutive_down = 0
-        
-        for i in range(1, len(prices)):
-            if prices[i] > prices[i-1]:
-                consecutive_up += 1
-                consecutive_down = 0
-                max_consecutive_up = max(max_consecutive_up, consecutive_up)
-            elif prices[i] < prices[i-1]:
-                consecutive_down += 1
-                consecutive_up = 0
-                max_consecutive_down = max(max_consecutive_down, consecutive_down)
-        
         # Calculate momentum score
         # Factors: price change %, consecutive candles
         momentum = price_change_pct * 10  # Scale price change
         
-        if max_consecutive_up >= 3:
+        if up_streak:
             momentum += 20
-        if max_consecutive_down >= 3:
+        if down_streak:
             momentum -= 20
         
         # Clamp to -100 to +100
@@ -203,7 +305,7 @@ class MarketStateDetector:
             Positive = buying pressure
             Negative = selling pressure
         """
-        cur = self.conn.cursor()
+        cur = self._cur
         cur.execute("""
             SELECT cumulative_delta, buy_pressure, sell_pressure
             FROM order_flow 
@@ -213,12 +315,14 @@ class MarketStateDetector:
         """, (symbol_id,))
         
         row = cur.fetchone()
-        if not row:
-            return 0.0
-        
-        cvd = int(row[0]) if row[0] else 0
-        buy_pressure = float(row[1]) if row[1] else 50
-        sell_pressure = float(row[2]) if row[2] else 50
+        return self._pressure_from_row(row) if row else 0.0
+    
+    @staticmethod
+    def _pressure_from_row(row) -> float:
+        """Convert a (cumulative_delta, buy_pressure, sell_pressure) row to CVD pressure."""
+        cvd = row[0] if row[0] is not None else 0
+        buy_pressure = row[1] if row[1] is not None else 50
+        sell_pressure = row[2] if row[2] is not None else 50
         
         # Normalize CVD to -100 to +100 range
         # Positive CVD = buying pressure
@@ -226,6 +330,46 @@ class MarketStateDetector:
         
         return pressure
     
+    def get_latest_prices(self, symbol_ids: Sequence[int]) -> Dict[int, float]:
+        """Get the most recent close price for each symbol in one query."""
+        cur = self._cur
+        cur.execute("EXECUTE ms_latest_prices(%s)", (list(symbol_ids),))
+        
+        return dict(cur.fetchall())
+    
+    def get_latest_profile_metrics(self, symbol_ids: Sequence[int]) -> Dict[int, Dict]:
+        """Get the most recent volume profile metrics for each symbol in one query."""
+        cur = self._cur
+        cur.execute("EXECUTE ms_latest_profiles(%s)", (list(symbol_ids),))
+        
+        return {row[0]: self._profile_from_row(row[1:]) for row in cur.fetchall()}
+    
+    def get_momentum(self, symbol_ids: Sequence[int], lookback_minutes: int = 60) -> Dict[int, float]:
+        """
+        Calculate directional momentum for each symbol.
+        
+        One query returns each symbol's candle count, first and last close
+        and whether it had a 3+ candle up or down streak (unchanged candles
+        don't break a streak), so no candle rows cross the wire. Symbols
+        with fewer than 2 candles get 0.
+        """
+        cur = self._cur
+        cur.execute("EXECUTE ms_momentum(%s, %s)", (list(symbol_ids), lookback_minutes))
+        
+        momentum = dict.fromkeys(symbol_ids, 0.0)
+        for symbol_id, candles, first_price, last_price, up_streak, down_streak in cur.fetchall():
+            if candles >= 2:
+                momentum[symbol_id] = self._score_momentum(first_price, last_price, up_streak, down_streak)
+        return momentum
+    
+    def get_cvd_pressures(self, symbol_ids: Sequence[int]) -> Dict[int, float]:
+        """Get the latest CVD pressure for each symbol in one query (0 without order flow)."""
+        cur = self._cur
+        cur.execute("EXECUTE ms_latest_flow(%s)", (list(symbol_ids),))
+        
+        pressures = {row[0]: self._pressure_from_row(row[1:]) for row in cur.fetchall()}
+        return {symbol_id: pressures.get(symbol_id, 0.0) for symbol_id in symbol_ids}
+    
     def _determine_state(
         self, 
         distance_from_poc: float,
@@ -242,59 +386,42 @@ class MarketStateDetector:
         Returns:
             (state, confidence)
         """
-        confidence = 0
-        
-        # Rule 1: Distance from POC (adjusted for realistic price movement)
-        if distance_from_poc < 1.5:
-            # Close to POC = likely balance
-            state = 'BALANCE'
-            confidence += 40
-        elif distance_from_poc < 2.5:
-            # Moderate distance = transitioning
-            confidence += 20
-        else:
-            # Far from POC = likely imbalance
-            confidence += 30
-        
-        # Rule 2: Value Area position
-        if in_value_area:
-            # Inside value area = balance
-            if distance_from_poc < 2.0:
-                state = 'BALANCE'
-                confidence += 30
-        else:
-            # Outside value area = imbalance
-            if current_price > vah:
-                state = 'IMBALANCE_UP'
-                confidence += 30
-            elif current_price < val:
-                state = 'IMBALANCE_DOWN'
-                confidence += 30
-        
-        # Rule 3: Momentum (realistic thresholds for 60-min moves)
-        if abs(momentum) > 1.5:
-            # Strong momentum (>1.5% move in 60 min) = imbalance
-            if momentum > 0:
-                state = 'IMBALANCE_UP'
-            else:
-                state = 'IMBALANCE_DOWN'
-            confidence += 20
-        elif abs(momentum) < 0.5:
-            # Weak momentum (<0.5% move) = balance
-            state = 'BALANCE'
-            confidence += 10
+        up_or_down = ('IMBALANCE_UP', 'IMBALANCE_DOWN')
+        outside_up = not in_value_area and current_price > vah
+        outside_down = not in_value_area and not outside_up and current_price < val
         
-        # Rule 4: CVD Pressure (adjusted for realistic order flow)
-        if abs(cvd_pressure) > 15:
+        # Each rule: (matched, state it votes for, confidence it adds).
+        # Later rules take precedence: the state comes from the last
+        # matching rule that votes for one.
+        rules = (
+            # Rule 1: Distance from POC (adjusted for realistic price movement)
+            # Close to POC = likely balance, far from POC = likely imbalance
+            (distance_from_poc < 1.5, 'BALANCE', 40),
+            (1.5 <= distance_from_poc < 2.5, None, 20),
+            (distance_from_poc >= 2.5, None, 30),
+            # Rule 2: Value Area position
+            # Inside value area = balance, outside value area = imbalance
+            (in_value_area and distance_from_poc < 2.0, 'BALANCE', 30),
+            (outside_up, 'IMBALANCE_UP', 30),
+            (outside_down, 'IMBALANCE_DOWN', 30),
+            # Rule 3: Momentum (realistic thresholds for 60-min moves)
+            # Strong momentum (>1.5% move in 60 min) = imbalance, weak (<0.5% move) = balance
+            (abs(momentum) > 1.5, up_or_down[momentum <= 0], 20),
+            (abs(momentum) < 0.5, 'BALANCE', 10),
+            # Rule 4: CVD Pressure (adjusted for realistic order flow)
             # Strong CVD (>15% imbalance) = directional bias
-            if cvd_pressure > 0:
-                state = 'IMBALANCE_UP'
-            else:
-                state = 'IMBALANCE_DOWN'
-            confidence += 10
+            (abs(cvd_pressure) > 15, up_or_down[cvd_pressure <= 0], 10),
+        )
+        
+        state = None
+        confidence = 0
+        for matched, rule_state, points in rules:
+            if matched:
+                state = rule_state or state
+                confidence += points
         
         # Default to BALANCE if no clear signal
-        if 'state' not in locals():
+        if state is None:
             state = 'BALANCE'
             confidence = 50
         
@@ -303,71 +430,96 @@ class MarketStateDetector:
         
         return state, confidence
     
-    def _default_state(self) -> Dict:
-        """Return default state when data is unavailable."""
-        return {
-            'state': 'UNKNOWN',
-            'confidence': 0,
-            'poc': None,
-            'vah': None,
-            'val': None,
-            'current_price': None,
-            'distance_from_poc_pct': 0,
-            'momentum_score': 0,
-            'in_value_area': False,
-            'cvd_pressure': 0
-        }
-    
     def save_state(self, symbol_id: int, state_data: Dict) -> None:
         """Save market state to database."""
+        self.save_states([(symbol_id, state_data)])
+    
+    def save_states(self, states: Sequence[Tuple[int, Dict]]) -> None:
+        """
+        Save (symbol_id, state_data) pairs in one INSERT and one commit.
+        """
+        if not states:
+            return
+        
         try:
-            cur = self.conn.cursor()
+            # Recomputed every pass, so skip the WAL flush wait for this
+            # transaction only; auto trading shares the connection and stays durable
+            self._cur.execute("SET LOCAL synchronous_commit = off")
             
             # Insert into market_state table
-            cur.execute("""
+            execute_values(self._cur, """
                 INSERT INTO market_state (
                     time, symbol_id, state, 
                     balance_high, balance_low, poc, confidence
                 )
-                VALUES (NOW(), %s, %s, %s, %s, %s, %s)
-            """, (
-                symbol_id,
-                state_data['state'],
-                state_data.get('vah'),
-                state_data.get('val'),
-                state_data.get('poc'),
-                state_data['confidence']
-            ))
+                VALUES %s
+            """, [
+                (
+                    symbol_id,
+                    state_data['state'],
+                    state_data.get('vah'),
+                    state_data.get('val'),
+                    state_data.get('poc'),
+                    state_data['confidence']
+                )
+                for symbol_id, state_data in states
+            ], template="(NOW(), %s, %s, %s, %s, %s, %s)")
             
             self.conn.commit()
-            logger.info(f"Saved market state: {state_data['state']} (confidence: {state_data['confidence']}%)")
+            if len(states) == 1:
+                state_data = states[0][1]
+                logger.info(f"Saved market state: {state_data['state']} (confidence: {state_data['confidence']}%)")
+            else:
+                logger.info(f"Saved {len(states)} market states")
             
         except Exception as e:
             logger.error(f"Error saving market state: {e}")
             self.conn.rollback()
 
 
-def run_market_state_detection(db_conn):
+# Reused across engine loops so its cursor and prepared statements are too
+_detector: Optional[MarketStateDetector] = None
+
+
+def run_market_state_detection(db_conn, symbols=None, latest_prices: Optional[Dict[int, float]] = None):
     """
     Main function to run market state detection for all symbols.
     Called periodically by the engine service.
+    
+    symbols and latest_prices may be passed in when the caller has already
+    fetched them for another detector on the same tick.
     """
-    detector = MarketStateDetector(db_conn)
+    global _detector
+    if _detector is None or _detector.conn is not db_conn:
+        _detector = MarketStateDetector(db_conn)
+    detector = _detector
     
     # Get all active symbols
-    cur = db_conn.cursor()
-    cur.execute("SELECT id, symbol FROM symbols")
-    symbols = cur.fetchall()
+    if symbols is None:
+        symbols = get_symbols(db_conn.cursor())
+    
+    # One set-based query per input instead of four per symbol
+    symbol_ids = [symbol_id for symbol_id, _ in symbols]
+    if latest_prices is None:
+        latest_prices = detector.get_latest_prices(symbol_ids)
+    profiles = detector.get_latest_profile_metrics(symbol_ids)
+    momentum = detector.get_momentum(symbol_ids)
+    cvd_pressures = detector.get_cvd_pressures(symbol_ids)
     
+    states = []
     for symbol_id, symbol_name in symbols:
         try:
             logger.info(f"Detecting market state for {symbol_name}...")
             
             # Detect state
-            state_data = detector.detect_state(symbol_id)
+            state_data = detector.evaluate_state(
+                current_price=latest_prices.get(symbol_id),
+                profile=profiles.get(symbol_id),
+                momentum=momentum[symbol_id],
+                cvd_pressure=cvd_pressures[symbol_id]
+            )
             
-            # Save to database
-            detector.save_state(symbol_id, state_data)
+            states.append((symbol_id, state_data))
             
             logger.info(
                 f"{symbol_name}: {state_data['state']} "
@@ -379,3 +531,6 @@ def run_market_state_detection(db_conn):
         except Exception as e:
             logger.error(f"Error processing {symbol_name}: {e}")
             continue
+    
+    # Save to database
+    detector.save_states(states)
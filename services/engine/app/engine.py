@@ -1,5 +1,7 @@
 from __future__ import annotations
-from typing import Optional, Dict, Any
+from bisect import bisect_left
+from datetime import datetime
+from typing import Optional, Dict, Any, Iterable, Tuple
 from . import indicators as ind
 from .db import get_cursor
 
@@ -15,27 +17,122 @@ class StrategyContext:
 def fetch_last_closes(cur, symbol_id: int, n: int) -> list[float]:
     cur.execute(
         """
-        SELECT close FROM candles
-        WHERE symbol_id = %s
-        ORDER BY time DESC
-        LIMIT %s
+        SELECT close FROM (
+            SELECT close, time FROM candles
+            WHERE symbol_id = %s
+            ORDER BY time DESC
+            LIMIT %s
+        ) recent
+        ORDER BY time ASC
         """,
         (symbol_id, n),
     )
-    rows = cur.fetchall()
-    return [r[0] for r in rows][::-1]  # oldest-first
+    return [r[0] for r in cur.fetchall()]  # oldest-first
 
 
-def maybe_emit_signal(cur, ctx: StrategyContext) -> Optional[dict]:
+def fetch_recent_candles_many(cur, limits: Dict[int, int]) -> Dict[int, Tuple[list[datetime], list[float]]]:
+    """
+    Times and closes of the last limits[symbol_id] candles (oldest-first)
+    for every symbol in one query.
+    """
+    if not limits:
+        return {}
+    cur.execute(
+        """
+        SELECT s.symbol_id, c.times, c.closes
+        FROM unnest(%s::int[], %s::int[]) AS s(symbol_id, n)
+        CROSS JOIN LATERAL (
+            SELECT array_agg(time ORDER BY time) AS times, array_agg(close ORDER BY time) AS closes
+            FROM (
+                SELECT close, time FROM candles
+                WHERE symbol_id = s.symbol_id
+                ORDER BY time DESC
+                LIMIT s.n
+            ) recent
+        ) c
+        """,
+        (list(limits.keys()), list(limits.values())),
+    )
+    return {symbol_id: (times or [], closes or []) for symbol_id, times, closes in cur.fetchall()}
+
+
+class SMACache:
+    """
+    Rolling SMAs per (symbol_id, period), kept across engine loops.
+
+    Each loop feeds the symbol's recent candles; only candles after the last
+    one seen are added, and that last one is revised in place since
+    ingestion keeps updating a candle until it closes. If the window no
+    longer contains the last candle seen, the SMAs are rebuilt from it.
+    """
+
+    def __init__(self):
+        self._smas: Dict[Tuple[int, int], ind.RollingSMA] = {}
+        self._last_time: Dict[int, datetime] = {}
+
+    def feed(self, symbol_id: int, times: list[datetime], closes: list[float], periods: Iterable[int]) -> None:
+        periods = {period for period in periods if period > 0}
+        last_time = self._last_time.get(symbol_id)
+        start = bisect_left(times, last_time) if last_time is not None else len(times)
+        resume = start < len(times) and times[start] == last_time
+
+        for period in periods:
+            key = (symbol_id, period)
+            sma = self._smas.get(key)
+            if sma is None or not resume:
+                self._smas[key] = ind.RollingSMA(period, closes[-period:])
+                continue
+            sma.replace_last(closes[start])
+            for close in closes[start + 1:]:
+                sma.add(close)
+
+        for key in [key for key in self._smas if key[0] == symbol_id and key[1] not in periods]:
+            del self._smas[key]
+        if times:
+            self._last_time[symbol_id] = times[-1]
+
+    def get(self, symbol_id: int, period: int) -> Optional[ind.RollingSMA]:
+        return self._smas.get((symbol_id, period))
+
+
+def sma_period(ctx: StrategyContext) -> Optional[int]:
+    """SMA period of a price_above_sma strategy, None for other rule types."""
     # MVP supports type: price_above_sma
-    rule_type = ctx.definition.get("type")
-    if rule_type != "price_above_sma":
+    if ctx.definition.get("type") != "price_above_sma":
+        return None
+    return int(ctx.definition.get("period", 20))
+
+
+def closes_needed(ctx: StrategyContext) -> Optional[int]:
+    """How many recent closes maybe_emit_signal needs for ctx, None if it needs none."""
+    period = sma_period(ctx)
+    if period is None:
+        return None
+    return max(period, 30)
+
+
+def maybe_emit_signal(
+    cur,
+    ctx: StrategyContext,
+    closes: Optional[list[float]] = None,
+    sma: Optional[ind.RollingSMA] = None,
+) -> Optional[dict]:
+    """
+    Evaluate ctx's rule. closes may be passed in (oldest-first, at least
+    closes_needed(ctx) long when available) to skip the per-strategy query,
+    and sma (a rolling SMA over the same closes) to skip re-summing them.
+    """
+    period = sma_period(ctx)
+    if period is None:
         return None
-    period = int(ctx.definition.get("period", 20))
-    closes = fetch_last_closes(cur, ctx.symbol_id, max(period, 30))
+    limit = max(period, 30)
+    if closes is None:
+        closes = fetch_last_closes(cur, ctx.symbol_id, limit)
+    else:
+        closes = closes[-limit:]
     if len(closes) < period:
         return None
-    avg = ind.sma(closes, period)
+    avg = sma.value if sma is not None else ind.sma(closes, period)
     if avg is None:
         return None
     price = closes[-1]
@@ -1,8 +0,0 @@
-from __future__ import annotations
-from typing import List, Optional
-
-
-def sma(values: List[float], period: int) -> Optional[float]:
-    if len(values) < period or period <= 0:
-        return None
-    return sum(values[-period:]) / float(period)
@@ -2,15 +2,45 @@
 Technical indicators for trading analysis.
 """
 
-# Import from parent indicators.py for backwards compatibility
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-
-from typing import List, Optional
+from collections import deque
+from typing import Deque, Iterable, List, Optional
 
 def sma(values: List[float], period: int) -> Optional[float]:
     """Simple Moving Average"""
     if len(values) < period or period <= 0:
         return None
     return sum(values[-period:]) / float(period)
+
+
+class RollingSMA:
+    """
+    Simple Moving Average over the last `period` values, updated in O(1)
+    per value instead of re-summing the window.
+    """
+
+    def __init__(self, period: int, values: Iterable[float] = ()):
+        self.period = period
+        self._window: Deque[float] = deque(maxlen=period)
+        self._sum = 0.0
+        for value in values:
+            self.add(value)
+
+    def add(self, value: float) -> Optional[float]:
+        """Append a value, dropping the oldest once the window is full."""
+        if len(self._window) == self.period:
+            self._sum -= self._window[0]
+        self._window.append(value)
+        self._sum += value
+        return self.value
+
+    def replace_last(self, value: float) -> Optional[float]:
+        """Revise the most recent value (e.g. a candle that is still forming)."""
+        self._sum += value - self._window[-1]
+        self._window[-1] = value
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self._window) < self.period:
+            return None
+        return self._sum / float(self.period)
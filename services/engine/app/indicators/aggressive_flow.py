@@ -10,8 +10,91 @@ Detects aggressive buying/selling based on:
 
 from __future__ import annotations
 import psycopg2
-from typing import Dict, Optional
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
 from loguru import logger
+from ..db import get_symbols, prepare_statements
+
+# Set-based queries run on every detection pass, prepared once per connection
+PREPARED_STATEMENTS = {
+    'af_recent_flow': """
+        SELECT 
+            symbol_id,
+            bucket,
+            delta,
+            cumulative_delta as cvd,
+            buy_pressure,
+            sell_pressure
+        FROM order_flow
+        WHERE symbol_id = ANY($1::int[])
+            AND bucket > NOW() - make_interval(mins => $2::int)
+        ORDER BY symbol_id, bucket ASC
+    """,
+    'af_volume_stats': """
+        SELECT
+            symbol_id,
+            AVG(volume) FILTER (WHERE time > NOW() - make_interval(mins => $2::int)),
+            SUM(volume) FILTER (WHERE time > NOW() - make_interval(mins => $3::int))
+        FROM candles
+        WHERE symbol_id = ANY($1::int[])
+            AND time > NOW() - make_interval(mins => GREATEST($2::int, $3::int))
+        GROUP BY symbol_id
+    """,
+    # af_recent_flow and af_volume_stats in one round trip, one row per symbol
+    'af_inputs': """
+        SELECT
+            s.id,
+            f.buckets,
+            f.deltas,
+            f.cvds,
+            f.buy_pressures,
+            f.sell_pressures,
+            v.avg_volume,
+            v.recent_volume
+        FROM unnest($1::int[]) AS s(id)
+        CROSS JOIN LATERAL (
+            SELECT
+                array_agg(bucket ORDER BY bucket) AS buckets,
+                array_agg(delta ORDER BY bucket) AS deltas,
+                array_agg(cumulative_delta ORDER BY bucket) AS cvds,
+                array_agg(buy_pressure ORDER BY bucket) AS buy_pressures,
+                array_agg(sell_pressure ORDER BY bucket) AS sell_pressures
+            FROM order_flow
+            WHERE symbol_id = s.id
+                AND bucket > NOW() - make_interval(mins => $2::int)
+        ) f
+        CROSS JOIN LATERAL (
+            SELECT
+                AVG(volume) FILTER (WHERE time > NOW() - make_interval(mins => $3::int)) AS avg_volume,
+                SUM(volume) FILTER (WHERE time > NOW() - make_interval(mins => $4::int)) AS recent_volume
+            FROM candles
+            WHERE symbol_id = s.id
+                AND time > NOW() - make_interval(mins => GREATEST($3::int, $4::int))
+        ) v
+    """,
+}
+
+
+# Aggression score ladders: reaching the i-th threshold earns POINTS[i + 1]
+VOLUME_RATIO_THRESHOLDS = (1.5, 2.0, 3.0)  # x average volume
+VOLUME_RATIO_POINTS = (0, 10, 20, 30)
+CVD_MOMENTUM_THRESHOLDS = (100, 500, 1000, 2000)  # abs CVD change
+CVD_MOMENTUM_POINTS = (0, 10, 20, 30, 40)
+PRESSURE_THRESHOLDS = (60, 70, 80)  # max of buy/sell pressure %
+PRESSURE_POINTS = (0, 10, 20, 30)
+
+# Returned (as a copy) whenever there is no data or detection fails
+_DEFAULT_STATE = {
+    'score': 0,
+    'direction': 'NEUTRAL',
+    'volume_spike': False,
+    'volume_ratio': 1.0,
+    'cvd_momentum': 0,
+    'buy_pressure': 50.0,
+    'sell_pressure': 50.0,
+    'message': 'No aggressive flow detected',
+    'is_aggressive': False
+}
 
 
 class AggressiveFlowIndicator:
@@ -24,6 +107,11 @@ class AggressiveFlowIndicator:
     
     def __init__(self, db_conn):
         self.conn = db_conn
+        
+        # One long-lived cursor for every query this indicator runs
+        self._cur = db_conn.cursor()
+        prepare_statements(self._cur, PREPARED_STATEMENTS)
+        
         self.volume_spike_threshold = 2.0  # 2x average volume
         self.high_pressure_threshold = 70  # 70% buy or sell pressure
     
@@ -46,14 +134,37 @@ class AggressiveFlowIndicator:
             # Get recent order flow data
             recent_flow = self._get_recent_order_flow(symbol_id, lookback_minutes)
             if not recent_flow:
-                return self._default_state()
+                return _DEFAULT_STATE.copy()
             
-            # Get average volume for comparison
-            avg_volume = self._get_average_volume(symbol_id, 60)
+            avg_volume, current_volume = self.get_volume_stats([symbol_id])[symbol_id]
+            return self.evaluate_aggression(
+                recent_flow=recent_flow,
+                avg_volume=avg_volume,
+                current_volume=current_volume
+            )
+            
+        except Exception as e:
+            logger.error(f"Error detecting aggressive flow: {e}")
+            return _DEFAULT_STATE.copy()
+    
+    def evaluate_aggression(self, recent_flow: List[Dict], avg_volume: float, current_volume: float) -> Dict:
+        """
+        Build the aggression result from already-fetched inputs.
+        
+        Args:
+            recent_flow: Order flow rows (oldest first), see _get_recent_order_flow
+            avg_volume: Average candle volume over the last hour
+            current_volume: Volume of the last minute
+            
+        Returns:
+            Result dict as returned by detect_aggression
+        """
+        try:
+            if not recent_flow:
+                return _DEFAULT_STATE.copy()
             
             # Calculate metrics
             current_flow = recent_flow[-1]
-            current_volume = self._get_recent_volume(symbol_id, 1)
             
             # Volume spike detection
             volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1.0
@@ -117,62 +228,85 @@ class AggressiveFlowIndicator:
             
         except Exception as e:
             logger.error(f"Error detecting aggressive flow: {e}")
-            return self._default_state()
+            return _DEFAULT_STATE.copy()
     
     def _get_recent_order_flow(self, symbol_id: int, lookback_minutes: int):
         """Get recent order flow data."""
-        cur = self.conn.cursor()
-        
-        cur.execute("""
-            SELECT 
-                bucket,
-                delta,
-                cumulative_delta as cvd,
-                buy_pressure,
-                sell_pressure
-            FROM order_flow
-            WHERE symbol_id = %s
-                AND bucket > NOW() - INTERVAL '%s minutes'
-            ORDER BY bucket ASC
-        """, (symbol_id, lookback_minutes))
+        return self.get_recent_order_flow([symbol_id], lookback_minutes).get(symbol_id, [])
+    
+    @staticmethod
+    def _flow_from_row(row) -> Dict:
+        """Convert a (bucket, delta, cvd, buy_pressure, sell_pressure) row to a dict."""
+        return {
+            'bucket': row[0],
+            'delta': row[1] if row[1] is not None else 0,
+            'cvd': row[2] if row[2] is not None else 0,
+            'buy_pressure': row[3] if row[3] is not None else 50,
+            'sell_pressure': row[4] if row[4] is not None else 50,
+        }
+    
+    def get_recent_order_flow(self, symbol_ids: Sequence[int], lookback_minutes: int = 5) -> Dict[int, List[Dict]]:
+        """Get recent order flow rows (oldest first) for each symbol in one query."""
+        cur = self._cur
         
-        rows = cur.fetchall()
+        cur.execute("EXECUTE af_recent_flow(%s, %s)", (list(symbol_ids), lookback_minutes))
         
-        return [{
-            'bucket': row[0],
-            'delta': int(row[1]) if row[1] else 0,
-            'cvd': int(row[2]) if row[2] else 0,
-            'buy_pressure': float(row[3]) if row[3] else 50,
-            'sell_pressure': float(row[4]) if row[4] else 50,
-        } for row in rows]
+        flows: Dict[int, List[Dict]] = {}
+        for row in cur.fetchall():
+            flows.setdefault(row[0], []).append(self._flow_from_row(row[1:]))
+        return flows
     
-    def _get_average_volume(self, symbol_id: int, lookback_minutes: int) -> float:
-        """Calculate average volume over period."""
-        cur = self.conn.cursor()
+    def get_volume_stats(self,
+                         symbol_ids: Sequence[int],
+                         avg_minutes: int = 60,
+                         recent_minutes: int = 1) -> Dict[int, Tuple[float, float]]:
+        """
+        Get average and recent candle volume for each symbol in one query.
         
-        cur.execute("""
-            SELECT AVG(volume)
-            FROM candles
-            WHERE symbol_id = %s
-                AND time > NOW() - INTERVAL '%s minutes'
-        """, (symbol_id, lookback_minutes))
+        Returns:
+            symbol_id -> (average volume over avg_minutes, total volume over
+            recent_minutes), defaulting to (1.0, 0.0) for symbols without
+            candles
+        """
+        cur = self._cur
+        
+        cur.execute("EXECUTE af_volume_stats(%s, %s, %s)", (list(symbol_ids), avg_minutes, recent_minutes))
         
-        row = cur.fetchone()
-        return float(row[0]) if row and row[0] else 1.0
+        stats = {
+            symbol_id: (avg if avg is not None else 1.0, total if total is not None else 0.0)
+            for symbol_id, avg, total in cur.fetchall()
+        }
+        return {symbol_id: stats.get(symbol_id, (1.0, 0.0)) for symbol_id in symbol_ids}
     
-    def _get_recent_volume(self, symbol_id: int, minutes: int) -> float:
-        """Get total volume in recent period."""
-        cur = self.conn.cursor()
+    def get_inputs(self,
+                   symbol_ids: Sequence[int],
+                   lookback_minutes: int = 5,
+                   avg_minutes: int = 60,
+                   recent_minutes: int = 1) -> Tuple[Dict[int, List[Dict]], Dict[int, Tuple[float, float]]]:
+        """
+        get_recent_order_flow and get_volume_stats in a single query.
         
-        cur.execute("""
-            SELECT SUM(volume)
-            FROM candles
-            WHERE symbol_id = %s
-                AND time > NOW() - INTERVAL '%s minutes'
-        """, (symbol_id, minutes))
+        Returns:
+            (recent flows, volume stats), shaped like the results of those
+            two methods
+        """
+        cur = self._cur
+        
+        cur.execute(
+            "EXECUTE af_inputs(%s, %s, %s, %s)",
+            (list(symbol_ids), lookback_minutes, avg_minutes, recent_minutes)
+        )
         
-        row = cur.fetchone()
-        return float(row[0]) if row and row[0] else 0.0
+        flows: Dict[int, List[Dict]] = {}
+        stats: Dict[int, Tuple[float, float]] = {}
+        for symbol_id, buckets, deltas, cvds, buy_pressures, sell_pressures, avg, total in cur.fetchall():
+            if buckets:
+                flows[symbol_id] = [
+                    self._flow_from_row(row)
+                    for row in zip(buckets, deltas, cvds, buy_pressures, sell_pressures)
+                ]
+            stats[symbol_id] = (avg if avg is not None else 1.0, total if total is not None else 0.0)
+        return flows, stats
     
     def _calculate_aggression_score(
         self,
@@ -189,69 +323,46 @@ class AggressiveFlowIndicator:
         - Strong CVD momentum: +40 points
         - High pressure (>70%): +30 points
         """
+        # Points for the number of thresholds each factor has reached
         score = 0.0
-        
-        # Volume spike
-        if volume_ratio >= 3.0:
-            score += 30
-        elif volume_ratio >= 2.0:
-            score += 20
-        elif volume_ratio >= 1.5:
-            score += 10
-        
-        # CVD momentum
-        abs_momentum = abs(cvd_momentum)
-        if abs_momentum >= 2000:
-            score += 40
-        elif abs_momentum >= 1000:
-            score += 30
-        elif abs_momentum >= 500:
-            score += 20
-        elif abs_momentum >= 100:
-            score += 10
-        
-        # Pressure
-        max_pressure = max(buy_pressure, sell_pressure)
-        if max_pressure >= 80:
-            score += 30
-        elif max_pressure >= 70:
-            score += 20
-        elif max_pressure >= 60:
-            score += 10
+        score += VOLUME_RATIO_POINTS[bisect_right(VOLUME_RATIO_THRESHOLDS, volume_ratio)]
+        score += CVD_MOMENTUM_POINTS[bisect_right(CVD_MOMENTUM_THRESHOLDS, abs(cvd_momentum))]
+        score += PRESSURE_POINTS[bisect_right(PRESSURE_THRESHOLDS, max(buy_pressure, sell_pressure))]
         
         return score
-    
-    def _default_state(self) -> Dict:
-        """Return default state when no data."""
-        return {
-            'score': 0,
-            'direction': 'NEUTRAL',
-            'volume_spike': False,
-            'volume_ratio': 1.0,
-            'cvd_momentum': 0,
-            'buy_pressure': 50.0,
-            'sell_pressure': 50.0,
-            'message': 'No aggressive flow detected',
-            'is_aggressive': False
-        }
 
 
-def run_aggressive_flow_detection(db_conn):
+# Reused across engine loops so its cursor and prepared statements are too
+_indicator: Optional[AggressiveFlowIndicator] = None
+
+
+def run_aggressive_flow_detection(db_conn, symbols=None):
     """
     Main function to run aggressive flow detection for all symbols.
     Called periodically by the engine service.
     """
-    indicator = AggressiveFlowIndicator(db_conn)
+    global _indicator
+    if _indicator is None or _indicator.conn is not db_conn:
+        _indicator = AggressiveFlowIndicator(db_conn)
+    indicator = _indicator
     
     # Get all active symbols
-    cur = db_conn.cursor()
-    cur.execute("SELECT id, symbol FROM symbols")
-    symbols = cur.fetchall()
+    if symbols is None:
+        symbols = get_symbols(db_conn.cursor())
+    
+    # One set-based query instead of three per symbol
+    symbol_ids = [symbol_id for symbol_id, _ in symbols]
+    recent_flows, volume_stats = indicator.get_inputs(symbol_ids)
     
     for symbol_id, symbol_name in symbols:
         try:
             # Detect aggressive flow
-            flow = indicator.detect_aggression(symbol_id)
+            avg_volume, current_volume = volume_stats[symbol_id]
+            flow = indicator.evaluate_aggression(
+                recent_flow=recent_flows.get(symbol_id, []),
+                avg_volume=avg_volume,
+                current_volume=current_volume
+            )
             
             if flow['is_aggressive']:
                 logger.info(
@@ -5,10 +5,13 @@ import redis
 import psycopg2
 import os
 import sys
+from typing import Optional, Set
 from loguru import logger
 from .config import settings
-from .db import get_cursor
-from .engine import StrategyContext, maybe_emit_signal
+from .db import DECIMAL_AS_FLOAT, get_cursor, get_latest_closes, get_symbols, listen, wait_for_notifies
+from .engine import (
+    SMACache, StrategyContext, closes_needed, fetch_recent_candles_many, maybe_emit_signal, sma_period
+)
 from .detectors.market_state import run_market_state_detection
 from .alerts.lvn_alerts import run_lvn_alerts
 from .indicators.aggressive_flow import run_aggressive_flow_detection
@@ -22,8 +25,138 @@ logger.add(
     level="INFO"
 )
 
+
+def run_detectors(db_conn, loop_count: int, auto_trading_enabled: bool) -> None:
+    """Run the market detectors due on this 1 second tick."""
+    # Inputs shared by the detectors on this tick, fetched once
+    try:
+        with db_conn.cursor() as cur:
+            symbols = get_symbols(cur)
+    except Exception as e:
+        logger.error(f"Symbol fetch error: {e}")
+        db_conn.rollback()  # Each detector fetches its own instead
+        symbols = None
+
+    latest_prices = None
+    if symbols is not None and loop_count % 10 == 0:
+        # Market state and LVN alerts both need the latest closes
+        try:
+            with db_conn.cursor() as cur:
+                latest_prices = get_latest_closes(cur, [symbol_id for symbol_id, _ in symbols])
+        except Exception as e:
+            logger.error(f"Latest price fetch error: {e}")
+            db_conn.rollback()  # Each detector fetches its own instead
+
+    # Run market state detection every 5 seconds (every 5 loops)
+    if loop_count % 5 == 0:
+        try:
+            run_market_state_detection(db_conn, symbols, latest_prices)
+        except Exception as e:
+            logger.error(f"Market state detection error: {e}")
+            db_conn.rollback()  # Rollback failed transaction
+
+    # Run LVN alerts every 2 seconds (every 2 loops)
+    if loop_count % 2 == 0:
+        try:
+            run_lvn_alerts(db_conn, symbols, latest_prices)
+        except Exception as e:
+            logger.error(f"LVN alert error: {e}")
+            db_conn.rollback()  # Rollback failed transaction
+
+    # Run aggressive flow detection every 1 second (every loop) - CRITICAL
+    try:
+        run_aggressive_flow_detection(db_conn, symbols)
+    except Exception as e:
+        logger.error(f"Aggressive flow detection error: {e}")
+        db_conn.rollback()  # Rollback failed transaction
+
+    # Run automated trading every 1 second (every loop) if enabled - CRITICAL
+    if auto_trading_enabled:
+        try:
+            logger.info("🤖 Running automated trading check...")
+            run_auto_trading(db_conn)
+        except Exception as e:
+            logger.error(f"Auto trading error: {e}")
+            db_conn.rollback()  # Rollback failed transaction
+
+
+def run_strategies(cur, r, sma_cache: SMACache, symbol_ids: Optional[Set[int]] = None) -> None:
+    """
+    Evaluate the active user strategies and record/publish their signals.
+    With symbol_ids, only strategies on those symbols are evaluated.
+    """
+    # Load active strategies
+    cur.execute("SELECT id, name, definition FROM strategies WHERE active = TRUE")
+    strategies = cur.fetchall()
+    if not strategies:
+        return
+
+    # Map symbol strings to ids
+    sym_map = {s: i for i, s in get_symbols(cur)}
+
+    contexts = []
+    for sid, name, definition in strategies:
+        # definition could be returned as a JSON string or a dict
+        if isinstance(definition, str):
+            try:
+                definition = json.loads(definition)
+            except Exception:
+                logger.warning("Invalid strategy JSON for id {}", sid)
+                continue
+        symbol = definition.get("symbol", "AAPL")
+        symbol_id = sym_map.get(symbol)
+        if not symbol_id or (symbol_ids is not None and symbol_id not in symbol_ids):
+            continue
+        contexts.append(StrategyContext(sid, symbol_id, symbol, definition))
+
+    # Recent candles for every strategy's symbol in one query
+    limits = {}
+    periods = {}
+    for ctx in contexts:
+        period = sma_period(ctx)
+        if period is not None:
+            limits[ctx.symbol_id] = max(limits.get(ctx.symbol_id, 0), closes_needed(ctx))
+            periods.setdefault(ctx.symbol_id, set()).add(period)
+    candles = fetch_recent_candles_many(cur, limits)
+    for symbol_id, (times, closes) in candles.items():
+        sma_cache.feed(symbol_id, times, closes, periods[symbol_id])
+
+    for ctx in contexts:
+        sid, symbol_id, symbol = ctx.strategy_id, ctx.symbol_id, ctx.symbol
+        sig = maybe_emit_signal(
+            cur, ctx, candles.get(symbol_id, ([], []))[1],
+            sma_cache.get(symbol_id, sma_period(ctx))
+        )
+        if sig:
+            cur.execute(
+                """
+                INSERT INTO signals(strategy_id, symbol_id, type, details)
+                VALUES (%s, %s, %s, %s)
+                """,
+                (sid, symbol_id, sig["type"], json.dumps(sig["details"])),
+            )
+            payload = {
+                "symbol": symbol,
+                "type": sig["type"],
+                "details": sig["details"],
+            }
+            try:
+                r.publish("signals", json.dumps(payload, separators=(",", ":")))
+            except Exception as e:
+                logger.debug("Redis publish error: {}", e)
+            logger.info(f"Signal: {payload}")
+
+
 def run():
-    r = redis.Redis(host=settings.redis_host, port=settings.redis_port, decode_responses=True)
+    # Short timeouts so an unreachable Redis can't stall the loop on publish
+    r = redis.Redis(connection_pool=redis.ConnectionPool(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        decode_responses=True,
+        max_connections=4,
+        socket_connect_timeout=1,
+        socket_timeout=1,
+    ))
     
     # Check if auto-trading is enabled
     auto_trading_enabled = os.getenv("AUTO_TRADING_ENABLED", "false").lower() == "true"
@@ -34,101 +167,47 @@ def run():
         logger.info("Starting engine service (auto-trading disabled)")
     
     # Get database connection for market state detector
-    db_conn = psycopg2.connect(
-        host=settings.postgres_host,
-        port=settings.postgres_port,
-        user=settings.postgres_user,
-        password=settings.postgres_password,
-        dbname=settings.postgres_db,
-    )
+    db_conn = psycopg2.connect(settings.dsn)
+    psycopg2.extensions.register_type(DECIMAL_AS_FLOAT, db_conn)  # AVG/SUM come back as floats
+    
+    # Rolling SMAs for the user strategies, kept across loops
+    sma_cache = SMACache()
+    
+    # Candle writes are pushed on candles_new (see the candles trigger), so
+    # user strategies only run for symbols whose candles changed
+    listen_conn = None
+    changed_symbols: Optional[Set[int]] = None  # None = evaluate every strategy
     
     loop_count = 0
+    next_tick = time.monotonic()
 
     while True:
         try:
-            # Run market state detection every 5 seconds (every 5 loops)
-            if loop_count % 5 == 0:
-                try:
-                    run_market_state_detection(db_conn)
-                except Exception as e:
-                    logger.error(f"Market state detection error: {e}")
-                    db_conn.rollback()  # Rollback failed transaction
-            
-            # Run LVN alerts every 2 seconds (every 2 loops)
-            if loop_count % 2 == 0:
-                try:
-                    run_lvn_alerts(db_conn)
-                except Exception as e:
-                    logger.error(f"LVN alert error: {e}")
-                    db_conn.rollback()  # Rollback failed transaction
-            
-            # Run aggressive flow detection every 1 second (every loop) - CRITICAL
-            try:
-                run_aggressive_flow_detection(db_conn)
-            except Exception as e:
-                logger.error(f"Aggressive flow detection error: {e}")
-                db_conn.rollback()  # Rollback failed transaction
-            
-            # Run automated trading every 1 second (every loop) if enabled - CRITICAL
-            if auto_trading_enabled:
-                try:
-                    logger.info("🤖 Running automated trading check...")
-                    run_auto_trading(db_conn)
-                except Exception as e:
-                    logger.error(f"Auto trading error: {e}")
-                    db_conn.rollback()  # Rollback failed transaction
-            
-            loop_count += 1
-            
-            with get_cursor() as cur:
-                # Load active strategies
-                cur.execute("SELECT id, name, definition FROM strategies WHERE active = TRUE")
-                strategies = cur.fetchall()
-                if not strategies:
-                    time.sleep(1)  # Ultra-fast loop
-                    continue
-
-                # Map symbol strings to ids
-                cur.execute("SELECT id, symbol FROM symbols")
-                rows = cur.fetchall()
-                sym_map = {s: i for i, s in rows}
-
-                for sid, name, definition in strategies:
-                    # definition could be returned as a JSON string or a dict
-                    if isinstance(definition, str):
-                        try:
-                            definition = json.loads(definition)
-                        except Exception:
-                            logger.warning("Invalid strategy JSON for id {}", sid)
-                            continue
-                    symbol = definition.get("symbol", "AAPL")
-                    symbol_id = sym_map.get(symbol)
-                    if not symbol_id:
-                        continue
-                    ctx = StrategyContext(sid, symbol_id, symbol, definition)
-                    sig = maybe_emit_signal(cur, ctx)
-                    if sig:
-                        cur.execute(
-                            """
-                            INSERT INTO signals(strategy_id, symbol_id, type, details)
-                            VALUES (%s, %s, %s, %s)
-                            """,
-                            (sid, symbol_id, sig["type"], json.dumps(sig["details"])),
-                        )
-                        payload = {
-                            "symbol": symbol,
-                            "type": sig["type"],
-                            "details": sig["details"],
-                        }
-                        try:
-                            r.publish("signals", json.dumps(payload))
-                        except Exception as e:
-                            logger.debug("Redis publish error: {}", e)
-                        logger.info(f"Signal: {payload}")
-
-            time.sleep(1)  # Check every 1 second for maximum responsiveness
+            if listen_conn is None or listen_conn.closed:
+                listen_conn = listen("candles_new")
+                changed_symbols = None
+
+            # Detectors keep a 1 second tick; notifications only wake the strategy pass
+            if time.monotonic() >= next_tick:
+                next_tick = time.monotonic() + 1
+                run_detectors(db_conn, loop_count, auto_trading_enabled)
+                loop_count += 1
+
+            if changed_symbols is None or changed_symbols:
+                with get_cursor() as cur:
+                    run_strategies(cur, r, sma_cache, changed_symbols)
+
+            # Sleep until the next tick, waking early when candles change
+            changed_symbols = {
+                int(payload)
+                for payload in wait_for_notifies(listen_conn, max(0.0, next_tick - time.monotonic()))
+                if payload.isdigit()
+            }
         except Exception as e:
             logger.exception("Engine loop error: {}", e)
+            changed_symbols = None
             time.sleep(1)
+
+
 if __name__ == "__main__":
     run()
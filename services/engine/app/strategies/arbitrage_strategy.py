@@ -18,12 +18,84 @@ Risk Management:
 - Diversification across markets
 """
 
+import time
 from decimal import Decimal
 from typing import Optional, Tuple, Dict, List
 from datetime import datetime
 from loguru import logger
 import psycopg2
 
+# Hot-path queries, prepared once per connection
+PREPARED_STATEMENTS = {
+    'arb_scan': """
+        SELECT
+            s.symbol,
+            s.id as symbol_id,
+            bm.market_id,
+            bm.question,
+            bm.category,
+            bm.end_date,
+            bp.yes_ask,
+            bp.no_ask,
+            bp.spread,
+            bp.estimated_profit_pct,
+            bp.timestamp
+        FROM binary_prices bp
+        JOIN symbols s ON bp.symbol_id = s.id
+        JOIN binary_markets bm ON bm.symbol_id = s.id
+        WHERE bp.arbitrage_opportunity = true
+            AND bm.status = 'active'
+            AND bp.timestamp > NOW() - INTERVAL '10 seconds'
+            AND bp.estimated_profit_pct >= $1
+        ORDER BY bp.estimated_profit_pct DESC
+        LIMIT 20
+    """,
+    'arb_check': """
+        SELECT
+            bp.yes_ask,
+            bp.no_ask,
+            bp.spread,
+            bp.estimated_profit_pct,
+            bm.market_id,
+            bm.question
+        FROM binary_prices bp
+        JOIN symbols s ON bp.symbol_id = s.id
+        JOIN binary_markets bm ON bm.symbol_id = s.id
+        WHERE s.symbol = $1
+            AND bp.arbitrage_opportunity = true
+            AND bm.status = 'active'
+        ORDER BY bp.timestamp DESC
+        LIMIT 1
+    """,
+    'arb_exposure': """
+        SELECT COALESCE(SUM(
+            (yes_qty * yes_entry_price) + (no_qty * no_entry_price)
+        ), 0) as total_exposure,
+        COUNT(*) as num_positions
+        FROM binary_positions
+        WHERE status = 'open'
+    """,
+    'arb_position_open': """
+        SELECT COUNT(*)
+        FROM binary_positions
+        WHERE market_id = $1
+            AND status = 'open'
+    """,
+    'arb_context': """
+        SELECT
+            EXISTS (
+                SELECT 1
+                FROM binary_positions
+                WHERE market_id = $1
+                    AND status = 'open'
+            ) as has_position,
+            bm.yes_token_id,
+            bm.no_token_id
+        FROM (VALUES (1)) AS one
+        LEFT JOIN binary_markets bm ON bm.market_id = $1
+    """,
+}
+
 
 class ArbitrageStrategy:
     """
@@ -58,6 +130,29 @@ class ArbitrageStrategy:
         self.max_total_exposure = Decimal(str(self.config.get('max_total_exposure', 400)))  # £400
         self.fee_rate = Decimal(str(self.config.get('fee_rate', 0.02)))  # 2% estimate
         self.min_balance = Decimal(str(self.config.get('min_balance', 50)))  # £50 reserve
+        self.reconcile_interval = float(self.config.get('reconcile_interval', 60))  # seconds
+        self.placement_horizon_ns = int(self.config.get('placement_horizon_ns', 50_000_000))  # 50ms
+
+        # Thresholds in the units estimated_profit_pct is stored in (percent)
+        self._min_profit_points = self.min_profit_pct * 100
+        self._min_profit_param = float(self._min_profit_points)
+
+        # Parse and plan the hot-path queries once rather than every poll
+        self._prepare_statements()
+
+        # symbol -> symbol_id; IDs never change, so entries never go stale
+        cur = self.conn.cursor()
+        cur.execute("SELECT symbol, id FROM symbols")
+        self._symbol_ids = dict(cur.fetchall())
+
+        # Running exposure of open positions, updated as this process opens
+        # them and re-summed from the database every reconcile_interval.
+        # Nothing trades until a reconcile has succeeded.
+        self._exposure = Decimal('0')
+        self._open_positions = 0
+        self._reconciled_at = 0.0
+        self._counters_valid = False
+        self.reconcile()
 
         logger.info(
             f"Arbitrage strategy initialized | "
@@ -66,11 +161,40 @@ class ArbitrageStrategy:
             f"Max exposure: £{self.max_total_exposure}"
         )
 
+    def _prepare_statements(self):
+        """
+        PREPARE each hot-path statement on this connection unless it exists.
+
+        Prepared statements last as long as the connection (rollbacks don't
+        drop them), so the polling queries are parsed and planned once.
+        """
+        cur = self.conn.cursor()
+        cur.execute("SELECT name FROM pg_prepared_statements")
+        existing = {name for (name,) in cur.fetchall()}
+        for name, sql in PREPARED_STATEMENTS.items():
+            if name not in existing:
+                cur.execute(f"PREPARE {name} AS {sql}")
+
+    async def warmup(self, token_ids: List[str]):
+        """
+        Warm up the trading client so the first arbitrage doesn't pay for
+        connection setup and per-token lookups mid-opportunity.
+
+        Call once at startup, before opportunities are acted on.
+
+        Args:
+            token_ids: YES/NO token IDs of the markets that may be traded
+        """
+        if self.client is None:
+            return
+
+        await self.client.warmup(token_ids)
+
     def scan_opportunities(self) -> List[Dict]:
         """
         Scan for active arbitrage opportunities.
 
-        Uses optimized query with precomputed arbitrage_opportunity flag.
+        Uses the prepared arb_scan query with precomputed arbitrage_opportunity flag.
 
         Returns:
             List of opportunity dicts with market info and prices
@@ -79,50 +203,11 @@ class ArbitrageStrategy:
             cur = self.conn.cursor()
 
             # Fast query using partial index on arbitrage_opportunity
-            cur.execute("""
-                SELECT
-                    s.symbol,
-                    s.id as symbol_id,
-                    bm.market_id,
-                    bm.question,
-                    bm.category,
-                    bm.end_date,
-                    bp.yes_ask,
-                    bp.no_ask,
-                    bp.spread,
-                    bp.estimated_profit_pct,
-                    bp.timestamp
-                FROM binary_prices bp
-                JOIN symbols s ON bp.symbol_id = s.id
-                JOIN binary_markets bm ON bm.symbol_id = s.id
-                WHERE bp.arbitrage_opportunity = true
-                    AND bm.status = 'active'
-                    AND bp.timestamp > NOW() - INTERVAL '10 seconds'
-                    AND bp.estimated_profit_pct >= %s
-                ORDER BY bp.estimated_profit_pct DESC
-                LIMIT 20
-            """, (float(self.min_profit_pct * 100),))
-
-            opportunities = []
-            for row in cur.fetchall():
-                (
-                    symbol, symbol_id, market_id, question, category, end_date,
-                    yes_ask, no_ask, spread, estimated_profit_pct, timestamp
-                ) = row
-
-                opportunities.append({
-                    'symbol': symbol,
-                    'symbol_id': symbol_id,
-                    'market_id': market_id,
-                    'question': question,
-                    'category': category,
-                    'end_date': end_date,
-                    'yes_ask': Decimal(str(yes_ask)),
-                    'no_ask': Decimal(str(no_ask)),
-                    'spread': Decimal(str(spread)),
-                    'estimated_profit_pct': Decimal(str(estimated_profit_pct)),
-                    'timestamp': timestamp
-                })
+            cur.execute("EXECUTE arb_scan(%s)", (self._min_profit_param,))
+
+            # Column names are the dict keys
+            columns = [col.name for col in cur.description]
+            opportunities = [dict(zip(columns, row)) for row in cur.fetchall()]
 
             if opportunities:
                 logger.info(f"Found {len(opportunities)} arbitrage opportunities")
@@ -147,23 +232,7 @@ class ArbitrageStrategy:
             cur = self.conn.cursor()
 
             # Get latest price with arbitrage flag
-            cur.execute("""
-                SELECT
-                    bp.yes_ask,
-                    bp.no_ask,
-                    bp.spread,
-                    bp.estimated_profit_pct,
-                    bm.market_id,
-                    bm.question
-                FROM binary_prices bp
-                JOIN symbols s ON bp.symbol_id = s.id
-                JOIN binary_markets bm ON bm.symbol_id = s.id
-                WHERE s.symbol = %s
-                    AND bp.arbitrage_opportunity = true
-                    AND bm.status = 'active'
-                ORDER BY bp.timestamp DESC
-                LIMIT 1
-            """, (symbol,))
+            cur.execute("EXECUTE arb_check(%s)", (symbol,))
 
             row = cur.fetchone()
             if not row:
@@ -172,10 +241,10 @@ class ArbitrageStrategy:
             yes_ask, no_ask, spread, estimated_profit_pct, market_id, question = row
 
             # Validate profit threshold
-            if Decimal(str(estimated_profit_pct)) < self.min_profit_pct * 100:
+            if estimated_profit_pct < self._min_profit_points:
                 logger.debug(
                     f"Profit too low for {symbol}: "
-                    f"{estimated_profit_pct:.2f}% < {self.min_profit_pct * 100:.2f}%"
+                    f"{estimated_profit_pct:.2f}% < {self._min_profit_points:.2f}%"
                 )
                 return None
 
@@ -183,10 +252,10 @@ class ArbitrageStrategy:
                 'symbol': symbol,
                 'market_id': market_id,
                 'question': question,
-                'yes_ask': Decimal(str(yes_ask)),
-                'no_ask': Decimal(str(no_ask)),
-                'spread': Decimal(str(spread)),
-                'estimated_profit_pct': Decimal(str(estimated_profit_pct))
+                'yes_ask': yes_ask,
+                'no_ask': no_ask,
+                'spread': spread,
+                'estimated_profit_pct': estimated_profit_pct
             }
 
         except Exception as e:
@@ -197,6 +266,10 @@ class ArbitrageStrategy:
         """
         Check if we can open new positions based on risk limits.
 
+        Reads the running exposure counters rather than querying, so this is
+        free to call on every opportunity. Fails closed: while the counters
+        can't be reconciled with the database, nothing passes.
+
         Checks:
         1. Total exposure across all open positions
         2. Account balance
@@ -205,44 +278,29 @@ class ArbitrageStrategy:
         Returns:
             True if all risk checks pass
         """
-        try:
-            cur = self.conn.cursor()
-
-            # Get total exposure from open positions
-            cur.execute("""
-                SELECT COALESCE(SUM(
-                    (yes_qty * yes_entry_price) + (no_qty * no_entry_price)
-                ), 0) as total_exposure,
-                COUNT(*) as num_positions
-                FROM binary_positions
-                WHERE status = 'open'
-            """)
+        self._maybe_reconcile()
 
-            row = cur.fetchone()
-            total_exposure, num_positions = row
-            total_exposure = Decimal(str(total_exposure))
-
-            # Check total exposure limit
-            if total_exposure >= self.max_total_exposure:
-                logger.warning(
-                    f"Max exposure reached: £{total_exposure:.2f} / £{self.max_total_exposure}"
-                )
-                return False
-
-            # TODO: Check account balance from trading client
-            # For now, assume we have sufficient balance
+        if not self._counters_valid:
+            logger.warning("Exposure unknown (reconcile failed), refusing new positions")
+            return False
 
-            logger.debug(
-                f"Risk check passed | "
-                f"Exposure: £{total_exposure:.2f} / £{self.max_total_exposure} | "
-                f"Positions: {num_positions}"
+        # Check total exposure limit
+        if self._exposure >= self.max_total_exposure:
+            logger.warning(
+                f"Max exposure reached: £{self._exposure:.2f} / £{self.max_total_exposure}"
             )
+            return False
 
-            return True
+        # TODO: Check account balance from trading client
+        # For now, assume we have sufficient balance
 
-        except Exception as e:
-            logger.error(f"Error checking risk limits: {e}")
-            return False
+        logger.debug(
+            f"Risk check passed | "
+            f"Exposure: £{self._exposure:.2f} / £{self.max_total_exposure} | "
+            f"Positions: {self._open_positions}"
+        )
+
+        return True
 
     def check_existing_position(self, market_id: str) -> bool:
         """
@@ -256,12 +314,7 @@ class ArbitrageStrategy:
         """
         try:
             cur = self.conn.cursor()
-            cur.execute("""
-                SELECT COUNT(*)
-                FROM binary_positions
-                WHERE market_id = %s
-                    AND status = 'open'
-            """, (market_id,))
+            cur.execute("EXECUTE arb_position_open(%s)", (market_id,))
 
             count = cur.fetchone()[0]
             return count > 0
@@ -278,35 +331,118 @@ class ArbitrageStrategy:
             spread: Current spread (yes_ask + no_ask)
 
         Returns:
-            Position size in pounds
+            Position size in pounds (0 while exposure is unknown)
         """
         # Simple approach: use max_position_size if we have room
         # TODO: Implement Kelly Criterion or risk-adjusted sizing
+        self._maybe_reconcile()
 
+        if not self._counters_valid:
+            return Decimal('0')
+
+        available = self.max_total_exposure - self._exposure
+
+        # Use smaller of max_position_size or available capital
+        position_size = min(self.max_position_size, available)
+
+        logger.debug(f"Position size: £{position_size:.2f}")
+        return position_size
+
+    def reconcile(self):
+        """
+        Reload the exposure counters from binary_positions.
+
+        _save_position adds positions this process opens. Positions are
+        closed outside this process (from the dashboard), so this is the
+        only place their exposure is released.
+        """
         try:
             cur = self.conn.cursor()
+            cur.execute("EXECUTE arb_exposure")
+            total_exposure, num_positions = cur.fetchone()
 
-            # Get available capital
-            cur.execute("""
-                SELECT COALESCE(SUM(
-                    (yes_qty * yes_entry_price) + (no_qty * no_entry_price)
-                ), 0) as total_exposure
-                FROM binary_positions
-                WHERE status = 'open'
-            """)
+            self._exposure = total_exposure
+            self._open_positions = num_positions
+            self._reconciled_at = time.monotonic()
+            self._counters_valid = True
+
+        except Exception as e:
+            logger.error(f"Error reconciling exposure: {e}")
+            self.conn.rollback()
+            self._counters_valid = False
+
+    def _maybe_reconcile(self):
+        """
+        Reconcile the exposure counters if they are older than
+        reconcile_interval, or on every call until a reconcile succeeds.
+        """
+        if (not self._counters_valid
+                or time.monotonic() - self._reconciled_at >= self.reconcile_interval):
+            self.reconcile()
+
+    def _symbol_id_for(self, symbol: str) -> Optional[int]:
+        """
+        Look up a symbol's ID, from the cache when possible.
 
-            total_exposure = Decimal(str(cur.fetchone()[0]))
-            available = self.max_total_exposure - total_exposure
+        Symbols added after startup are loaded (and cached) on first use;
+        unknown symbols aren't cached, so they are found once they exist.
 
-            # Use smaller of max_position_size or available capital
-            position_size = min(self.max_position_size, available)
+        Args:
+            symbol: Market symbol
+
+        Returns:
+            Symbol ID, or None if the symbol doesn't exist
+        """
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is not None:
+            return symbol_id
 
-            logger.debug(f"Position size: £{position_size:.2f}")
-            return position_size
+        try:
+            cur = self.conn.cursor()
+            cur.execute("SELECT id FROM symbols WHERE symbol = %s", (symbol,))
+            row = cur.fetchone()
 
         except Exception as e:
-            logger.error(f"Error calculating position size: {e}")
-            return Decimal('0')
+            logger.error(f"Error looking up symbol {symbol}: {e}")
+            self.conn.rollback()
+            return None
+
+        if row:
+            self._symbol_ids[symbol] = row[0]
+            return row[0]
+        return None
+
+    def _load_execution_context(self, market_id: str) -> Optional[Dict]:
+        """
+        Read what execute_arbitrage checks in the database in one round trip.
+
+        Folds the open-position check for this market and the market's token
+        IDs into a single query (exposure comes from the counters and
+        symbol_id from the symbol cache).
+
+        Args:
+            market_id: Polymarket market ID
+
+        Returns:
+            Dict with has_position, yes_token_id and no_token_id (None where
+            unknown), or None on error
+        """
+        try:
+            cur = self.conn.cursor()
+            cur.execute("EXECUTE arb_context(%s)", (market_id,))
+
+            has_position, yes_token_id, no_token_id = cur.fetchone()
+
+            return {
+                'has_position': has_position,
+                'yes_token_id': yes_token_id,
+                'no_token_id': no_token_id
+            }
+
+        except Exception as e:
+            logger.error(f"Error loading execution context for {market_id}: {e}")
+            self.conn.rollback()
+            return None
 
     async def execute_arbitrage(
         self,
@@ -319,6 +455,8 @@ class ArbitrageStrategy:
         Execute paired YES + NO purchase.
 
         Speed critical: Must execute both orders within milliseconds.
+        Both legs must be on their way within placement_horizon_ns of the
+        call, otherwise neither is sent.
 
         Args:
             symbol: Market symbol
@@ -329,15 +467,31 @@ class ArbitrageStrategy:
         Returns:
             True if execution successful
         """
+        # Both legs go out by this deadline or not at all
+        send_by_ns = time.monotonic_ns() + self.placement_horizon_ns
+
         # Pre-execution checks
         if not self.check_risk_limits():
             logger.warning(f"Risk limits exceeded, skipping {symbol}")
             return False
 
-        if self.check_existing_position(market_id):
+        context = self._load_execution_context(market_id)
+        if context is None:
+            return False
+
+        if context['has_position']:
             logger.warning(f"Already have position in {market_id}, skipping")
             return False
 
+        symbol_id = self._symbol_id_for(symbol)
+        if symbol_id is None:
+            logger.error(f"Symbol not found: {symbol}")
+            return False
+
+        if not context['yes_token_id'] or not context['no_token_id']:
+            logger.error(f"No token IDs for {market_id}, run market_fetcher first")
+            return False
+
         # Calculate position size
         spread = yes_ask + no_ask
         position_size = self.calculate_position_size(spread)
@@ -346,49 +500,56 @@ class ArbitrageStrategy:
             logger.warning(f"No capital available for {symbol}")
             return False
 
-        # Calculate quantities (equal dollar amount for both)
-        yes_qty = position_size / yes_ask
-        no_qty = position_size / no_ask
+        # Buy the same number of shares on both legs, so one of them pays
+        # out qty at resolution whichever way it goes; position_size is the
+        # total spent on the pair
+        qty = position_size / spread
+        yes_amount = qty * yes_ask
+        no_amount = qty * no_ask
 
         logger.info(
             f"Executing arbitrage: {symbol} | "
-            f"YES: {yes_qty:.2f} @ ${yes_ask:.4f} | "
-            f"NO: {no_qty:.2f} @ ${no_ask:.4f} | "
+            f"YES: {qty:.2f} @ ${yes_ask:.4f} | "
+            f"NO: {qty:.2f} @ ${no_ask:.4f} | "
             f"Spread: ${spread:.4f}"
         )
 
         try:
-            # TODO: Implement parallel order execution
-            # For now, this is a placeholder
-
-            # Place YES order
-            # yes_order = await self.client.place_order(
-            #     market_id=market_id,
-            #     side='YES',
-            #     price=yes_ask,
-            #     quantity=yes_qty,
-            #     order_type='MARKET'
-            # )
-
-            # Place NO order
-            # no_order = await self.client.place_order(
-            #     market_id=market_id,
-            #     side='NO',
-            #     price=no_ask,
-            #     quantity=no_qty,
-            #     order_type='MARKET'
-            # )
+            # Send both legs in one request so neither waits on the other
+            yes_order, no_order = await self.client.place_market_orders([
+                (context['yes_token_id'], yes_amount, yes_ask),
+                (context['no_token_id'], no_amount, no_ask)
+            ], "BUY", send_by_ns)
+
+            yes_filled = self.client.is_filled(yes_order)
+            no_filled = self.client.is_filled(no_order)
+
+            if not (yes_filled and no_filled):
+                logger.warning(
+                    f"Arbitrage legs incomplete for {symbol} | "
+                    f"YES: {'filled' if yes_filled else 'failed'} | "
+                    f"NO: {'filled' if no_filled else 'failed'}"
+                )
+
+                # A lone filled leg is naked directional exposure; flatten it
+                if yes_filled:
+                    await self._unwind_leg(symbol, context['yes_token_id'], yes_order, qty)
+                elif no_filled:
+                    await self._unwind_leg(symbol, context['no_token_id'], no_order, qty)
+
+                return False
 
             # Save position to database
             self._save_position(
                 symbol=symbol,
+                symbol_id=symbol_id,
                 market_id=market_id,
-                yes_qty=yes_qty,
-                no_qty=no_qty,
+                yes_qty=qty,
+                no_qty=qty,
                 yes_price=yes_ask,
                 no_price=no_ask,
-                yes_order_id=None,  # TODO: Get from yes_order
-                no_order_id=None    # TODO: Get from no_order
+                yes_order_id=yes_order.get('orderID'),
+                no_order_id=no_order.get('orderID')
             )
 
             logger.success(
@@ -402,9 +563,41 @@ class ArbitrageStrategy:
             logger.error(f"Arbitrage execution failed for {symbol}: {e}")
             return False
 
+    async def _unwind_leg(self, symbol: str, token_id: str, order: Dict, qty: Decimal):
+        """
+        Sell back the filled leg of an arbitrage whose other leg failed.
+
+        Sells the shares the buy actually received, which can differ from
+        the requested qty; selling more than is held would be rejected, and
+        selling less would leave shares behind.
+
+        Args:
+            symbol: Market symbol (for logging)
+            token_id: Token ID of the filled leg
+            order: Response of the filled buy order
+            qty: Shares requested on that leg, used if the response doesn't
+                report the fill size (market sells are sized in shares)
+        """
+        filled = self.client.filled_shares(order)
+        if filled is None:
+            logger.warning(f"No fill size reported for {token_id}, unwinding requested {qty:.2f}")
+        else:
+            qty = filled
+
+        response = await self.client.place_market_order(token_id, qty, "SELL")
+
+        if self.client.is_filled(response):
+            logger.warning(f"Unwound single filled leg for {symbol}: {qty:.2f} of {token_id}")
+        else:
+            logger.error(
+                f"Failed to unwind single filled leg for {symbol}: "
+                f"{qty:.2f} of {token_id} still held, close it manually"
+            )
+
     def _save_position(
         self,
         symbol: str,
+        symbol_id: Optional[int],
         market_id: str,
         yes_qty: Decimal,
         no_qty: Decimal,
@@ -418,6 +611,7 @@ class ArbitrageStrategy:
 
         Args:
             symbol: Market symbol
+            symbol_id: Symbol ID if already known (from the symbol cache otherwise)
             market_id: Polymarket market ID
             yes_qty: Quantity of YES shares
             no_qty: Quantity of NO shares
@@ -430,13 +624,11 @@ class ArbitrageStrategy:
             cur = self.conn.cursor()
 
             # Get symbol_id
-            cur.execute("SELECT id FROM symbols WHERE symbol = %s", (symbol,))
-            row = cur.fetchone()
-            if not row:
-                logger.error(f"Symbol not found: {symbol}")
-                return
-
-            symbol_id = row[0]
+            if symbol_id is None:
+                symbol_id = self._symbol_id_for(symbol)
+                if symbol_id is None:
+                    logger.error(f"Symbol not found: {symbol}")
+                    return
 
             # Calculate entry spread
             entry_spread = yes_price + no_price
@@ -472,6 +664,10 @@ class ArbitrageStrategy:
 
             self.conn.commit()
 
+            # Keep the exposure counters in step without re-summing
+            self._exposure += yes_qty * yes_price + no_qty * no_price
+            self._open_positions += 1
+
             logger.info(f"Position saved: {symbol} | Market: {market_id}")
 
         except Exception as e:
@@ -490,6 +686,7 @@ class ArbitrageStrategy:
             cur.execute("""
                 SELECT
                     bp.id,
+                    bp.symbol_id,
                     s.symbol,
                     bm.question,
                     bm.market_id,
@@ -498,6 +695,10 @@ class ArbitrageStrategy:
                     bp.yes_entry_price,
                     bp.no_entry_price,
                     bp.entry_spread,
+                    -- Payout of the matched shares less what both legs cost
+                    (bp.yes_qty + bp.no_qty) / 2
+                        - (bp.yes_qty * bp.yes_entry_price + bp.no_qty * bp.no_entry_price)
+                        as locked_profit,
                     bp.opened_at,
                     bm.end_date
                 FROM binary_positions bp
@@ -507,35 +708,9 @@ class ArbitrageStrategy:
                 ORDER BY bp.opened_at DESC
             """)
 
-            positions = []
-            for row in cur.fetchall():
-                (
-                    position_id, symbol, question, market_id,
-                    yes_qty, no_qty, yes_entry_price, no_entry_price,
-                    entry_spread, opened_at, end_date
-                ) = row
-
-                # Calculate locked profit
-                avg_qty = (Decimal(str(yes_qty)) + Decimal(str(no_qty))) / 2
-                payout = avg_qty * Decimal('1.00')
-                cost = Decimal(str(yes_qty)) * Decimal(str(yes_entry_price)) + \
-                       Decimal(str(no_qty)) * Decimal(str(no_entry_price))
-                locked_profit = payout - cost
-
-                positions.append({
-                    'id': position_id,
-                    'symbol': symbol,
-                    'question': question,
-                    'market_id': market_id,
-                    'yes_qty': Decimal(str(yes_qty)),
-                    'no_qty': Decimal(str(no_qty)),
-                    'yes_entry_price': Decimal(str(yes_entry_price)),
-                    'no_entry_price': Decimal(str(no_entry_price)),
-                    'entry_spread': Decimal(str(entry_spread)),
-                    'locked_profit': locked_profit,
-                    'opened_at': opened_at,
-                    'end_date': end_date
-                })
+            # Column names are the dict keys
+            columns = [col.name for col in cur.description]
+            positions = [dict(zip(columns, row)) for row in cur.fetchall()]
 
             return positions
 
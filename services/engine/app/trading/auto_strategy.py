@@ -20,15 +20,20 @@ Position Sizing:
 
 from __future__ import annotations
 import psycopg2
-from typing import Optional, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List
 from loguru import logger
 from .alpaca_client import AlpacaTradingClient
 from .position_manager import PositionManager
 from .order_monitor import OrderMonitor
 from .atr_calculator import get_atr_based_levels
+from ..db import get_symbols
 from ..strategy_manager import StrategyManager
 from ..strategies.auction_market_strategy import AuctionMarketStrategy
 
+# Concurrent broker position lookups per trading cycle
+MAX_POSITION_WORKERS = 8
+
 
 class AutoTradingStrategy:
     """
@@ -134,7 +139,7 @@ class AutoTradingStrategy:
             if not row:
                 return None
             
-            current_price = float(row[0])
+            current_price = row[0]
             
             # Get market state
             cur.execute("""
@@ -150,7 +155,7 @@ class AutoTradingStrategy:
                 return None
             
             market_state = state_row[0]
-            confidence = int(state_row[1])
+            confidence = state_row[1]
             
             # Get aggressive flow (last 5 buckets)
             cur.execute("""
@@ -167,13 +172,13 @@ class AutoTradingStrategy:
             
             # Extract flow metrics
             current_flow = flow_rows[0]
-            buy_pressure = float(current_flow[1])
-            sell_pressure = float(current_flow[2])
+            buy_pressure = current_flow[1]
+            sell_pressure = current_flow[2]
             
             # CVD momentum
             if len(flow_rows) >= 2:
-                cvd_start = int(flow_rows[-1][0])
-                cvd_end = int(flow_rows[0][0])
+                cvd_start = flow_rows[-1][0]
+                cvd_end = flow_rows[0][0]
                 cvd_momentum = cvd_end - cvd_start
             else:
                 cvd_momentum = 0
@@ -192,9 +197,9 @@ class AutoTradingStrategy:
                 # Calculate ATR (14-period)
                 true_ranges = []
                 for i in range(1, len(candles)):
-                    high = float(candles[i][0])
-                    low = float(candles[i][1])
-                    prev_close = float(candles[i-1][2])
+                    high = candles[i][0]
+                    low = candles[i][1]
+                    prev_close = candles[i-1][2]
                     
                     tr = max(
                         high - low,
@@ -333,16 +338,36 @@ class AutoTradingStrategy:
         except Exception as e:
             logger.error(f"Error checking pending orders: {e}")
     
-    def check_and_execute(self, symbol_id: int, symbol: str):
+    def get_positions_for(self, symbols: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Look up the broker position for each symbol.
+        
+        The lookups are independent HTTP requests, so they run on a small
+        thread pool instead of one after another.
+        """
+        if len(symbols) <= 1:
+            return {symbol: self.client.get_position(symbol) for symbol in symbols}
+        
+        with ThreadPoolExecutor(max_workers=min(MAX_POSITION_WORKERS, len(symbols))) as executor:
+            return dict(zip(symbols, executor.map(self.client.get_position, symbols)))
+    
+    def check_and_execute(self, symbol_id: int, symbol: str, positions: Optional[Dict[str, Optional[Dict]]] = None):
         """
         Check for entry signals and execute if conditions met.
+        
+        Args:
+            positions: Prefetched get_positions_for() result; looked up
+                from the broker when not given
         """
         if not self.enabled:
             return
         
         try:
             # Check if we already have a position
-            position = self.client.get_position(symbol)
+            if positions is not None:
+                position = positions.get(symbol)
+            else:
+                position = self.client.get_position(symbol)
             if position:
                 logger.debug(f"Already have position in {symbol}, skipping")
                 return
@@ -378,12 +403,13 @@ def run_auto_trading(db_conn):
         strategy = AutoTradingStrategy(db_conn, alpaca_client, position_manager)
         
         # Get all active symbols
-        cur = db_conn.cursor()
-        cur.execute("SELECT id, symbol FROM symbols")
-        symbols = cur.fetchall()
+        symbols = get_symbols(db_conn.cursor())
+        
+        # Broker positions for every symbol up front, fetched concurrently
+        positions = strategy.get_positions_for([symbol_name for _, symbol_name in symbols])
         
         for symbol_id, symbol_name in symbols:
-            strategy.check_and_execute(symbol_id, symbol_name)
+            strategy.check_and_execute(symbol_id, symbol_name, positions)
             
     except Exception as e:
         logger.error(f"Error in auto trading: {e}")
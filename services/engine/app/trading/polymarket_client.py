@@ -21,20 +21,34 @@ Speed Priority:
 """
 
 import asyncio
+import time
 from decimal import Decimal
 from typing import Dict, Optional, List, Tuple
 from loguru import logger
 
 try:
+    import httpx
     from py_clob_client.client import ClobClient
     from py_clob_client.clob_types import MarketOrderArgs, OrderType, OrderArgs
     from py_clob_client.exceptions import PolyException
+    from py_clob_client.http_helpers import helpers as clob_http
     CLOB_AVAILABLE = True
+
+    try:
+        from py_clob_client.clob_types import PostOrdersArgs
+        BATCH_ORDERS_AVAILABLE = True
+    except ImportError:  # Older py-clob-client without POST /orders
+        BATCH_ORDERS_AVAILABLE = False
 except ImportError:
     logger.warning("py-clob-client not installed. Run: pip install py-clob-client")
     CLOB_AVAILABLE = False
 
 
+# py-clob-client sends every request through one module-level HTTP/2 client;
+# httpx drops idle connections after 5s, so keep them open between opportunities
+KEEPALIVE_EXPIRY = 300  # seconds
+
+
 class PolymarketTradingClient:
     """
     Polymarket CLOB trading client for executing arbitrage orders.
@@ -103,6 +117,48 @@ class PolymarketTradingClient:
             logger.error(f"Failed to generate API credentials: {e}")
             raise
 
+    async def warmup(self, token_ids: List[str]) -> None:
+        """
+        Pay the one-off costs of the first order before any opportunity.
+
+        - Keeps the HTTP/2 connection to the CLOB open for KEEPALIVE_EXPIRY
+          instead of httpx's 5s, then opens it with a ping
+        - Fills py-clob-client's per-token tick size, neg-risk and fee rate
+          caches, which it otherwise fetches while signing the first order
+
+        Args:
+            token_ids: Token IDs that may be traded
+        """
+        start = time.monotonic()
+
+        if isinstance(getattr(clob_http, '_http_client', None), httpx.Client):
+            clob_http._http_client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=KEEPALIVE_EXPIRY)
+            )
+
+        try:
+            await asyncio.to_thread(self.client.get_ok)
+        except Exception as e:
+            logger.error(f"CLOB ping failed during warmup: {e}")
+            return
+
+        await asyncio.gather(*(asyncio.to_thread(self._warm_token, token_id) for token_id in token_ids))
+
+        logger.success(
+            f"Trading client warmed up | {len(token_ids)} tokens | "
+            f"{(time.monotonic() - start) * 1000:.0f}ms"
+        )
+
+    def _warm_token(self, token_id: str) -> None:
+        """Fetch (and let py-clob-client cache) what signing an order for token_id needs."""
+        try:
+            self.client.get_tick_size(token_id)
+            self.client.get_neg_risk(token_id)
+            self.client.get_fee_rate_bps(token_id)
+        except Exception as e:
+            logger.warning(f"Failed to warm up token {token_id}: {e}")
+
     def get_orderbook(self, token_id: str) -> Dict:
         """
         Get orderbook for a token.
@@ -158,7 +214,8 @@ class PolymarketTradingClient:
         self,
         token_id: str,
         amount: Decimal,
-        side: str = "BUY"
+        side: str = "BUY",
+        price: Optional[Decimal] = None
     ) -> Optional[Dict]:
         """
         Place a market order (FOK).
@@ -167,6 +224,8 @@ class PolymarketTradingClient:
             token_id: Polymarket token ID
             amount: Dollar amount to trade (not shares!)
             side: "BUY" or "SELL"
+            price: Worst acceptable price; saves an orderbook fetch when
+                known (e.g. the ask the opportunity was priced at)
 
         Returns:
             Order response dict or None on failure
@@ -175,17 +234,11 @@ class PolymarketTradingClient:
             logger.info(f"Placing {side} order: {token_id} | ${amount:.2f}")
 
             # Create market order args
-            order_args = MarketOrderArgs(
-                token_id=token_id,
-                amount=float(amount),  # py-clob-client expects float
-                side=side.upper()
-            )
+            order_args = self._market_order_args(token_id, amount, side, price)
 
-            # Sign order
-            signed_order = self.client.create_market_order(order_args)
-
-            # Submit order (FOK = Fill-Or-Kill)
-            response = self.client.post_order(signed_order, OrderType.FOK)
+            # Sign and submit off the event loop, so legs gathered together
+            # are actually in flight at the same time
+            response = await asyncio.to_thread(self._sign_and_post, order_args)
 
             logger.success(
                 f"Order placed: {response.get('orderID')} | "
@@ -201,6 +254,185 @@ class PolymarketTradingClient:
             logger.error(f"Failed to place order: {e}")
             return None
 
+    @staticmethod
+    def _market_order_args(
+        token_id: str,
+        amount: Decimal,
+        side: str,
+        price: Optional[Decimal] = None
+    ) -> "MarketOrderArgs":
+        """
+        Build market order args; without a price py-clob-client fetches the
+        orderbook to work one out before signing.
+        """
+        return MarketOrderArgs(
+            token_id=token_id,
+            amount=float(amount),  # py-clob-client expects float
+            side=side.upper(),
+            price=float(price) if price else 0
+        )
+
+    def _sign_and_post(self, order_args: "MarketOrderArgs") -> Dict:
+        """
+        Sign a market order and submit it as FOK (blocking HTTP call).
+
+        Args:
+            order_args: Market order arguments
+
+        Returns:
+            Order response dict
+        """
+        # Sign order
+        signed_order = self.client.create_market_order(order_args)
+
+        # Submit order (FOK = Fill-Or-Kill)
+        return self.client.post_order(signed_order, OrderType.FOK)
+
+    async def place_market_orders(
+        self,
+        orders: List[Tuple[str, Decimal, Optional[Decimal]]],
+        side: str = "BUY",
+        send_by_ns: Optional[int] = None
+    ) -> List[Optional[Dict]]:
+        """
+        Place several market orders (FOK) in one request.
+
+        Polymarket has no websocket order entry, so the nearest thing to
+        sending every leg down one open connection is the batch POST /orders
+        endpoint: all legs are signed first, then go out in a single request
+        on the client's keep-alive connection. Falls back to concurrent
+        single-order requests on py-clob-client versions without it.
+
+        Polymarket can't schedule orders for a target time, so send_by_ns is
+        enforced here instead: if signing finishes after it (a time.monotonic_ns
+        value), no order is sent at all, rather than some legs going out on a
+        quote that has likely moved.
+
+        Args:
+            orders: (token_id, amount, price) tuples, as in place_market_order
+            side: "BUY" or "SELL"
+            send_by_ns: Optional deadline for sending, from time.monotonic_ns()
+
+        Returns:
+            Order response dicts (None on failure), in the order given
+        """
+        if not BATCH_ORDERS_AVAILABLE:
+            # Legs are signed separately here, so only check before starting
+            if self._past_deadline(send_by_ns):
+                return [None] * len(orders)
+
+            return list(await asyncio.gather(*(
+                self.place_market_order(token_id, amount, side, price)
+                for token_id, amount, price in orders
+            )))
+
+        try:
+            logger.info(
+                f"Placing {len(orders)} {side} orders: " +
+                ", ".join(f"{token_id} ${amount:.2f}" for token_id, amount, _ in orders)
+            )
+
+            responses = await asyncio.to_thread(self._sign_and_post_batch, [
+                self._market_order_args(token_id, amount, side, price)
+                for token_id, amount, price in orders
+            ], send_by_ns)
+
+            if responses is None:
+                return [None] * len(orders)
+
+            if not isinstance(responses, list) or len(responses) != len(orders):
+                logger.error(f"Unexpected batch order response: {responses}")
+                return [None] * len(orders)
+
+            for response in responses:
+                logger.success(
+                    f"Order placed: {response.get('orderID')} | "
+                    f"Status: {response.get('status')}"
+                )
+
+            return responses
+
+        except PolyException as e:
+            logger.error(f"Polymarket API error placing orders: {e}")
+            return [None] * len(orders)
+        except Exception as e:
+            logger.error(f"Failed to place orders: {e}")
+            return [None] * len(orders)
+
+    def _sign_and_post_batch(
+        self,
+        orders_args: List["MarketOrderArgs"],
+        send_by_ns: Optional[int] = None
+    ) -> Optional[List[Dict]]:
+        """
+        Sign market orders and submit them as FOK in one request (blocking HTTP call).
+
+        Args:
+            orders_args: Market order arguments, one per order
+            send_by_ns: Optional time.monotonic_ns() deadline for sending
+
+        Returns:
+            Order response dicts in the same order, or None if the deadline
+            passed before sending
+        """
+        # Sign everything before anything is sent
+        signed_orders = [self.client.create_market_order(args) for args in orders_args]
+
+        if self._past_deadline(send_by_ns):
+            return None
+
+        return self.client.post_orders([
+            PostOrdersArgs(order=signed_order, orderType=OrderType.FOK)
+            for signed_order in signed_orders
+        ])
+
+    @staticmethod
+    def _past_deadline(send_by_ns: Optional[int]) -> bool:
+        """Log and return True if a send deadline has already passed."""
+        if send_by_ns is None:
+            return False
+
+        late_ns = time.monotonic_ns() - send_by_ns
+        if late_ns <= 0:
+            return False
+
+        logger.warning(f"Orders not sent: {late_ns / 1e6:.1f}ms past the placement deadline")
+        return True
+
+    @staticmethod
+    def is_filled(response) -> bool:
+        """
+        Check whether an order response is a fill.
+
+        Args:
+            response: Order response dict, or None for a failed order
+
+        Returns:
+            True if the order filled
+        """
+        return isinstance(response, dict) and response.get('status') == 'filled'
+
+    @staticmethod
+    def filled_shares(response) -> Optional[Decimal]:
+        """
+        Get the number of shares a filled market BUY received.
+
+        Args:
+            response: Order response dict
+
+        Returns:
+            Shares received (the response's takingAmount), or None if the
+            response doesn't report it
+        """
+        if not isinstance(response, dict):
+            return None
+
+        taking_amount = response.get('takingAmount')
+        if taking_amount in (None, ''):
+            return None
+
+        return Decimal(str(taking_amount))
+
     async def execute_arbitrage(
         self,
         yes_token_id: str,
@@ -237,15 +469,14 @@ class PolymarketTradingClient:
         no_amount = position_size / 2
 
         try:
-            # Execute both orders in parallel for speed
-            yes_task = self.place_market_order(yes_token_id, yes_amount, "BUY")
-            no_task = self.place_market_order(no_token_id, no_amount, "BUY")
-
-            yes_response, no_response = await asyncio.gather(yes_task, no_task)
+            # Send both orders together for speed
+            yes_response, no_response = await self.place_market_orders(
+                [(yes_token_id, yes_amount, yes_price), (no_token_id, no_amount, no_price)], "BUY"
+            )
 
             # Check if both filled
-            yes_filled = yes_response and yes_response.get('status') == 'filled'
-            no_filled = no_response and no_response.get('status') == 'filled'
+            yes_filled = self.is_filled(yes_response)
+            no_filled = self.is_filled(no_response)
 
             if yes_filled and no_filled:
                 logger.success(
@@ -401,14 +401,19 @@ class ArbitrageMonitor:
                 logger.error("No markets with token IDs found. Run market_fetcher first.")
                 return
 
+            # Get all token IDs to subscribe
+            token_ids = list(self.token_market_map.keys())
+
+            # Pay connection setup and per-token lookups before the first trade
+            if self.mode == 'live':
+                await self.strategy.warmup(token_ids)
+
             # Connect to WebSocket
             connected = await self.ws_provider.connect()
             if not connected:
                 logger.error("Failed to connect to Polymarket WebSocket")
                 return
 
-            # Get all token IDs to subscribe
-            token_ids = list(self.token_market_map.keys())
             logger.info(f"Subscribing to {len(token_ids)} tokens ({len(token_ids) // 2} markets)")
 
             # Subscribe to all token IDs
@@ -860,6 +865,10 @@ def main():
         password=os.getenv('DB_PASSWORD', '')
     )
 
+    # Every write here is a single statement, and autocommit keeps the polling
+    # reads from sitting in one long transaction where NOW() never advances
+    db_conn.autocommit = True
+
     # Create monitor
     monitor = ArbitrageMonitor(
         db_conn=db_conn,
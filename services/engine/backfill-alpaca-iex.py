@@ -65,9 +65,21 @@ class AlpacaIEXDownloader:
         }
         
         # Connect to database
-        self.conn = psycopg2.connect(**DB_CONFIG)
+        # Inserts are idempotent (ON CONFLICT DO NOTHING), so a crash just
+        # means re-running; skip the WAL flush wait on every commit
+        self.conn = psycopg2.connect(**DB_CONFIG, options='-c synchronous_commit=off')
         self.conn.autocommit = False
         logger.info("Connected to database")
+        
+        # Parse/plan the candle insert once per session; insert_bars EXECUTEs it
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                PREPARE insert_candle (int, timestamptz, float8, float8, float8, float8, bigint) AS
+                INSERT INTO candles (symbol_id, time, open, high, low, close, volume)
+                VALUES ($1, $2, $3, $4, $5, $6, $7)
+                ON CONFLICT (symbol_id, time) DO NOTHING
+            """)
+        self.conn.commit()
     
     def get_symbol_id(self, symbol: str) -> int:
         """Get or create symbol ID."""
@@ -173,11 +185,7 @@ class AlpacaIEXDownloader:
         with self.conn.cursor() as cur:
             execute_batch(
                 cur,
-                """
-                INSERT INTO candles (symbol_id, time, open, high, low, close, volume)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (symbol_id, time) DO NOTHING
-                """,
+                "EXECUTE insert_candle (%s, %s, %s, %s, %s, %s, %s)",
                 data,
                 page_size=1000
             )
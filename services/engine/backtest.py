@@ -21,8 +21,8 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app.backtest_config import BacktestConfig
 from app.backtest_data import BacktestDataLoader
-from app.backtest_position import BacktestPortfolio
-from app.backtest_engine import BacktestEngine
+from app.backtest_position import BacktestPortfolio, Position
+from app.backtest_engine import BacktestEngine, find_exit_bar
 from app.backtest_analysis import BacktestAnalyzer
 from app.versions import bump_engine_version, get_version_info
 
@@ -119,13 +119,29 @@ def run_individual_backtest(symbol: str, start_date: datetime, end_date: datetim
     # Create run record
     run_id = engine._create_run([symbol], start_date, end_date)
     
+    # Preload lookback windows and ATR for signal checks
+    engine.prepare_symbol_data([symbol], start_date, end_date)
+    
+    # Exits are found with a vectorized scan when a position opens, so no
+    # per-bar position updates or stop checks are needed
+    closes = candles.close
+    entry_row = -1
+    exit_row = -1
+    exit_reason = ''
+    
     # Process each bar
-    for i, bar in enumerate(candles):
+    for i in range(len(candles)):
+        bar_time = None
+        
+        if i == exit_row:
+            bar_time = candles.datetime_at(i)
+            engine.portfolio.positions[symbol].update_metrics_path(closes[entry_row + 1:i + 1])
+            engine.portfolio.exit_position(symbol, float(closes[i]), bar_time, exit_reason)
+            exit_row = -1
+        
         if i >= 20:  # Need history for indicators
-            engine.portfolio.update_positions({symbol: bar})
-            engine.portfolio.check_stops_and_targets({symbol: bar})
-            
-            signal = engine.check_entry_signal(symbol, bar['symbol_id'], bar['time'])
+            bar_time = bar_time or candles.datetime_at(i)
+            signal = engine.check_entry_signal(symbol, candles.symbol_id, bar_time)
             if signal:
                 position_cost = engine._calculate_position_cost(signal, engine.portfolio.get_available_cash())
                 if position_cost > 0:
@@ -133,11 +149,10 @@ def run_individual_backtest(symbol: str, start_date: datetime, end_date: datetim
                     
                     position = engine.portfolio.positions.get(symbol)
                     if not position:  # Only enter if no position
-                        from app.backtest_position import Position
                         position = Position(
                             symbol=symbol,
-                            symbol_id=bar['symbol_id'],
-                            entry_time=bar['time'],
+                            symbol_id=candles.symbol_id,
+                            entry_time=bar_time,
                             entry_price=signal['entry_price'],
                             quantity=int(position_cost / signal['entry_price']),
                             stop_loss=signal['stop_loss'],
@@ -146,15 +161,24 @@ def run_individual_backtest(symbol: str, start_date: datetime, end_date: datetim
                             entry_reason=signal['reason']
                         )
                         
-                        engine.portfolio.enter_position(position, position_cost)
+                        if engine.portfolio.enter_position(position, position_cost):
+                            entry_row = i
+                            offset, exit_reason = find_exit_bar(
+                                closes[i + 1:], position.direction,
+                                position.stop_loss, position.take_profit
+                            )
+                            exit_row = i + 1 + offset if offset >= 0 else -1
 
         # Record equity periodically
         if i % 100 == 0:
-            engine.portfolio.record_equity_point(bar['time'], {symbol: bar['close']})
+            bar_time = bar_time or candles.datetime_at(i)
+            engine.portfolio.record_equity_point(bar_time, {symbol: float(closes[i])})
     
     # Close position
     if symbol in engine.portfolio.positions:
-        engine.portfolio.exit_position(symbol, candles[-1]['close'], candles[-1]['time'], 'End of Test')
+        last_row = len(candles) - 1
+        engine.portfolio.positions[symbol].update_metrics_path(closes[entry_row + 1:])
+        engine.portfolio.exit_position(symbol, float(closes[last_row]), candles.datetime_at(last_row), 'End of Test')
     
     # Save and analyze
     engine.analyzer.save_results(run_id)
@@ -21,6 +21,7 @@ from app.backtest_volume_profile import BacktestVolumeProfileCalculator
 from app.backtest_market_state import BacktestMarketStateCalculator
 from app.backtest_order_flow import BacktestOrderFlowCalculator
 from app.backtest_config import BacktestConfig
+from app.backtest_data import SymbolCandles
 
 
 def test_integrated_calculation():
@@ -48,26 +49,15 @@ def test_integrated_calculation():
             print("❌ No candle data found!")
             return
         
-        # Convert to candle dicts
-        candles = []
-        for row in rows:
-            candles.append({
-                'time': row[0],
-                'open': float(row[1]),
-                'high': float(row[2]),
-                'low': float(row[3]),
-                'close': float(row[4]),
-                'volume': int(row[5])
-            })
+        # Convert to columnar candles in chronological order
+        rows.reverse()
+        candles = SymbolCandles.from_rows(rows)
         
-        # Reverse to chronological order
-        candles.reverse()
-        
-        current_price = candles[-1]['close']
+        current_price = float(candles.close[-1])
         
         print(f"📊 Data Loaded:")
         print(f"   Candles: {len(candles)}")
-        print(f"   Period: {candles[0]['time']} to {candles[-1]['time']}")
+        print(f"   Period: {rows[0][0]} to {rows[-1][0]}")
         print(f"   Current Price: ${current_price:.2f}\n")
         
         # Initialize calculators with configurable parameters
@@ -209,14 +199,12 @@ def test_parameter_sensitivity():
         """)
         
         rows = cur.fetchall()
-        candles = [{'time': r[0], 'open': float(r[1]), 'high': float(r[2]), 
-                   'low': float(r[3]), 'close': float(r[4]), 'volume': int(r[5])} 
-                  for r in rows]
-        candles.reverse()
+        rows.reverse()
+        candles = SymbolCandles.from_rows(rows)
     
     conn.close()
     
-    current_price = candles[-1]['close']
+    current_price = float(candles.close[-1])
     
     # Calculate base metrics
     volume_calc = BacktestVolumeProfileCalculator()
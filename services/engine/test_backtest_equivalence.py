@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Test Backtest Equivalence
+
+Checks the array-based backtest code against plain per-bar loops, without
+a database:
+1. Batch and single-window volume profiles vs the original dict-based loop
+2. find_exit_bar vs a bar-by-bar stop/target scan
+3. decode_copy_binary on a hand-built binary COPY buffer
+4. SMACache vs indicators.sma while the last candle is still forming
+"""
+
+import sys
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import indicators as ind
+from app.backtest_data import SymbolCandles, decode_copy_binary, CANDLE_COPY_FIELDS
+from app.backtest_engine import find_exit_bar
+from app.backtest_position import Position
+from app.backtest_volume_profile import BacktestVolumeProfileCalculator
+from app.engine import SMACache
+
+
+def random_columns(rng, n, base_price=150.0):
+    """
+    Random walk of on-tick candle columns, with some flat (high == low) bars.
+
+    Returns (time, open, high, low, close, volume) as float64/int64 arrays,
+    i.e. the values as they come out of the database.
+    """
+    close = np.round(base_price + np.cumsum(rng.normal(0, 0.05, n)), 2)
+    open_ = np.round(close + rng.normal(0, 0.03, n), 2)
+    high = np.round(np.maximum(open_, close) + rng.integers(0, 12, n) * 0.01, 2)
+    low = np.round(np.minimum(open_, close) - rng.integers(0, 12, n) * 0.01, 2)
+
+    flat = rng.random(n) < 0.05
+    high[flat] = close[flat]
+    low[flat] = close[flat]
+    open_[flat] = close[flat]
+
+    volume = rng.integers(100, 50000, n)
+    time = np.arange(n, dtype=np.int64) * 60 + 1_700_000_000
+    return time, open_, high, low, close, volume
+
+
+def reference_profile(high, low, close, volume, tick_size=0.01, lookback_minutes=60):
+    """The original dict-based volume profile, one candle and level at a time."""
+    if len(close) < 10:
+        return None
+    if len(close) > lookback_minutes:
+        high, low = high[-lookback_minutes:], low[-lookback_minutes:]
+        close, volume = close[-lookback_minutes:], volume[-lookback_minutes:]
+
+    def round_to_tick(price):
+        return round(price / tick_size) * tick_size
+
+    price_levels = {}
+    for candle_high, candle_low, candle_close, candle_volume in zip(
+            high.tolist(), low.tolist(), close.tolist(), volume.tolist()):
+        if candle_high - candle_low == 0:
+            level = round_to_tick(candle_close)
+            price_levels[level] = price_levels.get(level, 0) + candle_volume
+            continue
+
+        levels_in_range = []
+        current_price = candle_low
+        while current_price <= candle_high:
+            levels_in_range.append(round_to_tick(current_price))
+            current_price += tick_size
+
+        for level in levels_in_range:
+            weight = 1.0 / (1.0 + abs(level - candle_close))
+            price_levels[level] = (price_levels.get(level, 0)
+                                   + int(candle_volume * weight / len(levels_in_range)))
+
+    poc = max(price_levels.items(), key=lambda x: x[1])[0]
+    total_volume = sum(price_levels.values())
+    if total_volume == 0:
+        return None
+
+    sorted_levels = sorted(price_levels)
+    lower_idx = upper_idx = sorted_levels.index(poc)
+    accumulated_volume = price_levels[poc]
+    while accumulated_volume < total_volume * 0.70:
+        can_expand_up = upper_idx < len(sorted_levels) - 1
+        can_expand_down = lower_idx > 0
+        if not can_expand_up and not can_expand_down:
+            break
+        if can_expand_up and can_expand_down:
+            expand_up = (price_levels[sorted_levels[upper_idx + 1]]
+                         >= price_levels[sorted_levels[lower_idx - 1]])
+        else:
+            expand_up = can_expand_up
+        if expand_up:
+            upper_idx += 1
+            accumulated_volume += price_levels[sorted_levels[upper_idx]]
+        else:
+            lower_idx -= 1
+            accumulated_volume += price_levels[sorted_levels[lower_idx]]
+
+    return {
+        'poc': float(poc),
+        'vah': float(sorted_levels[upper_idx]),
+        'val': float(sorted_levels[lower_idx]),
+        'total_volume': int(total_volume)
+    }
+
+
+def assert_same_profile(actual, expected, label):
+    """Profiles match to the tick and in total volume."""
+    assert (actual is None) == (expected is None), f"{label}: {actual} vs {expected}"
+    if expected is None:
+        return
+    assert actual['total_volume'] == expected['total_volume'], f"{label}: {actual} vs {expected}"
+    for key in ('poc', 'vah', 'val'):
+        assert round(actual[key], 2) == round(expected[key], 2), f"{label} {key}: {actual} vs {expected}"
+
+
+def test_volume_profile_matches_reference():
+    """Single-window and batch profiles match the original loop."""
+    print("🧪 Testing volume profiles against the per-candle loop...")
+
+    rng = np.random.default_rng(7)
+    calculator = BacktestVolumeProfileCalculator(tick_size=0.01)
+
+    time, open_, high, low, close, volume = random_columns(rng, 3000)
+    candles = SymbolCandles.from_columns(time, open_, high, low, close, volume)
+    levels = calculator.candle_levels(candles)
+
+    stops = rng.integers(1, len(candles) + 1, 400)
+    windows = [(levels, int(max(0, stop - rng.integers(1, 90))), int(stop)) for stop in stops]
+    batch = calculator.calculate_profile_batch(windows, lookback_minutes=60)
+
+    for (_, start, stop), batch_profile in zip(windows, batch):
+        expected = reference_profile(high[start:stop], low[start:stop],
+                                     close[start:stop], volume[start:stop])
+        assert_same_profile(calculator.calculate_profile(candles[start:stop], lookback_minutes=60), expected,
+                            f"calculate_profile[{start}:{stop}]")
+        assert_same_profile(batch_profile, expected, f"calculate_profile_batch[{start}:{stop}]")
+
+    print(f"   ✅ {len(windows)} windows identical to the reference\n")
+
+
+def reference_exit_bar(closes, direction, stop_loss, take_profit, start):
+    """Check every bar in turn; the stop wins if both hit on one bar."""
+    for i in range(start, len(closes)):
+        close = float(closes[i])
+        if direction == 'buy':
+            if close <= stop_loss:
+                return i, 'Stop Loss'
+            if close >= take_profit:
+                return i, 'Take Profit'
+        else:
+            if close >= stop_loss:
+                return i, 'Stop Loss'
+            if close <= take_profit:
+                return i, 'Take Profit'
+    return -1, ''
+
+
+def test_find_exit_bar_matches_loop():
+    """find_exit_bar agrees with a bar-by-bar scan and Position.should_exit."""
+    print("🧪 Testing find_exit_bar against a per-bar loop...")
+
+    rng = np.random.default_rng(11)
+    time, open_, high, low, close, volume = random_columns(rng, 5000)
+    closes = SymbolCandles.from_columns(time, open_, high, low, close, volume).close
+    entry_time = datetime(2024, 3, 4, tzinfo=timezone.utc)
+
+    for _ in range(1000):
+        start = int(rng.integers(0, len(closes)))
+        direction = 'buy' if rng.random() < 0.5 else 'sell'
+        entry = float(closes[start])
+        stop_distance, target_distance = (float(x) for x in rng.uniform(0.01, 3.0, 2))
+        if direction == 'buy':
+            stop_loss, take_profit = entry - stop_distance, entry + target_distance
+        else:
+            stop_loss, take_profit = entry + stop_distance, entry - target_distance
+
+        expected = reference_exit_bar(close, direction, stop_loss, take_profit, start)
+        actual = find_exit_bar(closes, direction, stop_loss, take_profit, start=start)
+        assert actual == expected, f"{direction} from {start}: {actual} vs {expected}"
+
+        if expected[0] >= 0:
+            position = Position('TEST', 1, entry_time, entry, 1, stop_loss, take_profit, direction, 'test')
+            assert position.should_exit(float(close[expected[0]])) == (True, expected[1])
+
+    print("   ✅ 1000 exits identical to the per-bar loop\n")
+
+
+def copy_buffer(rows, header_extension=b''):
+    """Build a PostgreSQL binary COPY stream by hand."""
+    data = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, len(header_extension)) + header_extension
+    for row in rows:
+        data += struct.pack('>h', len(row))
+        for fmt, value in row:
+            if value is None:
+                data += struct.pack('>i', -1)
+            else:
+                data += struct.pack('>i', 8) + struct.pack(fmt, value)
+    return data + struct.pack('>h', -1)
+
+
+def test_decode_copy_binary():
+    """decode_copy_binary reads a hand-built candle COPY stream."""
+    print("🧪 Testing decode_copy_binary on a hand-built buffer...")
+
+    rows = [
+        (1_709_541_000, 150.37, 150.45, 150.30, 150.41, 12_345, 1),
+        (1_709_541_060, 150.41, 150.41, 150.41, 150.41, 0, 1),
+        (1_709_541_120, -1.5, 2.25, -3.0, 1e9, 2**40, 42),
+    ]
+    formats = ['>q', '>d', '>d', '>d', '>d', '>q', '>q']
+
+    for extension in (b'', b'\x01\x02\x03\x04'):
+        data = copy_buffer([list(zip(formats, row)) for row in rows], extension)
+        decoded = decode_copy_binary(data, CANDLE_COPY_FIELDS)
+
+        assert len(decoded) == len(rows)
+        for i, row in enumerate(rows):
+            assert tuple(decoded[i].tolist()) == row, f"row {i}: {decoded[i]} vs {row}"
+        assert decoded['f0'].dtype == np.int64 and decoded['f1'].dtype == np.float64
+
+    assert len(decode_copy_binary(b'', CANDLE_COPY_FIELDS)) == 0
+    assert len(decode_copy_binary(copy_buffer([]), CANDLE_COPY_FIELDS)) == 0
+
+    # NULLs break the fixed row layout and must be rejected
+    with_null = list(zip(formats, rows[0]))
+    with_null[5] = ('>q', None)
+    try:
+        decode_copy_binary(copy_buffer([with_null]), CANDLE_COPY_FIELDS)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("NULL value was not rejected")
+
+    print("   ✅ Rows, header extension, empty stream and NULL handling correct\n")
+
+
+def test_sma_cache_matches_sma():
+    """SMACache follows indicators.sma as the last candle forms and new ones close."""
+    print("🧪 Testing SMACache against indicators.sma...")
+
+    rng = np.random.default_rng(3)
+    start = datetime(2024, 3, 4, 14, 30, tzinfo=timezone.utc)
+    times = [start + timedelta(minutes=i) for i in range(300)]
+    closes = list(np.round(150 + np.cumsum(rng.normal(0, 0.05, 300)), 2))
+    periods = (5, 20, 50)
+    window = 60
+
+    cache = SMACache()
+    checks = 0
+
+    def check(end):
+        nonlocal checks
+        recent_times, recent_closes = times[max(0, end - window):end], closes[max(0, end - window):end]
+        cache.feed(1, recent_times, recent_closes, periods)
+        for period in periods:
+            expected = ind.sma(recent_closes, period)
+            sma = cache.get(1, period)
+            actual = sma.value if sma is not None else None
+            assert (actual is None) == (expected is None), f"period {period} at {end}: {actual} vs {expected}"
+            if expected is not None:
+                assert abs(actual - expected) <= 1e-9 * abs(expected), \
+                    f"period {period} at {end}: {actual} vs {expected}"
+            checks += 1
+
+    end = 10
+    while end < 150:
+        check(end)
+
+        # The last candle is still forming: revise its close and feed again
+        for _ in range(int(rng.integers(0, 3))):
+            closes[end - 1] = round(closes[end - 1] + float(rng.normal(0, 0.05)), 2)
+            check(end)
+
+        end += int(rng.integers(1, 4))
+
+    # A gap longer than the window forces a rebuild
+    check(end + window + 40)
+    check(end + window + 41)
+
+    print(f"   ✅ {checks} SMA values match\n")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Backtest Equivalence Tests")
+    print("=" * 60 + "\n")
+
+    try:
+        test_volume_profile_matches_reference()
+        test_find_exit_bar_matches_loop()
+        test_decode_copy_binary()
+        test_sma_cache_matches_sma()
+
+        print("=" * 60)
+        print("✅ All equivalence tests passed!")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n❌ Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
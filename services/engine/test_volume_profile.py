@@ -14,6 +14,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app.backtest_volume_profile import BacktestVolumeProfileCalculator
 from app.backtest_config import BacktestConfig
+from app.backtest_data import SymbolCandles
 
 
 def test_with_real_data():
@@ -40,24 +41,13 @@ def test_with_real_data():
             print("❌ No candle data found!")
             return
         
-        # Convert to candle dicts
-        candles = []
-        for row in rows:
-            candles.append({
-                'time': row[0],
-                'open': float(row[1]),
-                'high': float(row[2]),
-                'low': float(row[3]),
-                'close': float(row[4]),
-                'volume': int(row[5])
-            })
-        
-        # Reverse to chronological order
-        candles.reverse()
+        # Convert to columnar candles in chronological order
+        rows.reverse()
+        candles = SymbolCandles.from_rows(rows)
         
         print(f"📊 Loaded {len(candles)} candles")
-        print(f"   Period: {candles[0]['time']} to {candles[-1]['time']}")
-        print(f"   Price range: ${candles[0]['close']:.2f} - ${candles[-1]['close']:.2f}\n")
+        print(f"   Period: {rows[0][0]} to {rows[-1][0]}")
+        print(f"   Price range: ${candles.close[0]:.2f} - ${candles.close[-1]:.2f}\n")
         
         # Calculate volume profile
         calculator = BacktestVolumeProfileCalculator(tick_size=0.01)
@@ -72,7 +62,7 @@ def test_with_real_data():
             print(f"   Value Area Range:       ${profile['vah'] - profile['val']:.2f}")
             
             # Validate results
-            current_price = candles[-1]['close']
+            current_price = float(candles.close[-1])
             distance_from_poc = abs(current_price - profile['poc']) / profile['poc'] * 100
             in_value_area = profile['val'] <= current_price <= profile['vah']
             
@@ -123,7 +113,7 @@ def test_with_synthetic_data():
         })
     
     calculator = BacktestVolumeProfileCalculator(tick_size=0.01)
-    profile = calculator.calculate_profile(candles)
+    profile = calculator.calculate_profile(SymbolCandles.from_dicts(candles))
     
     if profile:
         print("✅ Synthetic Data Results:")
@@ -28,6 +28,19 @@ SELECT create_hypertable('candles', 'time', if_not_exists => TRUE);
 
 CREATE INDEX IF NOT EXISTS idx_candles_symbol_time ON candles(symbol_id, time DESC);
 
+-- The engine LISTENs on candles_new to evaluate strategies for changed symbols
+CREATE OR REPLACE FUNCTION notify_candles_new() RETURNS trigger AS $$
+BEGIN
+  PERFORM pg_notify('candles_new', NEW.symbol_id::text);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS candles_notify_new ON candles;
+CREATE TRIGGER candles_notify_new
+AFTER INSERT OR UPDATE ON candles
+FOR EACH ROW EXECUTE FUNCTION notify_candles_new();
+
 CREATE TABLE IF NOT EXISTS signals (
   time TIMESTAMPTZ NOT NULL DEFAULT now(),
   strategy_id INT REFERENCES strategies(id),
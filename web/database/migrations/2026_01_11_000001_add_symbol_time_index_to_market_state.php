@@ -0,0 +1,28 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Support\Facades\DB;
+
+return new class extends Migration
+{
+    /**
+     * Add a (symbol_id, time DESC) index to market_state.
+     *
+     * The engine and backtester read "latest state for a symbol at or before
+     * a time" (WHERE symbol_id = ? AND time <= ? ORDER BY time DESC LIMIT N).
+     * The (time, symbol_id) primary key can't serve that as a backward index
+     * scan; candles and order_flow already have the matching index.
+     */
+    public function up(): void
+    {
+        DB::statement("CREATE INDEX IF NOT EXISTS idx_market_state_symbol_time ON market_state(symbol_id, time DESC);");
+    }
+
+    /**
+     * Reverse the migration.
+     */
+    public function down(): void
+    {
+        DB::statement("DROP INDEX IF EXISTS idx_market_state_symbol_time;");
+    }
+};
@@ -0,0 +1,42 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Support\Facades\DB;
+
+return new class extends Migration
+{
+    /**
+     * NOTIFY candles_new with the symbol_id whenever a candle is written.
+     *
+     * The engine LISTENs on this channel and evaluates user strategies only
+     * for symbols whose candles changed, instead of polling every second.
+     * Postgres folds identical notifications within one transaction, so bulk
+     * backfills send one per symbol.
+     */
+    public function up(): void
+    {
+        DB::statement("
+            CREATE OR REPLACE FUNCTION notify_candles_new() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('candles_new', NEW.symbol_id::text);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+        ");
+        DB::statement("DROP TRIGGER IF EXISTS candles_notify_new ON candles;");
+        DB::statement("
+            CREATE TRIGGER candles_notify_new
+            AFTER INSERT OR UPDATE ON candles
+            FOR EACH ROW EXECUTE FUNCTION notify_candles_new();
+        ");
+    }
+
+    /**
+     * Reverse the migration.
+     */
+    public function down(): void
+    {
+        DB::statement("DROP TRIGGER IF EXISTS candles_notify_new ON candles;");
+        DB::statement("DROP FUNCTION IF EXISTS notify_candles_new();");
+    }
+};
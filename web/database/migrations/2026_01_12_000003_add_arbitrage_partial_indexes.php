@@ -0,0 +1,51 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Support\Facades\DB;
+
+return new class extends Migration
+{
+    /**
+     * Cover the arbitrage strategy's hot-path queries with partial indexes.
+     *
+     * The scan reads arbitrage rows from the last 10 seconds and keeps the 20
+     * most profitable. idx_binary_prices_arb stays keyed on timestamp so that
+     * window is a short range scan (leading with estimated_profit_pct would
+     * walk older opportunities first), but now carries the scanned columns.
+     *
+     * Open positions are checked per market and summed for exposure before
+     * every trade; a partial index over status = 'open' serves both without
+     * touching closed history.
+     *
+     * binary_prices is a hypertable, which doesn't support CREATE INDEX
+     * CONCURRENTLY, so both indexes are built inside the migration.
+     */
+    public function up(): void
+    {
+        DB::statement("DROP INDEX IF EXISTS idx_binary_prices_arb;");
+        DB::statement("
+            CREATE INDEX idx_binary_prices_arb ON binary_prices(timestamp DESC)
+            INCLUDE (symbol_id, estimated_profit_pct, yes_ask, no_ask, spread)
+            WHERE arbitrage_opportunity = true;
+        ");
+        DB::statement("
+            CREATE INDEX IF NOT EXISTS idx_binary_positions_open ON binary_positions(market_id)
+            INCLUDE (yes_qty, yes_entry_price, no_qty, no_entry_price)
+            WHERE status = 'open';
+        ");
+    }
+
+    /**
+     * Reverse the migration.
+     */
+    public function down(): void
+    {
+        DB::statement("DROP INDEX IF EXISTS idx_binary_positions_open;");
+        DB::statement("DROP INDEX IF EXISTS idx_binary_prices_arb;");
+        DB::statement("
+            CREATE INDEX idx_binary_prices_arb
+            ON binary_prices(timestamp DESC)
+            WHERE arbitrage_opportunity = true
+        ");
+    }
+};